@@ -5,13 +5,19 @@ Uses structured chunks from job_descriptions_structured.json
 
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 import chromadb
-from chromadb.utils import embedding_functions
-from tqdm import tqdm
 import logging
+import sys
 from pathlib import Path
 
+# Shared settings and helpers live in retrieval_phase/
+sys.path.insert(0, str(Path(__file__).parent.parent / "retrieval_phase"))
+from config import hnsw_metadata, JDS_STRUCTURED
+from embedding_client import get_embedding_function
+from query_cache import bump_index_version
+from embed_pipeline import stream_to_chroma
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -36,9 +42,11 @@ def load_json_file(file_path: str) -> List[Dict[str, Any]]:
     return data
 
 
-def get_job_descriptions_collection(persist_directory: str = "chroma_db"):
+def get_job_descriptions_collection(persist_directory: str = "chroma_db", hnsw_params: Dict[str, Any] = None,
+                                    rebuild: bool = False):
     """
     Get or create ChromaDB collection for job descriptions.
+    hnsw_params overrides config.HNSW_PARAMS["job_descriptions"] (only applied on creation).
     """
     # Resolve path relative to project root
     path = Path(persist_directory)
@@ -48,35 +56,28 @@ def get_job_descriptions_collection(persist_directory: str = "chroma_db"):
     
     os.makedirs(path, exist_ok=True)
     client = chromadb.PersistentClient(path=str(path))
+    if rebuild:
+        try:
+            client.delete_collection("job_descriptions")
+        except Exception:
+            pass  # nothing to drop yet
 
-    # FREE embedder
-    embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+    # FREE embedder (served by the embedding daemon when it is running)
+    embedding_function = get_embedding_function()
 
     # Create collection with cosine similarity
     collection = client.get_or_create_collection(
         name="job_descriptions",
         embedding_function=embedding_function,
-        metadata={"hnsw:space": "cosine"}
+        metadata=hnsw_metadata("job_descriptions", hnsw_params)
     )
     logger.info("✅ Job Descriptions collection ready with FREE embeddings")
     return collection
 
 
-def add_job_descriptions_to_chroma(
-    job_descriptions: List[Dict[str, Any]], 
-    collection,
-    batch_size: int = 100
-):
-    """Add job descriptions to Chroma collection - each structured chunk separately"""
-    logger.info(f"Processing {len(job_descriptions)} job descriptions...")
-    
-    documents = []
-    metadatas = []
-    ids = []
-    
-    for idx, jd in enumerate(tqdm(job_descriptions, desc="Preparing job descriptions")):
+def iter_jd_chunks(job_descriptions: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Yield (doc_id, document, metadata) for each non-empty structured chunk"""
+    for idx, jd in enumerate(job_descriptions):
         position_title = jd.get("position_title", f"job_{idx}")
         structured_chunks = jd.get("structured_chunks", [])
         
@@ -89,9 +90,6 @@ def add_job_descriptions_to_chroma(
             if not chunk or not str(chunk).strip():
                 continue
             
-            # Create document
-            documents.append(str(chunk))
-            
             # Create metadata
             metadata = {
                 "position_title": str(position_title),
@@ -99,32 +97,37 @@ def add_job_descriptions_to_chroma(
                 "total_chunks": len(structured_chunks),
                 "source": "job_descriptions_cleaned.json"
             }
-            metadatas.append(metadata)
             
             # Create unique ID
             doc_id = f"jd_{idx}_chunk_{chunk_idx}_{position_title.replace(' ', '_')}"
-            ids.append(doc_id)
-    
-    # Add to Chroma in batches
-    logger.info(f"Adding {len(documents)} job description chunks to Chroma...")
-    for i in tqdm(range(0, len(documents), batch_size), desc="Adding to Chroma"):
-        batch_docs = documents[i:i+batch_size]
-        batch_metas = metadatas[i:i+batch_size]
-        batch_ids = ids[i:i+batch_size]
-        
-        collection.add(
-            documents=batch_docs,
-            metadatas=batch_metas,
-            ids=batch_ids
-        )
+            yield doc_id, str(chunk), metadata
+
+
+def add_job_descriptions_to_chroma(
+    job_descriptions: List[Dict[str, Any]], 
+    collection,
+    batch_size: int = 100,
+    upsert: bool = False
+):
+    """
+    Add job descriptions to Chroma collection - each structured chunk separately.
+    Chunks stream through the bounded prepare -> encode -> write pipeline (embed_pipeline.py).
+    """
+    logger.info(f"Processing {len(job_descriptions)} job descriptions...")
+    stats = stream_to_chroma(iter_jd_chunks(job_descriptions), collection, encode_batch=batch_size,
+                             upsert=upsert, desc="Embedding job description chunks")
     
-    logger.info(f"✅ Successfully added {len(documents)} job description chunks to Chroma")
+    bump_index_version("job_descriptions")
+    logger.info(f"✅ Successfully added {stats['rows']} job description chunks to Chroma "
+                f"({stats['seconds']}s: encode {stats['encode_seconds']}s, write {stats['write_seconds']}s)")
+    return stats
 
 
 def embed_job_descriptions(
-    input_file: str = "extracted_data_cleaned/job_descriptions_cleaned.json",
+    input_file: str = str(JDS_STRUCTURED),
     persist_directory: str = "chroma_db",
-    batch_size: int = 100
+    batch_size: int = 100,
+    rebuild: bool = False
 ):
     """
     Main function to embed job descriptions
@@ -132,7 +135,8 @@ def embed_job_descriptions(
     Args:
         input_file: Path to structured job descriptions JSON file
         persist_directory: Directory to store Chroma database
-        batch_size: Batch size for adding documents to Chroma
+        batch_size: Number of chunks encoded per model call
+        rebuild: Drop the existing collection first (re-embed from scratch)
     """
     logger.info("=" * 70)
     logger.info("Embedding Job Descriptions")
@@ -146,7 +150,7 @@ def embed_job_descriptions(
         return
     
     # Get collection
-    collection = get_job_descriptions_collection(persist_directory)
+    collection = get_job_descriptions_collection(persist_directory, rebuild=rebuild)
     
     # Process and add to Chroma
     add_job_descriptions_to_chroma(job_descriptions, collection, batch_size)
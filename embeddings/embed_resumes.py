@@ -5,12 +5,21 @@ embedding selected fields separately (summary, education, work_experience, skill
 
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions # Chroma helper wrappers for embedding models
-from tqdm import tqdm  # progress bars for loops.
 import logging
+import sys
+
+# Shared settings and helpers live in retrieval_phase/
+sys.path.insert(0, str(Path(__file__).parent.parent / "retrieval_phase"))
+from config import hnsw_metadata, RESUMES_CLEANED
+from embedding_client import get_embedding_function
+from build_clean_title_index import estimate_years_experience, detect_resume_seniority
+from query_cache import bump_index_version
+from bm25_index import build_bm25_index
+from skill_index import build_skill_index
+from embed_pipeline import stream_to_chroma
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -35,10 +44,12 @@ def load_json_file(file_path: str) -> List[Dict[str, Any]]:
     logger.info(f"Loaded {len(data)} records from {path}")
     return data
 
-def get_resumes_collection(persist_directory: str = "chroma_db"):
+def get_resumes_collection(persist_directory: str = "chroma_db", hnsw_params: Dict[str, Any] = None,
+                           rebuild: bool = False):
     """
-    Collection ready to accept documents; 
-    embeddings will be produced via SentenceTransformerEmbeddingFunction.
+    Collection ready to accept documents;
+    embeddings will be produced via the shared embedding function (daemon or in-process).
+    hnsw_params overrides config.HNSW_PARAMS["resumes"] (only applied on creation).
     """
     # Resolve path relative to project root
     path = Path(persist_directory)
@@ -48,41 +59,47 @@ def get_resumes_collection(persist_directory: str = "chroma_db"):
     
     os.makedirs(path, exist_ok=True)
     client = chromadb.PersistentClient(path=str(path))
+    if rebuild:
+        try:
+            client.delete_collection("resumes")
+        except Exception:
+            pass  # nothing to drop yet
 
-    # FREE embedder
-    embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+    # FREE embedder (served by the embedding daemon when it is running)
+    embedding_function = get_embedding_function()
 
     # creates the collection with cosine similarity metadata.
     collection = client.get_or_create_collection(
         name="resumes",
         embedding_function=embedding_function,
-        metadata={"hnsw:space": "cosine"}
+        metadata=hnsw_metadata("resumes", hnsw_params)
     )
     logger.info("✅ Resumes collection ready with FREE embeddings")
     return collection
 
-def add_resumes_to_chroma(resumes: List[Dict[str, Any]],collection,batch_size: int = 100):
-    """Add resumes to Chroma collection with embeddings - each field separately"""
-    logger.info(f"Processing {len(resumes)} resumes...")
-    
-    documents = []
-    metadatas = []
-    ids = []
-    
+def iter_resume_fields(resumes: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Yield (doc_id, document, metadata) for each non-empty field of each resume"""
     # Fields to embed separately
     fields_to_embed = ["summary", "education", "work_experience", "skills"]
     
-    for idx, record in enumerate(tqdm(resumes, desc="Preparing resumes")):
+    for idx, record in enumerate(resumes):
         # Handle both old format (id) and new format (ID)
         resume_id = record.get("ID") or record.get("id", f"resume_{idx}")
         category = record.get("category", "unknown")
         
+        # Seniority / experience go into every field's metadata so queries can
+        # filter with `where` instead of over-fetching and post-filtering
+        work_experience = str(record.get("work_experience", ""))
+        years_experience = estimate_years_experience(f"{record.get('summary', '')} {work_experience}")
+        headline = " ".join(work_experience.split()[:12])
+        seniority = detect_resume_seniority(headline, years_experience)
+
         # Base metadata for all fields from this resume
         base_metadata = {
             "id": str(resume_id),
             "category": str(category),
+            "seniority": seniority,
+            "years_experience": years_experience,  # -1 when unknown
             "source": "resumes_cleaned.json"
         }
         
@@ -94,38 +111,36 @@ def add_resumes_to_chroma(resumes: List[Dict[str, Any]],collection,batch_size: i
             if not field_value or not str(field_value).strip():
                 continue
             
-            # Create document with just this field
-            documents.append(str(field_value))
-            
             # Create metadata with field type
             metadata = base_metadata.copy()
             metadata["field_type"] = field
-            metadatas.append(metadata)
             
             # Create unique ID for this field
             doc_id = f"resume_{resume_id}_{field}_{category.replace(' ', '_')}"
-            ids.append(doc_id)
-    
-    # Add to Chroma in batches
-    logger.info(f"Adding {len(documents)} resume fields to Chroma...")
-    for i in tqdm(range(0, len(documents), batch_size), desc="Adding to Chroma"):
-        batch_docs = documents[i:i+batch_size]
-        batch_metas = metadatas[i:i+batch_size]
-        batch_ids = ids[i:i+batch_size]
-        
-        collection.add(
-            documents=batch_docs,
-            metadatas=batch_metas,
-            ids=batch_ids
-        )
+            yield doc_id, str(field_value), metadata
+
+
+def add_resumes_to_chroma(resumes: List[Dict[str, Any]], collection, batch_size: int = 100, upsert: bool = False):
+    """
+    Add resumes to Chroma collection with embeddings - each field separately.
+    Fields are prepared, encoded in batches of batch_size and written while the
+    next batch encodes (see embed_pipeline.py), so memory stays bounded.
+    """
+    logger.info(f"Processing {len(resumes)} resumes...")
+    stats = stream_to_chroma(iter_resume_fields(resumes), collection, encode_batch=batch_size,
+                             upsert=upsert, desc="Embedding resume fields")
     
-    logger.info(f"✅ Successfully added {len(documents)} resume fields to Chroma")
+    bump_index_version("resumes")
+    logger.info(f"✅ Successfully added {stats['rows']} resume fields to Chroma "
+                f"({stats['seconds']}s: encode {stats['encode_seconds']}s, write {stats['write_seconds']}s)")
+    return stats
 
 
 def embed_resumes(
-    input_file: str = "extracted_data_cleaned/resumes_cleaned.json",
+    input_file: str = str(RESUMES_CLEANED),
     persist_directory: str = "chroma_db",
-    batch_size: int = 100
+    batch_size: int = 100,
+    rebuild: bool = False
 ):
     """
     Main function to embed resumes
@@ -133,7 +148,8 @@ def embed_resumes(
     Args:
         input_file: Path to resumes JSON file
         persist_directory: Directory to store Chroma database
-        batch_size: Batch size for adding documents to Chroma
+        batch_size: Number of fields encoded per model call
+        rebuild: Drop the existing collection first (re-embed from scratch)
     """
     logger.info("=" * 70)
     logger.info("Embedding Resumes")
@@ -147,10 +163,18 @@ def embed_resumes(
         return
     
     # Get collection
-    collection = get_resumes_collection(persist_directory)
+    collection = get_resumes_collection(persist_directory, rebuild=rebuild)
     
     # Process and add to Chroma
     add_resumes_to_chroma(resumes, collection, batch_size)
+
+    # Lexical index over the same fields, for hybrid search
+    index = build_bm25_index(collection)
+    logger.info(f"✅ BM25 index: {len(index)} fields, {len(index.term_ids)} terms")
+
+    # Skill bitmaps for must-have / exclude filters
+    skills = build_skill_index(resumes)
+    logger.info(f"✅ Skill index: {len(skills)} resumes, {len(skills.skills)} skills")
     
     # Print collection info
     count = collection.count()
@@ -4,11 +4,16 @@ Processes all PDFs in the data directory structure.
 """
 
 import json
+import sys
 from pathlib import Path
 from extract_text import extract_text_from_pdf
 from resume_parser import parse_resume
 from tqdm import tqdm
 
+# Shared settings live in retrieval_phase/
+sys.path.insert(0, str(Path(__file__).parent.parent / "retrieval_phase"))
+from config import DATA_DIR, RESUMES
+
 
 def process_resume_directory(directory: Path, category: str = None) -> list:
     """Process all PDFs in a directory."""
@@ -32,7 +37,7 @@ def process_resume_directory(directory: Path, category: str = None) -> list:
     return resumes
 
 
-def extract_all_resumes(data_root: Path = Path("data/data")) -> list:
+def extract_all_resumes(data_root: Path = DATA_DIR) -> list:
     """Extract all resumes from the data directory structure."""
     all_resumes = []
     
@@ -56,18 +61,10 @@ def extract_all_resumes(data_root: Path = Path("data/data")) -> list:
     return all_resumes
 
 
-def main():
-    """Main extraction function."""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description="Extract and parse resumes from PDFs")
-    parser.add_argument("--data-dir", type=str, default="data/data", help="Root directory containing resume PDFs")
-    parser.add_argument("--output", type=str, default="extracted_data/resumes_data_pdfplumber.json", help="Output JSON file")
-    
-    args = parser.parse_args()
-    
-    data_root = Path(args.data_dir)
-    output_file = Path(args.output)
+def extract_to_file(data_root: Path = DATA_DIR, output_file: Path = RESUMES) -> list:
+    """Extract every resume under data_root and save them to output_file."""
+    data_root = Path(data_root)
+    output_file = Path(output_file)
     
     print("="*70)
     print("Resume Extraction and Parsing")
@@ -78,7 +75,7 @@ def main():
     
     if not all_resumes:
         print("❌ No resumes extracted!")
-        return
+        return []
     
     # Save to JSON
     output_file.parent.mkdir(parents=True, exist_ok=True)
@@ -101,8 +98,20 @@ def main():
     print(f"\n📊 Summary by Category:")
     for cat, count in sorted(categories.items()):
         print(f"  {cat}: {count} resumes")
+    return all_resumes
+
+
+def main():
+    """Main extraction function."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Extract and parse resumes from PDFs")
+    parser.add_argument("--data-dir", type=str, default=str(DATA_DIR), help="Root directory containing resume PDFs")
+    parser.add_argument("--output", type=str, default=str(RESUMES), help="Output JSON file")
+    
+    args = parser.parse_args()
+    extract_to_file(Path(args.data_dir), Path(args.output))
 
 
 if __name__ == "__main__":
     main()
-
@@ -14,15 +14,18 @@ current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 from match_resumes_to_jd import prepare_jd_query_chunks
 
-ROOT = Path(__file__).parent.parent
-INPUT_FILE = ROOT / "extracted_data" / "job_descriptions_filtered.json"
-OUTPUT_FILE = ROOT / "extracted_data" / "job_descriptions_cleaned_structured.json"
+# Shared settings live in retrieval_phase/
+sys.path.insert(0, str(current_dir.parent / "retrieval_phase"))
+from config import JDS_FULL, JDS_STRUCTURED
 
-def process_job_descriptions():
+INPUT_FILE = JDS_FULL
+OUTPUT_FILE = JDS_STRUCTURED  # read by embed_job_descriptions.py and match_engine.py
+
+def process_job_descriptions(input_file: Path = INPUT_FILE, output_file: Path = OUTPUT_FILE) -> list:
     """Process all job descriptions and create structured chunks."""
-    print(f"Loading from: {INPUT_FILE}")
+    print(f"Loading from: {input_file}")
     
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+    with open(input_file, "r", encoding="utf-8") as f:
         jds = json.load(f)
     
     print(f"Processing {len(jds)} job descriptions...")
@@ -48,14 +51,14 @@ def process_job_descriptions():
         structured_jds.append(structured_entry)
     
     # Save to new file
-    print(f"\nSaving to: {OUTPUT_FILE}")
-    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    print(f"\nSaving to: {output_file}")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+    with open(output_file, "w", encoding="utf-8") as f:
         json.dump(structured_jds, f, ensure_ascii=False, indent=2)
     
-    size_kb = OUTPUT_FILE.stat().st_size / 1024
-    print(f"✅ Done! Saved {len(structured_jds)} job descriptions → {OUTPUT_FILE} ({size_kb:.1f} KB)")
+    size_kb = output_file.stat().st_size / 1024
+    print(f"✅ Done! Saved {len(structured_jds)} job descriptions → {output_file} ({size_kb:.1f} KB)")
     
     # Show sample
     if structured_jds:
@@ -66,6 +69,7 @@ def process_job_descriptions():
         print(f"\n  Structured chunks:")
         for i, chunk in enumerate(sample['structured_chunks'][:3], 1):
             print(f"    {i}. {chunk[:100]}...")
+    return structured_jds
 
 
 if __name__ == "__main__":
@@ -4,16 +4,16 @@ Fixes polluted job_title fields and properly structures all sections.
 """
 
 import json
+import sys
 from pathlib import Path
 import re
 
-input_file = Path("extracted_data/resumes_data_pdfplumber.json")
-output_file = Path("extracted_data/resumes_cleaned.json")  # New cleaned file
+# Shared settings live in retrieval_phase/
+sys.path.insert(0, str(Path(__file__).parent.parent / "retrieval_phase"))
+from config import RESUMES, RESUMES_CLEANED
 
-with open(input_file, "r", encoding="utf-8") as f:
-    raw_resumes = json.load(f)
-
-cleaned_resumes = []
+INPUT_FILE = RESUMES
+OUTPUT_FILE = RESUMES_CLEANED  # read by embed_resumes.py and build_clean_title_index.py
 
 # Common job title keywords to identify real titles
 JOB_TITLE_KEYWORDS = [
@@ -23,6 +23,19 @@ JOB_TITLE_KEYWORDS = [
     "LEAD", "SENIOR", "JUNIOR", "ASSOCIATE", "SUPERVISOR", "TECHNICIAN"
 ]
 
+# Common skills across different domains (also the vocabulary of the skill index)
+SKILL_PATTERNS = [
+    r'\b(excel|sql|python|java|javascript|react|node\.js|html|css)\b',
+    r'\b(gaap|ifrs|quickbooks|sap|oracle|tableau|power\s*bi)\b',
+    r'\b(accounting|audit|tax|reconciliation|bookkeeping)\b',
+    r'\b(project\s*management|agile|scrum|devops|ci/cd)\b',
+    r'\b(aws|azure|gcp|docker|kubernetes)\b'
+]
+_SKILL_RES = [re.compile(p, re.IGNORECASE) for p in SKILL_PATTERNS]
+
+# Spelling variants the patterns allow, mapped to one canonical name
+SKILL_ALIASES = {"powerbi": "power bi", "projectmanagement": "project management"}
+
 def extract_clean_job_title(raw_title: str, summary: str) -> str:
     """Extract clean job title from polluted field."""
     if not raw_title:
@@ -88,6 +101,18 @@ def extract_clean_job_title(raw_title: str, summary: str) -> str:
     
     return "N/A"
 
+def canonical_skill(name: str) -> str:
+    """Canonical skill key: lower-case, single spaces, known variants merged."""
+    name = re.sub(r'\s+', ' ', str(name).strip().lower())
+    return SKILL_ALIASES.get(name, name)
+
+def extract_skills(text: str) -> set:
+    """Canonical skills from SKILL_PATTERNS found in text."""
+    found_skills = set()
+    for pattern in _SKILL_RES:
+        found_skills.update(canonical_skill(m) for m in pattern.findall(str(text)))
+    return found_skills
+
 def clean_skills_field(skills: str, experience: str, summary: str) -> str:
     """Clean and extract skills from polluted skills field."""
     if not skills:
@@ -98,21 +123,7 @@ def clean_skills_field(skills: str, experience: str, summary: str) -> str:
     # If skills field is too long (likely polluted with experience), extract keywords
     if len(skills) > 500:
         # Extract common skill keywords
-        all_text = f"{summary} {experience} {skills}".lower()
-        
-        # Common skills across different domains
-        skill_patterns = [
-            r'\b(excel|sql|python|java|javascript|react|node\.js|html|css)\b',
-            r'\b(gaap|ifrs|quickbooks|sap|oracle|tableau|power\s*bi)\b',
-            r'\b(accounting|audit|tax|reconciliation|bookkeeping)\b',
-            r'\b(project\s*management|agile|scrum|devops|ci/cd)\b',
-            r'\b(aws|azure|gcp|docker|kubernetes)\b'
-        ]
-        
-        found_skills = set()
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, all_text, re.IGNORECASE)
-            found_skills.update([m.lower() for m in matches])
+        found_skills = extract_skills(f"{summary} {experience} {skills}")
         
         if found_skills:
             return ", ".join(sorted(list(found_skills))[:20])
@@ -142,7 +153,8 @@ def clean_text_field(text: str, max_length: int = None) -> str:
     
     return text.strip()
 
-for i, r in enumerate(raw_resumes):
+def clean_resume(r: dict, i: int) -> dict:
+    """Clean one raw pdfplumber record into the final resume structure."""
     raw_title = str(r.get("job_title", "")).strip()
     summary = str(r.get("summary", "")).strip()
     experience = str(r.get("work_experience", "")).strip()
@@ -168,7 +180,7 @@ for i, r in enumerate(raw_resumes):
     clean_experience = clean_text_field(experience, max_length=5000)
     
     # Final cleaned resume structure - exact fields as requested (no job_title)
-    cleaned_resume = {
+    return {
         "ID": str(r.get("id", f"resume_{i}")),
         "category": str(r.get("category", "UNKNOWN")).strip().upper(),
         "summary": clean_summary or "No summary available",
@@ -176,22 +188,31 @@ for i, r in enumerate(raw_resumes):
         "education": clean_education or "Not specified",
         "skills": clean_skills or "Not specified"
     }
-    
-    cleaned_resumes.append(cleaned_resume)
-
-# Save cleaned version to new file
-output_file.parent.mkdir(parents=True, exist_ok=True)
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(cleaned_resumes, f, ensure_ascii=False, indent=2)
-
-print(f"✅ Cleaned and restructured {len(cleaned_resumes)} resumes!")
-print(f"💾 Saved to: {output_file}")
-print(f"\n📊 Sample cleaned resume:")
-if cleaned_resumes:
-    sample = cleaned_resumes[0]
-    print(f"  ID: {sample['ID']}")
-    print(f"  Category: {sample['category']}")
-    print(f"  Summary: {sample['summary'][:100]}...")
-    print(f"  Work Experience: {sample['work_experience'][:100]}...")
-    print(f"  Education: {sample['education'][:100]}...")
-    print(f"  Skills: {sample['skills'][:100]}...")
\ No newline at end of file
+
+def clean_resumes(input_file: Path = INPUT_FILE, output_file: Path = OUTPUT_FILE) -> list:
+    """Clean every resume in input_file and save the result to output_file."""
+    with open(input_file, "r", encoding="utf-8") as f:
+        raw_resumes = json.load(f)
+
+    cleaned_resumes = [clean_resume(r, i) for i, r in enumerate(raw_resumes)]
+
+    # Save cleaned version to new file
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(cleaned_resumes, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Cleaned and restructured {len(cleaned_resumes)} resumes!")
+    print(f"💾 Saved to: {output_file}")
+    print(f"\n📊 Sample cleaned resume:")
+    if cleaned_resumes:
+        sample = cleaned_resumes[0]
+        print(f"  ID: {sample['ID']}")
+        print(f"  Category: {sample['category']}")
+        print(f"  Summary: {sample['summary'][:100]}...")
+        print(f"  Work Experience: {sample['work_experience'][:100]}...")
+        print(f"  Education: {sample['education'][:100]}...")
+        print(f"  Skills: {sample['skills'][:100]}...")
+    return cleaned_resumes
+
+if __name__ == "__main__":
+    clean_resumes()
@@ -2,7 +2,7 @@
 import json
 from pathlib import Path
 
-input_file = Path("extracted_data/resumes_cleaned.json")
+input_file = Path(__file__).parent.parent / "extracted_data_cleaned" / "resumes_cleaned.json"
 if not input_file.exists():
     print(f"❌ File not found: {input_file}")
     print("Please run cleaning_resumes.py first!")
@@ -0,0 +1,103 @@
+"""
+Compare query-expansion modes on recall@k at equal (or lower) total n_results.
+
+Queries are canonical titles sampled from the title neighbour graph. Each title
+carries the resume category it came from, and every resume in that category
+counts as relevant (weak labels). For each mode we report:
+- recall@k  = relevant resumes in the top k / min(k, #relevant)
+- total n_results fetched from Chroma per query
+- p50 / p95 query latency
+
+Usage:
+    python retrieval_phase/benchmark_expansion.py --queries 100 --k 80
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+import query_cache
+import query_expander_rag as qe
+from chroma_utils import fetch_all
+from config import RESULTS
+
+MODES = ["concat", "centroid", "rrf"]
+
+
+def load_labelled_queries(num_queries: int, seed: int) -> list:
+    """(title, category) pairs from the neighbour graph."""
+    graph = qe.load_title_neighbours()
+    if not graph:
+        raise SystemExit("❌ No title neighbour graph; run retrieval_phase/build_clean_title_index.py first")
+    entries = [e for e in graph["titles"].values() if e.get("category")]
+    random.Random(seed).shuffle(entries)
+    return [(e["title"], e["category"].strip().upper()) for e in entries[:num_queries]]
+
+
+def load_resume_categories() -> dict:
+    """category -> set of resume IDs, from the resumes collection metadata."""
+    data = fetch_all(qe.resumes_collection, include=["metadatas"])
+    by_category = {}
+    for meta in data["metadatas"]:
+        if meta and meta.get("id"):
+            by_category.setdefault(str(meta.get("category", "")).strip().upper(), set()).add(meta["id"])
+    return by_category
+
+
+def run_benchmark(num_queries: int = 100, k: int = 80, seed: int = 42) -> dict:
+    # Measure the search itself, not the cache
+    query_cache.QUERY_CACHE_ENABLED = False
+
+    queries = load_labelled_queries(num_queries, seed)
+    relevant_by_category = load_resume_categories()
+    print(f"Benchmarking {len(queries)} queries, recall@{k}\n")
+
+    summary = {}
+    for mode in MODES:
+        recalls, fetched, latencies = [], [], []
+        for title, category in queries:
+            relevant = relevant_by_category.get(category, set())
+            if not relevant:
+                continue
+            start = time.perf_counter()
+            output = qe.search_resumes_batch([title], top_k=k, expansion_mode=mode, hybrid=False)[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            hits = {c["resume_id"] for c in output["candidates"][:k]}
+            recalls.append(len(hits & relevant) / min(k, len(relevant)))
+            # As requested by the search itself: rrf sends one list per kept vector
+            fetched.append(output["n_results"])
+
+        summary[mode] = {
+            "queries": len(recalls),
+            f"recall_at_{k}": round(float(np.mean(recalls)), 4) if recalls else 0.0,
+            "mean_total_n_results": round(float(np.mean(fetched)), 1) if fetched else 0.0,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2) if latencies else 0.0,
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2) if latencies else 0.0,
+        }
+
+    print(f"{'mode':<10} | {'recall@' + str(k):>10} | {'n_results':>10} | {'p50 ms':>8} | {'p95 ms':>8}")
+    print("-" * 60)
+    for mode, row in summary.items():
+        print(f"{mode:<10} | {row[f'recall_at_{k}']:>10.4f} | {row['mean_total_n_results']:>10.1f} | "
+              f"{row['p50_ms']:>8.2f} | {row['p95_ms']:>8.2f}")
+    print("-" * 60)
+
+    report = {"k": k, "num_queries": len(queries), "seed": seed, "modes": summary}
+    output_file = RESULTS / "benchmark_expansion.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved to: {output_file}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concat vs centroid vs RRF expansion")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_benchmark(args.queries, args.k, args.seed)
@@ -0,0 +1,383 @@
+"""
+Ingestion throughput benchmark: records/sec and peak RSS per stage on a fixed fixture.
+
+Stages (each measured in its own fresh process, so one stage's allocations
+and imports do not show up in the next one's RSS):
+
+    extract        extract_text_from_pdf   over the fixture resume PDFs
+    parse          parse_resume            over the extracted texts
+    clean          clean_resume            over the parsed records
+    jd_chunks      prepare_jd_query_chunks over the fixture job descriptions
+    embed_resumes  add_resumes_to_chroma            into a temporary Chroma dir
+    embed_jds      add_job_descriptions_to_chroma   into a temporary Chroma dir
+
+The fixture is deterministic: resume PDFs are rendered from seeded template
+text (pdf_writer.py, no real resumes needed) and the job descriptions are the
+first N of JDS_FULL. Each stage's input is the previous stage's output,
+prepared once (untimed) and kept under results/bench_fixture/. Loading inputs
+and warming the model happen before the clock starts; only the stage call is
+timed. Peak RSS is the process high-water mark after the stage, and the delta
+is how much the stage itself raised it.
+
+Every run appends one line to results/benchmark_ingestion_history.jsonl
+(timestamp, git commit, fixture, per-stage best of --repeat runs). `compare`
+checks the latest entry against the previous one on the same fixture and
+exits 1 if any stage lost more than --threshold of its records/sec or grew its
+peak RSS by more than --threshold.
+
+Usage:
+    python retrieval_phase/benchmark_ingestion.py run --resumes 200 --jds 200 --repeat 3
+    python retrieval_phase/benchmark_ingestion.py run --only parse clean jd_chunks
+    python retrieval_phase/benchmark_ingestion.py compare --threshold 0.10
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from config import ROOT, RESULTS, JDS_FULL
+from pdf_writer import write_text_pdf
+
+for folder in ("extracting_pdfplumber", "query_structuring_resumes", "query_structuring_JD", "embeddings"):
+    sys.path.insert(0, str(ROOT / folder))
+
+FIXTURE_DIR = RESULTS / "bench_fixture"
+HISTORY_FILE = RESULTS / "benchmark_ingestion_history.jsonl"
+FIXTURE_VERSION = 1   # bump when the fixture generator changes
+
+
+# === Fixture ===
+
+FIXTURE_PROFILES = {
+    "ACCOUNTANT": (["Staff Accountant", "Senior Accountant", "Accounting Manager"],
+                   ["GAAP", "QuickBooks", "Excel", "reconciliation", "audit", "tax", "SAP"]),
+    "INFORMATION-TECHNOLOGY": (["Systems Administrator", "Software Developer", "IT Manager"],
+                               ["Python", "SQL", "AWS", "Docker", "Kubernetes", "Java", "DevOps"]),
+    "ENGINEERING": (["Mechanical Engineer", "Project Engineer", "Engineering Manager"],
+                    ["AutoCAD", "project management", "Excel", "Six Sigma", "MATLAB", "agile"]),
+    "SALES": (["Sales Representative", "Account Executive", "Sales Manager"],
+              ["Salesforce", "CRM", "Excel", "negotiation", "forecasting", "Tableau"]),
+    "HR": (["HR Coordinator", "HR Specialist", "HR Director"],
+           ["recruiting", "onboarding", "Workday", "payroll", "Excel", "employee relations"]),
+    "DESIGNER": (["Graphic Designer", "UX Designer", "Art Director"],
+                 ["Photoshop", "Illustrator", "Figma", "HTML", "CSS", "typography"]),
+}
+COMPANIES = ["Company Name", "Northwind Traders", "Contoso Ltd", "Acme Corporation", "Globex", "Initech"]
+DUTIES = [
+    "Managed {skill} workflows for a team of {n} people and reported to senior leadership.",
+    "Improved {skill} processes, reducing turnaround time by {n} percent.",
+    "Led the rollout of {skill} across {n} departments, including training and documentation.",
+    "Prepared monthly reports using {skill} and presented findings to stakeholders.",
+    "Coordinated with vendors and internal teams on {skill} projects worth ${n}k.",
+]
+DEGREES = ["Bachelor of Science", "Bachelor of Arts", "Master of Business Administration", "Associate Degree"]
+
+
+def fixture_resume_lines(rng: random.Random, category: str) -> list:
+    """Plain-text resume in the layout the parser expects (title line, then headed sections)."""
+    titles, skills = FIXTURE_PROFILES[category]
+    title = rng.choice(titles)
+    picked = rng.sample(skills, k=min(len(skills), rng.randint(3, 6)))
+    lines = [title, "", "Summary",
+             f"{title} with {rng.randint(2, 20)} years of experience in {', '.join(picked[:3])}. "
+             f"Known for reliable delivery and clear communication.",
+             "", "Skills", ", ".join(picked), "", "Experience"]
+    year = 2023
+    for _ in range(rng.randint(2, 5)):
+        start = year - rng.randint(1, 5)
+        lines.append(f"{rng.choice(titles)} {start} to {year} {rng.choice(COMPANIES)} City , State")
+        for _ in range(rng.randint(2, 4)):
+            lines.append(rng.choice(DUTIES).format(skill=rng.choice(picked), n=rng.randint(2, 40)))
+        year = start
+    lines += ["", "Education", f"{rng.choice(DEGREES)} {year - rng.randint(0, 4)} State University",
+              "", "Certifications", f"{category.title()} certificate {rng.randint(2005, 2022)}"]
+    return lines
+
+
+def _write_json(path: Path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _read_json(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_fixture(fixture_dir: Path = FIXTURE_DIR, num_resumes: int = 200, num_jds: int = 200,
+                  seed: int = 42, rebuild: bool = False) -> dict:
+    """
+    Write the fixture corpus and every stage's precomputed input; reused as
+    long as seed / sizes / FIXTURE_VERSION match. Returns the manifest.
+    """
+    manifest = {"version": FIXTURE_VERSION, "seed": seed, "resumes": num_resumes, "jds": num_jds}
+    manifest_file = fixture_dir / "manifest.json"
+    if not rebuild and manifest_file.exists() and _read_json(manifest_file) == manifest:
+        return manifest
+
+    from extract_text import extract_text_from_pdf
+    from resume_parser import parse_resume
+    from cleaning_resumes import clean_resume
+    from match_resumes_to_jd import prepare_jd_query_chunks
+
+    print(f"🔧 Building fixture in {fixture_dir} ({num_resumes} resumes, {num_jds} JDs, seed {seed})")
+    rng = random.Random(seed)
+    pdf_dir = fixture_dir / "pdfs"
+    if pdf_dir.exists():
+        for old in pdf_dir.glob("*.pdf"):
+            old.unlink()
+    categories = sorted(FIXTURE_PROFILES)
+    documents = []
+    for i in range(num_resumes):
+        category = categories[i % len(categories)]
+        resume_id = f"bench{i:06d}"
+        write_text_pdf(pdf_dir / f"{resume_id}.pdf", fixture_resume_lines(rng, category))
+        documents.append({"id": resume_id, "category": category})
+
+    texts = [{**doc, "text": extract_text_from_pdf(pdf_dir / f"{doc['id']}.pdf")} for doc in documents]
+    parsed = [parse_resume(t["text"], resume_id=t["id"], category=t["category"]) for t in texts]
+    cleaned = [clean_resume(r, i) for i, r in enumerate(parsed)]
+
+    jds = _read_json(JDS_FULL)[:num_jds]
+    structured = [{"position_title": jd.get("position_title", "Unknown Position").strip(),
+                   "structured_chunks": prepare_jd_query_chunks(jd)} for jd in jds]
+
+    _write_json(fixture_dir / "documents.json", documents)
+    _write_json(fixture_dir / "texts.json", texts)
+    _write_json(fixture_dir / "parsed.json", parsed)
+    _write_json(fixture_dir / "cleaned.json", cleaned)
+    _write_json(fixture_dir / "jds.json", jds)
+    _write_json(fixture_dir / "jds_structured.json", structured)
+    _write_json(manifest_file, manifest)
+    return manifest
+
+
+# === Stages: setup(fixture_dir) -> state (untimed), run(state) -> records processed ===
+
+def _setup_extract(fixture_dir: Path):
+    from extract_text import extract_text_from_pdf
+    return extract_text_from_pdf, sorted((fixture_dir / "pdfs").glob("*.pdf"))
+
+
+def _run_extract(state) -> int:
+    extract, pdfs = state
+    for pdf in pdfs:
+        extract(pdf)
+    return len(pdfs)
+
+
+def _setup_parse(fixture_dir: Path):
+    from resume_parser import parse_resume
+    return parse_resume, _read_json(fixture_dir / "texts.json")
+
+
+def _run_parse(state) -> int:
+    parse, texts = state
+    for t in texts:
+        parse(t["text"], resume_id=t["id"], category=t["category"])
+    return len(texts)
+
+
+def _setup_clean(fixture_dir: Path):
+    from cleaning_resumes import clean_resume
+    return clean_resume, _read_json(fixture_dir / "parsed.json")
+
+
+def _run_clean(state) -> int:
+    clean, parsed = state
+    for i, r in enumerate(parsed):
+        clean(r, i)
+    return len(parsed)
+
+
+def _setup_jd_chunks(fixture_dir: Path):
+    from match_resumes_to_jd import prepare_jd_query_chunks
+    return prepare_jd_query_chunks, _read_json(fixture_dir / "jds.json")
+
+
+def _run_jd_chunks(state) -> int:
+    prepare, jds = state
+    for jd in jds:
+        prepare(jd)
+    return len(jds)
+
+
+def _setup_embed(module_name: str, collection_getter: str, add_function: str, input_name: str):
+    def setup(fixture_dir: Path):
+        module = __import__(module_name)
+        # The temporary collection is not the live one: keep the live query cache valid
+        module.bump_index_version = lambda *names, **kwargs: None
+        records = _read_json(fixture_dir / input_name)
+        tmp = tempfile.TemporaryDirectory(prefix="bench_chroma_")
+        collection = getattr(module, collection_getter)(tmp.name)
+        collection._embedding_function(["warm up"])   # load the model before the clock starts
+        return getattr(module, add_function), collection, records, tmp
+    return setup
+
+
+def _run_embed(state) -> int:
+    add, collection, records, _ = state
+    add(records, collection)
+    return len(records)
+
+
+STAGES = {
+    "extract": (_setup_extract, _run_extract),
+    "parse": (_setup_parse, _run_parse),
+    "clean": (_setup_clean, _run_clean),
+    "jd_chunks": (_setup_jd_chunks, _run_jd_chunks),
+    "embed_resumes": (_setup_embed("embed_resumes", "get_resumes_collection", "add_resumes_to_chroma",
+                                   "cleaned.json"), _run_embed),
+    "embed_jds": (_setup_embed("embed_job_descriptions", "get_job_descriptions_collection",
+                               "add_job_descriptions_to_chroma", "jds_structured.json"), _run_embed),
+}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_stage(name: str, fixture_dir: str) -> dict:
+    """Run one stage in the current process (called inside a fresh worker)."""
+    setup, run = STAGES[name]
+    state = setup(Path(fixture_dir))
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    records = run(state)
+    seconds = time.perf_counter() - start
+    rss_after = _peak_rss_mb()
+    return {
+        "records": records,
+        "seconds": round(seconds, 4),
+        "records_per_sec": round(records / seconds, 2) if seconds > 0 else None,
+        "peak_rss_mb": round(rss_after, 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+    }
+
+
+def measure_in_child(name: str, fixture_dir: Path) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(measure_stage, name, str(fixture_dir)).result()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(stages: list = None, fixture_dir: Path = FIXTURE_DIR, num_resumes: int = 200,
+                  num_jds: int = 200, repeat: int = 3, seed: int = 42, rebuild_fixture: bool = False) -> dict:
+    """Measure the selected stages and append the result to the history file."""
+    stages = stages or list(STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    manifest = build_fixture(fixture_dir, num_resumes, num_jds, seed, rebuild_fixture)
+
+    results = {}
+    for name in stages:
+        runs = []
+        for attempt in range(repeat):
+            runs.append(measure_in_child(name, fixture_dir))
+            print(f"  {name:<14} run {attempt + 1}/{repeat}: {runs[-1]['records_per_sec']} rec/s, "
+                  f"peak {runs[-1]['peak_rss_mb']} MB", flush=True)
+        # Best of the repeats: fastest run, smallest high-water mark
+        best = max(runs, key=lambda r: r["records_per_sec"] or 0)
+        results[name] = {**best, "peak_rss_mb": min(r["peak_rss_mb"] for r in runs),
+                         "rss_delta_mb": min(r["rss_delta_mb"] for r in runs)}
+
+    entry = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+             "fixture": {k: manifest[k] for k in ("version", "seed", "resumes", "jds")},
+             "repeat": repeat, "stages": results}
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def load_history(path: Path = HISTORY_FILE) -> list:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_runs(baseline: dict, latest: dict, threshold: float = 0.10) -> list:
+    """Per-stage comparison rows; 'regression' is set when a stage got worse than threshold."""
+    rows = []
+    for name, new in latest["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old:
+            continue
+        rps_change = (new["records_per_sec"] - old["records_per_sec"]) / old["records_per_sec"]
+        rss_change = (new["peak_rss_mb"] - old["peak_rss_mb"]) / old["peak_rss_mb"]
+        rows.append({"stage": name, "old_rps": old["records_per_sec"], "new_rps": new["records_per_sec"],
+                     "rps_change": rps_change, "old_rss": old["peak_rss_mb"], "new_rss": new["peak_rss_mb"],
+                     "rss_change": rss_change,
+                     "regression": rps_change < -threshold or rss_change > threshold})
+    return rows
+
+
+def print_entry(entry: dict):
+    print(f"\n{'=' * 70}\nIngestion benchmark  {entry['timestamp']}  commit {entry['commit']}  "
+          f"fixture {entry['fixture']}\n{'=' * 70}")
+    print(f"{'stage':<14} {'records':>8} {'seconds':>9} {'rec/s':>10} {'peak MB':>9} {'delta MB':>9}")
+    for name, r in entry["stages"].items():
+        print(f"{name:<14} {r['records']:>8} {r['seconds']:>9.3f} {r['records_per_sec']:>10} "
+              f"{r['peak_rss_mb']:>9} {r['rss_delta_mb']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion throughput / peak RSS benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Measure the stages and append to the history")
+    run.add_argument("--only", nargs="+", default=None, metavar="STAGE", choices=list(STAGES))
+    run.add_argument("--resumes", type=int, default=200, help="Fixture resume PDFs")
+    run.add_argument("--jds", type=int, default=200, help="Fixture job descriptions")
+    run.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best is kept")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--fixture-dir", type=Path, default=FIXTURE_DIR)
+    run.add_argument("--rebuild-fixture", action="store_true")
+    compare = sub.add_parser("compare", help="Latest run vs the previous run on the same fixture")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown / RSS growth")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        entry = run_benchmark(args.only, args.fixture_dir, args.resumes, args.jds, args.repeat, args.seed,
+                              args.rebuild_fixture)
+        print_entry(entry)
+        print(f"\n💾 Appended to {HISTORY_FILE}")
+    else:
+        history = load_history()
+        if not history:
+            raise SystemExit(f"❌ No history in {HISTORY_FILE}; run the benchmark first")
+        latest = history[-1]
+        previous = [e for e in history[:-1] if e["fixture"] == latest["fixture"]]
+        if not previous:
+            print("Only one run on this fixture; nothing to compare yet.")
+            raise SystemExit(0)
+        baseline = previous[-1]
+        rows = compare_runs(baseline, latest, args.threshold)
+        print(f"{baseline['commit']} ({baseline['timestamp']}) -> {latest['commit']} ({latest['timestamp']})")
+        print(f"{'stage':<14} {'rec/s':>21} {'change':>8} {'peak MB':>17} {'change':>8}")
+        for row in rows:
+            flag = "  ❌ REGRESSION" if row["regression"] else ""
+            print(f"{row['stage']:<14} {row['old_rps']:>10} -> {row['new_rps']:<7} {row['rps_change']:>+8.1%} "
+                  f"{row['old_rss']:>7} -> {row['new_rss']:<6} {row['rss_change']:>+8.1%}{flag}")
+        if any(row["regression"] for row in rows):
+            print(f"\n❌ Regression beyond {args.threshold:.0%}")
+            raise SystemExit(1)
+        print(f"\n✅ No stage regressed beyond {args.threshold:.0%}")
@@ -0,0 +1,122 @@
+"""
+Measure what the cross-encoder rerank adds: latency per query and ranking change.
+
+Uses the same weakly labelled sample as benchmark_expansion.py (canonical titles
+from the neighbour graph, every resume of the title's category is relevant).
+For each query the bi-encoder shortlist is reranked twice against a fresh
+pair-score cache: once cold (all pairs scored) and once warm (all cached).
+
+Reported:
+- added latency p50 / p95, cold and warm
+- precision@10 and nDCG@10 before / after rerank
+- how much the top 10 changed (share of new resumes, mean rank displacement)
+
+Usage:
+    python retrieval_phase/benchmark_rerank.py --queries 50
+"""
+
+import argparse
+import json
+import math
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+import query_cache
+import query_expander_rag as qe
+import rerank
+from benchmark_expansion import load_labelled_queries, load_resume_categories
+from config import RESULTS, RERANK_TOP_N
+
+
+def ndcg_at(ranked_ids: list, relevant: set, k: int) -> float:
+    dcg = sum(1 / math.log2(i + 2) for i, rid in enumerate(ranked_ids[:k]) if rid in relevant)
+    ideal = sum(1 / math.log2(i + 2) for i in range(min(k, len(relevant))))
+    return dcg / ideal if ideal else 0.0
+
+
+def run_benchmark(num_queries: int = 50, k: int = 10, top_n: int = RERANK_TOP_N, seed: int = 42) -> dict:
+    query_cache.QUERY_CACHE_ENABLED = False
+    queries = load_labelled_queries(num_queries, seed)
+    relevant_by_category = load_resume_categories()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Fresh pair-score cache so the cold pass really scores every pair
+        reranker = rerank.Reranker(cache_path=Path(tmp) / "pair_scores.sqlite")
+        reranker.load()
+        rows = {"cold_ms": [], "warm_ms": [], "p_before": [], "p_after": [],
+                "ndcg_before": [], "ndcg_after": [], "new_in_top": [], "displacement": []}
+
+        for title, category in queries:
+            relevant = relevant_by_category.get(category, set())
+            candidates = qe.search_resumes_batch([title], top_k=max(top_n, k))[0]["candidates"]
+            if not relevant or not candidates:
+                continue
+            texts = rerank.fetch_field_texts(qe.resumes_collection, candidates[:top_n])
+
+            # Unlimited budget so the comparison covers the full top_n
+            after, cold = reranker.rerank(title, candidates, texts, top_n=top_n, budget_ms=float("inf"))
+            _, warm = reranker.rerank(title, candidates, texts, top_n=top_n, budget_ms=float("inf"))
+
+            before_ids = [c["resume_id"] for c in candidates]
+            after_ids = [c["resume_id"] for c in after]
+            position = {rid: i for i, rid in enumerate(before_ids)}
+
+            rows["cold_ms"].append(cold["latency_ms"])
+            rows["warm_ms"].append(warm["latency_ms"])
+            rows["p_before"].append(len(set(before_ids[:k]) & relevant) / k)
+            rows["p_after"].append(len(set(after_ids[:k]) & relevant) / k)
+            rows["ndcg_before"].append(ndcg_at(before_ids, relevant, k))
+            rows["ndcg_after"].append(ndcg_at(after_ids, relevant, k))
+            rows["new_in_top"].append(len(set(after_ids[:k]) - set(before_ids[:k])) / k)
+            rows["displacement"].append(float(np.mean([abs(position[rid] - i) for i, rid in enumerate(after_ids[:k])])))
+        reranker.cache.close()
+
+    if not rows["cold_ms"]:
+        raise SystemExit("❌ No labelled queries produced candidates")
+
+    def stat(values, fn):
+        return round(float(fn(values)), 4)
+
+    report = {
+        "num_queries": len(rows["cold_ms"]),
+        "k": k,
+        "top_n": top_n,
+        "model": reranker.model_name,
+        "added_latency_ms": {
+            "cold_p50": stat(rows["cold_ms"], lambda v: np.percentile(v, 50)),
+            "cold_p95": stat(rows["cold_ms"], lambda v: np.percentile(v, 95)),
+            "warm_p50": stat(rows["warm_ms"], lambda v: np.percentile(v, 50)),
+            "warm_p95": stat(rows["warm_ms"], lambda v: np.percentile(v, 95)),
+        },
+        f"precision_at_{k}": {"before": stat(rows["p_before"], np.mean), "after": stat(rows["p_after"], np.mean)},
+        f"ndcg_at_{k}": {"before": stat(rows["ndcg_before"], np.mean), "after": stat(rows["ndcg_after"], np.mean)},
+        f"new_in_top_{k}": stat(rows["new_in_top"], np.mean),
+        f"mean_rank_displacement_top_{k}": stat(rows["displacement"], np.mean),
+    }
+
+    latency = report["added_latency_ms"]
+    print(f"Queries: {report['num_queries']}  (rerank top {top_n}, metrics @{k})")
+    print(f"Added latency  cold p50={latency['cold_p50']:.1f} ms p95={latency['cold_p95']:.1f} ms | "
+          f"warm p50={latency['warm_p50']:.1f} ms p95={latency['warm_p95']:.1f} ms")
+    print(f"precision@{k}  {report[f'precision_at_{k}']['before']:.4f} -> {report[f'precision_at_{k}']['after']:.4f}")
+    print(f"nDCG@{k}       {report[f'ndcg_at_{k}']['before']:.4f} -> {report[f'ndcg_at_{k}']['after']:.4f}")
+    print(f"Top {k} changed: {report[f'new_in_top_{k}']:.1%} new, "
+          f"mean displacement {report[f'mean_rank_displacement_top_{k}']:.2f} ranks")
+
+    output_file = RESULTS / "benchmark_rerank.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved to: {output_file}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-encoder rerank latency / ranking-change report")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--top-n", type=int, default=RERANK_TOP_N)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_benchmark(args.queries, args.k, args.top_n, args.seed)
@@ -0,0 +1,293 @@
+"""
+Retrieval latency / quality harness: replays a query set against the live
+collections and records the result for trend comparison.
+
+Queries are the position titles of job_descriptions_cleaned.json (or, with
+--source graph, canonical titles from the neighbour graph as in
+benchmark_expansion.py). A JD title is weakly labelled with the resume
+category its words point to (e.g. "Senior Accountant" -> ACCOUNTANT); titles
+no category matches still count for latency and the brute-force metrics.
+
+Per query, each stage is timed on its own:
+    embed            query embedding (one model call)
+    expand           expand_query_with_similar_titles
+    related_titles   get_related_titles (expansion + title search)
+    ann              one raw query of the resumes collection with the query vector
+    search           search_resumes_with_auto_expansion end to end
+
+Quality at k, against two ground truths:
+    exact   top k resumes by brute-force cosine over every stored field vector
+            (ann vs exact isolates the HNSW settings; search vs exact shows how
+            far expansion moves the result from the query's own neighbours)
+    labels  every resume of the labelled category is relevant
+
+Then the search is replayed from several threads at once to get QPS per
+concurrency level. The result cache is disabled throughout.
+
+Each run is appended to results/benchmark_retrieval_history.jsonl; `compare`
+prints the latest run against the previous one with the same settings.
+
+Usage:
+    python retrieval_phase/benchmark_retrieval.py run --queries 200 --k 50 --concurrency 1 4 8
+    python retrieval_phase/benchmark_retrieval.py compare
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import query_cache
+import query_expander_rag as qe
+from benchmark_expansion import load_labelled_queries, load_resume_categories
+from benchmark_ingestion import git_commit, load_history
+from benchmark_rerank import ndcg_at
+from build_clean_title_index import normalize_title_key
+from chroma_utils import fetch_all
+from config import RESULTS, JDS_STRUCTURED, EXPANSION_MODE
+
+HISTORY_FILE = RESULTS / "benchmark_retrieval_history.jsonl"
+STAGES = ["embed", "expand", "related_titles", "ann", "search"]
+
+# Title words that point to a category whose name does not contain them
+CATEGORY_KEYWORDS = {
+    "INFORMATION-TECHNOLOGY": ["it", "software", "developer", "programmer", "network", "systems", "data"],
+    "HR": ["hr", "human resources", "recruiter", "recruiting", "talent", "payroll"],
+    "HEALTHCARE": ["nurse", "medical", "clinical", "physician", "pharmacy"],
+    "TEACHER": ["teaching", "tutor", "instructor", "educator"],
+}
+
+
+def _keyword_hit(keyword: str, words: list) -> bool:
+    if " " in keyword:
+        return f" {keyword} " in f" {' '.join(words)} "
+    if len(keyword) <= 3:
+        return keyword in words
+    # Prefix match so "accountant" / "accounting" both hit ACCOUNTANT
+    return any(word[:6] == keyword[:6] for word in words)
+
+
+def label_title(title: str, categories: list):
+    """Weak label: the one resume category a JD title points to, or None if none / several."""
+    words = re.findall(r"[a-z]+", title.lower())
+    matches = []
+    for category in categories:
+        name_words = [w for w in re.findall(r"[a-z]+", category.lower()) if len(w) > 2]
+        if any(_keyword_hit(k, words) for k in CATEGORY_KEYWORDS.get(category, []) + name_words):
+            matches.append(category)
+    return matches[0] if len(matches) == 1 else None
+
+
+def load_jd_queries(num_queries: int, seed: int, categories: list) -> list:
+    """(title, category or None) pairs from the cleaned job descriptions, de-duplicated."""
+    if not JDS_STRUCTURED.exists():
+        raise SystemExit(f"❌ {JDS_STRUCTURED} not found; run query_structuring_JD/clean_and_structure_jds.py")
+    with open(JDS_STRUCTURED, "r", encoding="utf-8") as f:
+        jds = json.load(f)
+    titles = {}
+    for jd in jds:
+        title = " ".join(str(jd.get("position_title", "")).split())
+        if title and normalize_title_key(title) not in titles:
+            titles[normalize_title_key(title)] = title
+    queries = sorted(titles.values())
+    random.Random(seed).shuffle(queries)
+    return [(title, label_title(title, categories)) for title in queries[:num_queries]]
+
+
+class ExactIndex:
+    """Brute-force cosine search over every stored resume field vector."""
+
+    def __init__(self, collection):
+        data = fetch_all(collection, include=["embeddings", "metadatas"])
+        matrix = np.asarray(data["embeddings"], dtype=np.float32)
+        self.matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        self.resume_ids = [(meta or {}).get("id") for meta in data["metadatas"]]
+
+    def top_k(self, vector, k: int) -> list:
+        """Best k distinct resume IDs (a resume scores as its best field)."""
+        query = np.asarray(vector, dtype=np.float32)
+        scores = self.matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        ranked, seen = [], set()
+        for i in np.argsort(-scores):
+            resume_id = self.resume_ids[i]
+            if resume_id and resume_id not in seen:
+                seen.add(resume_id)
+                ranked.append(resume_id)
+                if len(ranked) == k:
+                    break
+        return ranked
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    return {"p50_ms": round(float(np.percentile(values, 50)), 2),
+            "p95_ms": round(float(np.percentile(values, 95)), 2),
+            "p99_ms": round(float(np.percentile(values, 99)), 2),
+            "mean_ms": round(float(np.mean(values)), 2)}
+
+
+def _recall(ranked: list, relevant: set, k: int) -> float:
+    return len(set(ranked[:k]) & relevant) / min(k, len(relevant)) if relevant else 0.0
+
+
+def _mean(values: list):
+    return round(float(np.mean(values)), 4) if values else None
+
+
+def measure_concurrency(queries: list, levels: list, k: int, search_kwargs: dict) -> dict:
+    """QPS and latency of the end-to-end search with n threads replaying the query set."""
+    out = {}
+    for level in levels:
+        latencies = []
+
+        def one(title):
+            _, ms = _timed(qe.search_resumes_with_auto_expansion, title, top_k=k, **search_kwargs)
+            latencies.append(ms)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level, thread_name_prefix="bench") as pool:
+            list(pool.map(one, queries))
+        seconds = time.perf_counter() - start
+        out[str(level)] = {"queries": len(queries), "qps": round(len(queries) / seconds, 2), **_percentiles(latencies)}
+    return out
+
+
+def run_benchmark(num_queries: int = 200, k: int = 50, source: str = "jds", seed: int = 42,
+                  expansion_mode: str = None, hybrid: bool = False, rerank: bool = False,
+                  concurrency: list = (1, 4, 8)) -> dict:
+    query_cache.QUERY_CACHE_ENABLED = False
+    expansion_mode = expansion_mode or EXPANSION_MODE
+    search_kwargs = {"expansion_mode": expansion_mode, "hybrid": hybrid, "rerank": rerank}
+
+    relevant_by_category = load_resume_categories()
+    if source == "graph":
+        queries = load_labelled_queries(num_queries, seed)
+    else:
+        queries = load_jd_queries(num_queries, seed, sorted(relevant_by_category))
+    print(f"Loading {qe.resumes_collection.count()} resume field vectors for exact search...")
+    exact = ExactIndex(qe.resumes_collection)
+    labelled = sum(1 for _, category in queries if category)
+    print(f"Replaying {len(queries)} queries ({labelled} labelled), k={k}, mode={expansion_mode}\n")
+
+    timings = {stage: [] for stage in STAGES}
+    quality = {"ann_recall_exact": [], "search_recall_exact": [], "search_ndcg_exact": [],
+               "search_recall_labels": [], "search_ndcg_labels": []}
+    # The search functions narrate every step; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        qe.search_resumes_with_auto_expansion(queries[0][0], top_k=k, **search_kwargs)   # warm up
+        for title, category in queries:
+            vector, ms = _timed(qe.embed_fn, [title])
+            timings["embed"].append(ms)
+            timings["expand"].append(_timed(qe.expand_query_with_similar_titles, title)[1])
+            timings["related_titles"].append(_timed(qe.get_related_titles, title)[1])
+            hits, ms = _timed(qe.resumes_collection.query, query_embeddings=[vector[0]], n_results=k * 2,
+                              include=["metadatas", "distances"])
+            timings["ann"].append(ms)
+            candidates, ms = _timed(qe.search_resumes_with_auto_expansion, title, top_k=k, **search_kwargs)
+            timings["search"].append(ms)
+
+            truth = exact.top_k(vector[0], k)
+            ann_ids = [c["resume_id"] for c in qe._collect_candidates(hits["metadatas"][0], hits["distances"][0], k)]
+            found = [c["resume_id"] for c in candidates[:k]]
+            quality["ann_recall_exact"].append(_recall(ann_ids, set(truth), k))
+            quality["search_recall_exact"].append(_recall(found, set(truth), k))
+            quality["search_ndcg_exact"].append(ndcg_at(found, set(truth), k))
+            relevant = relevant_by_category.get(category, set()) if category else set()
+            if relevant:
+                quality["search_recall_labels"].append(_recall(found, relevant, k))
+                quality["search_ndcg_labels"].append(ndcg_at(found, relevant, k))
+
+        load = measure_concurrency([title for title, _ in queries], list(concurrency), k, search_kwargs)
+
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "settings": {"source": source, "queries": len(queries), "labelled": labelled, "k": k, "seed": seed,
+                     "expansion_mode": expansion_mode, "hybrid": hybrid, "rerank": rerank},
+        "latency": {stage: _percentiles(values) for stage, values in timings.items()},
+        "quality": {name: _mean(values) for name, values in quality.items()},
+        "concurrency": load,
+    }
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def print_entry(entry: dict):
+    print(f"{'=' * 70}\nRetrieval benchmark  {entry['timestamp']}  commit {entry['commit']}\n"
+          f"{entry['settings']}\n{'=' * 70}")
+    print(f"{'stage':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, row in entry["latency"].items():
+        print(f"{stage:<16} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+    k = entry["settings"]["k"]
+    print(f"\n{'metric @' + str(k):<24} value")
+    for name, value in entry["quality"].items():
+        print(f"{name:<24} {'-' if value is None else f'{value:.4f}'}")
+    print(f"\n{'threads':>7} {'QPS':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for level, row in entry["concurrency"].items():
+        print(f"{level:>7} {row['qps']:>8.2f} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+
+
+def print_comparison(baseline: dict, latest: dict):
+    print(f"{baseline['commit']} ({baseline['timestamp']}) -> {latest['commit']} ({latest['timestamp']})\n")
+    for stage, new in latest["latency"].items():
+        old = baseline["latency"].get(stage)
+        if old:
+            print(f"{stage + ' p95 ms':<24} {old['p95_ms']:>9.2f} -> {new['p95_ms']:<9.2f} "
+                  f"{(new['p95_ms'] - old['p95_ms']) / old['p95_ms']:>+8.1%}")
+    for name, new in latest["quality"].items():
+        old = baseline["quality"].get(name)
+        if old is not None and new is not None:
+            print(f"{name:<24} {old:>9.4f} -> {new:<9.4f} {new - old:>+8.4f}")
+    for level, new in latest["concurrency"].items():
+        old = baseline["concurrency"].get(level)
+        if old:
+            print(f"{'QPS @ ' + level + ' threads':<24} {old['qps']:>9.2f} -> {new['qps']:<9.2f} "
+                  f"{(new['qps'] - old['qps']) / old['qps']:>+8.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval latency / recall / QPS harness")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Replay the query set and append to the history")
+    run.add_argument("--queries", type=int, default=200)
+    run.add_argument("--k", type=int, default=50)
+    run.add_argument("--source", choices=["jds", "graph"], default="jds",
+                     help="JD position titles (default) or neighbour-graph titles")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--expansion-mode", choices=["concat", "centroid", "rrf"], default=None)
+    run.add_argument("--hybrid", action="store_true", help="Fuse in BM25 hits")
+    run.add_argument("--rerank", action="store_true", help="Cross-encoder rerank")
+    run.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Thread counts for QPS")
+    sub.add_parser("compare", help="Latest run vs the previous run with the same settings")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        entry = run_benchmark(args.queries, args.k, args.source, args.seed, args.expansion_mode,
+                              args.hybrid, args.rerank, args.concurrency)
+        print_entry(entry)
+        print(f"\n💾 Appended to {HISTORY_FILE}")
+    else:
+        history = load_history(HISTORY_FILE)
+        if not history:
+            raise SystemExit(f"❌ No history in {HISTORY_FILE}; run the benchmark first")
+        latest = history[-1]
+        previous = [e for e in history[:-1] if e["settings"] == latest["settings"]]
+        if not previous:
+            print("Only one run with these settings; nothing to compare yet.")
+        else:
+            print_comparison(previous[-1], latest)
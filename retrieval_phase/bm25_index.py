@@ -0,0 +1,230 @@
+"""
+Compact in-process BM25 index over the resume fields (one document per
+resume field, mirroring the resumes collection).
+
+Exact terms such as "GAAP", "QuickBooks" or "Kubernetes" are matched lexically
+here and fused with the dense results in query_expander_rag.py. Postings are
+CSR arrays and each posting already holds its BM25 weight (k1 and b are fixed
+at build time), so a query is a few array slices and one scatter-add:
+
+    chroma_db/bm25_index.npz (written by embeddings/embed_resumes.py)
+        vocab              <U (V,)      sorted terms
+        offsets            i8 (V+1,)    postings of term t: [offsets[t], offsets[t+1])
+        postings_doc       i4 (P,)
+        postings_weight    f4 (P,)      idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len))
+        resume_id, category, field_type, seniority   <U (N,)
+        years_experience   i4 (N,)
+
+Usage:
+    python retrieval_phase/bm25_index.py build
+    python retrieval_phase/bm25_index.py search "QuickBooks GAAP accountant"
+"""
+
+import argparse
+import os
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from config import CHROMA, BM25_INDEX, BM25_K1, BM25_B
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased word tokens; keeps '+' and '#' so C++ / C# survive."""
+    return [t for t in TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Array-backed BM25 index with metadata filters matching build_resume_filter."""
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.offsets = arrays["offsets"]
+        self.postings_doc = arrays["postings_doc"]
+        self.postings_weight = arrays["postings_weight"]
+        self.resume_id = arrays["resume_id"]
+        self.category = arrays["category"]
+        self.field_type = arrays["field_type"]
+        self.seniority = arrays["seniority"]
+        self.years_experience = arrays["years_experience"]
+        self.term_ids = {term: i for i, term in enumerate(arrays["vocab"].tolist())}
+
+    def __len__(self) -> int:
+        return len(self.resume_id)
+
+    @classmethod
+    def build(cls, documents: list, metadatas: list, k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """Index documents (resume field texts) with their Chroma metadata."""
+        term_counts = [Counter(tokenize(doc)) for doc in documents]
+        doc_len = np.asarray([sum(c.values()) for c in term_counts], dtype=np.float32)
+        avg_len = float(doc_len.mean()) if len(doc_len) and doc_len.mean() > 0 else 1.0
+
+        postings = {}
+        for doc, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        docs, weights = [], []
+        n_docs = len(documents)
+        for t, term in enumerate(vocab):
+            entries = postings[term]
+            idf = np.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            ids = np.asarray([d for d, _ in entries], dtype=np.int32)
+            tf = np.asarray([f for _, f in entries], dtype=np.float32)
+            norm = k1 * (1 - b + b * doc_len[ids] / avg_len)
+            docs.append(ids)
+            weights.append((idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+            offsets[t + 1] = offsets[t] + len(entries)
+
+        def column(key, default):
+            return np.asarray([str((m or {}).get(key, default)) for m in metadatas])
+
+        return cls({
+            "vocab": np.asarray(vocab, dtype=str),
+            "offsets": offsets,
+            "postings_doc": np.concatenate(docs) if docs else np.zeros(0, dtype=np.int32),
+            "postings_weight": np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            "resume_id": column("id", ""),
+            "category": column("category", "Unknown"),
+            "field_type": column("field_type", "N/A"),
+            "seniority": column("seniority", "mid"),
+            "years_experience": np.asarray([int((m or {}).get("years_experience", -1)) for m in metadatas],
+                                           dtype=np.int32),
+            "params": np.asarray([k1, b], dtype=np.float32),
+        })
+
+    def save(self, path: Path = BM25_INDEX):
+        """Uncompressed .npz (fast to load); written atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, **self.arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = BM25_INDEX) -> "BM25Index":
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def search(self, query: str, top_k: int = 80, seniority: str = None,
+               min_years: int = None, max_years: int = None, resume_ids: list = None) -> list:
+        """
+        Top resumes by BM25 (best field per resume), in the same candidate
+        format as the dense search, with "bm25_score" instead of "similarity".
+        resume_ids restricts the search to those resumes (skill filters).
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term, query_tf in Counter(tokenize(query)).items():
+            t = self.term_ids.get(term)
+            if t is None:
+                continue
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            scores[self.postings_doc[lo:hi]] += query_tf * self.postings_weight[lo:hi]
+
+        hits = np.flatnonzero(scores > 0)
+        if seniority:
+            hits = hits[self.seniority[hits] == seniority]
+        if min_years is not None:
+            hits = hits[self.years_experience[hits] >= min_years]
+        if max_years is not None:
+            years = self.years_experience[hits]
+            hits = hits[(years <= max_years) & (years >= 0)]
+        if resume_ids is not None:
+            hits = hits[np.isin(self.resume_id[hits], np.asarray(resume_ids, dtype=str))]
+        if not len(hits):
+            return []
+
+        # A resume has at most a handful of fields, so 4x covers the de-duplication
+        limit = min(len(hits), top_k * 4)
+        if limit < len(hits):
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+
+        seen = set()
+        candidates = []
+        for doc in hits:
+            resume_id = str(self.resume_id[doc])
+            if not resume_id or resume_id in seen:
+                continue
+            seen.add(resume_id)
+            candidates.append({
+                "resume_id": resume_id,
+                "category": str(self.category[doc]),
+                "field_type": str(self.field_type[doc]),
+                "seniority": str(self.seniority[doc]),
+                "years_experience": int(self.years_experience[doc]),
+                "bm25_score": round(float(scores[doc]), 4),
+            })
+            if len(candidates) >= top_k:
+                break
+        return candidates
+
+
+def build_bm25_index(collection, path: Path = BM25_INDEX) -> BM25Index:
+    """Build the index from everything in the resumes collection and save it."""
+    from chroma_utils import fetch_all
+
+    data = fetch_all(collection, include=["documents", "metadatas"])
+    index = BM25Index.build(data["documents"], data["metadatas"])
+    index.save(path)
+    return index
+
+
+# Loaded once, reloaded when embed_resumes.py rewrites the file
+_index = None
+_index_mtime = None
+
+
+def get_bm25_index(path: Path = BM25_INDEX):
+    """Shared index instance, or None if it has not been built."""
+    global _index, _index_mtime
+    try:
+        mtime = Path(path).stat().st_mtime_ns
+    except OSError:
+        return None
+    if mtime != _index_mtime:
+        _index = BM25Index.load(path)
+        _index_mtime = mtime
+    return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the resume BM25 index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="(Re)build from the resumes collection")
+    search = sub.add_parser("search", help="Query the index")
+    search.add_argument("query")
+    search.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        import chromadb
+
+        client = chromadb.PersistentClient(path=str(CHROMA))
+        start = time.perf_counter()
+        index = build_bm25_index(client.get_collection("resumes"))
+        print(f"✅ Indexed {len(index)} resume fields, {len(index.term_ids)} terms "
+              f"({time.perf_counter() - start:.1f}s) -> {BM25_INDEX}")
+    else:
+        start = time.perf_counter()
+        index = get_bm25_index()
+        if index is None:
+            raise SystemExit("❌ No BM25 index; run: python retrieval_phase/bm25_index.py build")
+        load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        results = index.search(args.query, top_k=args.top_k)
+        search_ms = (time.perf_counter() - start) * 1000
+        print(f"Loaded in {load_ms:.1f} ms, searched in {search_ms:.2f} ms\n")
+        for i, c in enumerate(results, 1):
+            print(f"{i:2}. Resume ID: {c['resume_id']:<15} | Category: {c['category']:<20} | "
+                  f"Field: {c['field_type']:<15} | BM25: {c['bm25_score']:.4f}")
@@ -4,23 +4,53 @@ Extracts titles from category field and work_experience with proper cleaning.
 """
 
 import json
+import os
 import re
+from datetime import datetime
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions
+import numpy as np
+
+from config import (
+    hnsw_metadata, RESUMES, RESUMES_CLEANED, TITLE_NEIGHBOURS, TITLE_NEIGHBOUR_THRESHOLD, TITLE_NEIGHBOURS_TOP
+)
+from query_cache import bump_index_version
+from embedding_client import get_embedding_function
 
 ROOT = Path(__file__).parent.parent
 CHROMA_PATH = ROOT / "chroma_db"
 
-# Setup
-client = chromadb.PersistentClient(path=str(CHROMA_PATH))
-embed_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
 
-# Get or create collection
-title_collection = client.get_or_create_collection(
-    name="job_titles_index",
-    embedding_function=embed_fn
-)
+def get_title_collection(persist_directory: Path = CHROMA_PATH, hnsw_params: dict = None, embed_fn=None,
+                         rebuild: bool = False):
+    """
+    Get or create the job_titles_index collection (HNSW settings from config).
+
+    HNSW settings only apply when the collection is created, so rebuild drops
+    it first. An existing index in another distance space (databases created
+    before the title index used cosine) is refused: every caller scores titles
+    as 1 - distance.
+    """
+    client = chromadb.PersistentClient(path=str(persist_directory))
+    if embed_fn is None:
+        embed_fn = get_embedding_function()
+    if rebuild:
+        try:
+            client.delete_collection("job_titles_index")
+        except Exception:
+            pass  # nothing to drop yet
+
+    metadata = hnsw_metadata("job_titles_index", hnsw_params)
+    collection = client.get_or_create_collection(
+        name="job_titles_index",
+        embedding_function=embed_fn,
+        metadata=metadata
+    )
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    if space != metadata["hnsw:space"]:
+        raise SystemExit(f"❌ job_titles_index uses '{space}' distance, expected '{metadata['hnsw:space']}'; "
+                         f"rebuild it: python retrieval_phase/build_clean_title_index.py")
+    return collection
 
 # Job title keywords
 JOB_TITLE_KEYWORDS = [
@@ -31,11 +61,17 @@ JOB_TITLE_KEYWORDS = [
     "FINANCIAL", "BUSINESS", "DATA", "SOFTWARE", "SYSTEMS", "PROJECT"
 ]
 
+# Checked in order; intern comes before junior so it is not swallowed by it
 SENIORITY_KEYWORDS = {
     "senior": ["senior", "sr", "lead", "principal", "head", "chief", "director", "vp", "vice president"],
     "mid": ["mid", "mid-level", "intermediate", "experienced", "professional"],
-    "junior": ["junior", "jr", "entry", "associate", "assistant", "trainee", "intern", "internship"],
-    "intern": ["intern", "internship", "trainee", "student"]
+    "intern": ["intern", "interns", "internship", "trainee", "student"],
+    "junior": ["junior", "jr", "entry", "associate", "assistant"],
+}
+# Whole words only, so "international" is not an intern and "headquarters" not a head
+SENIORITY_PATTERNS = {
+    level: re.compile(r'\b(?:' + "|".join(re.escape(kw) for kw in keywords) + r')\b')
+    for level, keywords in SENIORITY_KEYWORDS.items()
 }
 
 
@@ -92,19 +128,213 @@ def detect_seniority(title: str) -> str:
     """Detect seniority level from job title."""
     title_lower = title.lower()
     
-    for level, keywords in SENIORITY_KEYWORDS.items():
-        if any(kw in title_lower for kw in keywords):
+    for level, pattern in SENIORITY_PATTERNS.items():
+        if pattern.search(title_lower):
             return level
     
     return "mid"  # Default to mid-level if not specified
 
 
+# "5 years", "10+ yrs"
+_YEARS_STATED = re.compile(r'\b(\d{1,2})\+?\s*(?:years|yrs)\b', re.IGNORECASE)
+# "2012 - 2015", "01/2015 to Current", "June 2010 to May 2014"
+_YEAR_RANGE = re.compile(
+    r'(?:\d{1,2}/)?((?:19|20)\d{2})\s*(?:-|–|to)\s*(?:[A-Za-z]+\.?\s+|\d{1,2}/)?((?:19|20)\d{2}|present|current|now)\b',
+    re.IGNORECASE
+)
+
+
+def estimate_years_experience(text: str, current_year: int = None) -> int:
+    """
+    Rough years of experience from resume text: the larger of any stated
+    "N years" and the union of date ranges. Returns -1 if nothing is found.
+    """
+    if not text:
+        return -1
+    current_year = current_year or datetime.now().year
+
+    stated = [int(n) for n in _YEARS_STATED.findall(text) if 0 < int(n) <= 50]
+
+    spans = []
+    for start, end in _YEAR_RANGE.findall(text):
+        start = int(start)
+        end = current_year if not end[0].isdigit() else int(end)
+        if start <= end <= current_year:
+            spans.append((start, end))
+
+    # Union of ranges so overlapping jobs are not double counted
+    covered = 0
+    last_end = None
+    for start, end in sorted(spans):
+        if last_end is None or start > last_end:
+            covered += end - start
+            last_end = end
+        elif end > last_end:
+            covered += end - last_end
+            last_end = end
+
+    candidates = stated + ([covered] if spans else [])
+    return max(candidates) if candidates else -1
+
+
+def detect_resume_seniority(headline: str, years_experience: int = -1) -> str:
+    """
+    Seniority for a whole resume: explicit title keywords in the headline win;
+    otherwise fall back to years of experience.
+    """
+    headline_lower = headline.lower()
+    for level, pattern in SENIORITY_PATTERNS.items():
+        if pattern.search(headline_lower):
+            return level
+
+    if years_experience < 0:
+        return "mid"
+    if years_experience < 2:
+        return "junior"
+    if years_experience >= 8:
+        return "senior"
+    return "mid"
+
+
+def normalize_title_key(title: str) -> str:
+    """Lookup key shared by the title index, neighbour graph and query expansion."""
+    return " ".join(str(title).upper().split())
+
+
+def build_title_neighbours(titles: list, ids: list, metadatas: list, embeddings: np.ndarray,
+                           threshold: float = TITLE_NEIGHBOUR_THRESHOLD,
+                           top_n: int = TITLE_NEIGHBOURS_TOP, block_size: int = 1024) -> dict:
+    """
+    Compute all-pairs cosine similarity between titles and keep each title's
+    top_n neighbours at or above threshold.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    n = len(titles)
+
+    graph = {}
+    # Row blocks keep the similarity matrix at block_size x n
+    for start in range(0, n, block_size):
+        sims = vectors[start:start + block_size] @ vectors.T
+        for row, i in enumerate(range(start, min(start + block_size, n))):
+            sims[row, i] = -1.0  # exclude self
+            k = min(top_n, n - 1)
+            if k <= 0:
+                top = np.array([], dtype=int)
+            else:
+                top = np.argpartition(-sims[row], kth=k - 1)[:k]
+                top = top[np.argsort(-sims[row, top])]
+
+            graph[normalize_title_key(titles[i])] = {
+                "title": titles[i],
+                "id": ids[i],
+                "category": metadatas[i].get("category", ""),
+                "seniority": metadatas[i].get("seniority", "mid"),
+                "neighbours": [
+                    [titles[j], ids[j], round(float(sims[row, j]), 4)]
+                    for j in top if sims[row, j] >= threshold
+                ],
+            }
+
+    return {"threshold": threshold, "top_n": top_n, "titles": graph}
+
+
+def save_title_neighbours(graph: dict, path: Path = TITLE_NEIGHBOURS):
+    """Persist the neighbour graph next to the Chroma database."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Readers reload on mtime change, so never expose a half-written file
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(graph, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def add_title_to_graph(graph: dict, title: str, doc_id: str, metadata: dict, neighbours: list) -> dict:
+    """
+    Insert one new title into an existing neighbour graph without recomputing it.
+
+    neighbours: [(title, id, similarity)] from an ANN query, best first. Links
+    are added both ways; each neighbour's list is re-sorted and trimmed to top_n.
+    """
+    threshold, top_n = graph["threshold"], graph["top_n"]
+    kept = [[t, i, round(float(sim), 4)] for t, i, sim in neighbours
+            if sim >= threshold and normalize_title_key(t) != normalize_title_key(title)][:top_n]
+
+    graph["titles"][normalize_title_key(title)] = {
+        "title": title,
+        "id": doc_id,
+        "category": metadata.get("category", ""),
+        "seniority": metadata.get("seniority", "mid"),
+        "neighbours": kept,
+    }
+    for other_title, _, sim in kept:
+        entry = graph["titles"].get(normalize_title_key(other_title))
+        if entry is None:
+            continue
+        links = entry["neighbours"] + [[title, doc_id, sim]]
+        links.sort(key=lambda link: -link[2])
+        entry["neighbours"] = links[:top_n]
+    return graph
+
+
+def derive_resume_title(r: dict) -> str:
+    """Clean job title for one resume record ("" if none can be derived)."""
+    category = r.get("category", "").strip()
+    work_exp = r.get("work_experience", "")
+    summary = r.get("summary", "")
+    
+    # Priority 1: Use category as base title
+    title = ""
+    if category and category.upper() not in ["UNKNOWN", "N/A", ""]:
+        # Category is usually the job type (e.g., "ACCOUNTANT", "FINANCIAL ANALYST")
+        title = category.title()
+    
+    # Priority 2: Extract from work experience (first job title mentioned)
+    if not title and work_exp:
+        # Look for patterns like "Job Title at Company" or "Job Title, Company"
+        patterns = [
+            r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:at|@|in|for|,)\s+',
+            r'^([A-Z][a-z]+(?:\s+(?:Senior|Junior|Lead|Principal|Associate|Assistant|Manager|Director|Analyst|Engineer|Developer|Specialist|Consultant|Coordinator))+)',
+        ]
+        
+        first_lines = work_exp.split('\n')[:3]
+        for line in first_lines:
+            line = line.strip()
+            if len(line) > 100:
+                continue
+            
+            for pattern in patterns:
+                match = re.match(pattern, line)
+                if match:
+                    candidate = match.group(1).strip()
+                    if len(candidate.split()) <= 5:
+                        title = extract_clean_title(candidate, category)
+                        if title:
+                            break
+            if title:
+                break
+    
+    # Priority 3: Extract from summary
+    if not title and summary:
+        words = summary.split()[:15]
+        candidate = " ".join(words)
+        title = extract_clean_title(candidate, category)
+    
+    # Clean the title
+    if title:
+        title = extract_clean_title(title, category)
+    
+    if not title or len(title) < 3:
+        return ""
+    return title
+
+
 def build_title_index():
     """Build clean job titles index from resumes."""
     # Try cleaned file first
-    path = ROOT / "extracted_data_cleaned" / "resumes_cleaned.json"
+    path = RESUMES_CLEANED
     if not path.exists():
-        path = ROOT / "extracted_data" / "resumes_data_pdfplumber.json"
+        path = RESUMES
     
     if not path.exists():
         print("❌ Resumes file not found!")
@@ -115,15 +345,10 @@ def build_title_index():
         resumes = json.load(f)
     
     print(f"Processing {len(resumes)} resumes...")
-    
-    # Clear existing collection
-    try:
-        existing_ids = title_collection.get(include=[])["ids"]
-        if existing_ids:
-            print(f"Clearing {len(existing_ids)} existing titles...")
-            title_collection.delete(ids=existing_ids)
-    except:
-        pass
+    embed_fn = get_embedding_function()
+    # Recreate rather than clear, so the current HNSW settings (cosine space) apply
+    title_collection = get_title_collection(embed_fn=embed_fn, rebuild=True)
+    bump_index_version("job_titles_index")
     
     titles_seen = set()
     new_docs, new_ids, new_metas = [], [], []
@@ -131,55 +356,13 @@ def build_title_index():
     for i, r in enumerate(resumes):
         resume_id = r.get("ID") or r.get("id", f"resume_{i}")
         category = r.get("category", "").strip()
-        work_exp = r.get("work_experience", "")
-        summary = r.get("summary", "")
+        title = derive_resume_title(r)
         
-        # Priority 1: Use category as base title
-        title = ""
-        if category and category.upper() not in ["UNKNOWN", "N/A", ""]:
-            # Category is usually the job type (e.g., "ACCOUNTANT", "FINANCIAL ANALYST")
-            title = category.title()
-        
-        # Priority 2: Extract from work experience (first job title mentioned)
-        if not title and work_exp:
-            # Look for patterns like "Job Title at Company" or "Job Title, Company"
-            patterns = [
-                r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:at|@|in|for|,)\s+',
-                r'^([A-Z][a-z]+(?:\s+(?:Senior|Junior|Lead|Principal|Associate|Assistant|Manager|Director|Analyst|Engineer|Developer|Specialist|Consultant|Coordinator))+)',
-            ]
-            
-            first_lines = work_exp.split('\n')[:3]
-            for line in first_lines:
-                line = line.strip()
-                if len(line) > 100:
-                    continue
-                
-                for pattern in patterns:
-                    match = re.match(pattern, line)
-                    if match:
-                        candidate = match.group(1).strip()
-                        if len(candidate.split()) <= 5:
-                            title = extract_clean_title(candidate, category)
-                            if title:
-                                break
-                if title:
-                    break
-        
-        # Priority 3: Extract from summary
-        if not title and summary:
-            words = summary.split()[:15]
-            candidate = " ".join(words)
-            title = extract_clean_title(candidate, category)
-        
-        # Clean the title
-        if title:
-            title = extract_clean_title(title, category)
-        
-        if not title or len(title) < 3:
+        if not title:
             continue
         
         # Skip duplicates
-        title_normalized = title.upper().strip()
+        title_normalized = normalize_title_key(title)
         if title_normalized in titles_seen:
             continue
         
@@ -201,8 +384,17 @@ def build_title_index():
     # Add to collection
     if new_docs:
         print(f"\nAdding {len(new_docs)} clean job titles to index...")
-        title_collection.add(ids=new_ids, documents=new_docs, metadatas=new_metas)
+        # Encode once; the same vectors feed the index and the neighbour graph
+        new_embeddings = np.asarray(embed_fn(new_docs), dtype=np.float32)
+        title_collection.add(ids=new_ids, documents=new_docs, metadatas=new_metas,
+                             embeddings=new_embeddings.tolist())
         print(f"✅ Successfully indexed {len(new_docs)} job titles")
+
+        graph = build_title_neighbours(new_docs, new_ids, new_metas, new_embeddings)
+        save_title_neighbours(graph)
+        bump_index_version("job_titles_index")
+        linked = sum(1 for entry in graph["titles"].values() if entry["neighbours"])
+        print(f"🔗 Saved neighbour graph ({linked}/{len(new_docs)} titles with neighbours) → {TITLE_NEIGHBOURS}")
         
         # Show statistics
         seniority_counts = {}
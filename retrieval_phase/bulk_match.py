@@ -0,0 +1,265 @@
+"""
+Offline all-pairs JD x resume scoring (for periodic market analysis).
+
+Both collections are exported once to memory-mapped .npy files (the snapshot
+format from snapshot_collections.py), then every JD chunk is scored against
+every resume field in cache-sized blocks:
+
+    S = JD_chunks_block @ resume_fields_block.T             (BLAS, float32)
+    best field per resume   -> np.maximum.reduceat over field columns
+    mean over a JD's chunks -> np.add.reduceat over chunk rows
+    running per-JD top-k    -> np.argpartition
+
+The same score as match_engine.py (mean over chunks of the best field), but
+exhaustive. Memory is bounded by the block sizes, not the corpus: vectors stay
+on disk, metadata is streamed in batches and reduced to one int32 group code
+per row, and only one JD block x resume block tile per worker is materialised.
+JD blocks are spread over a thread pool (NumPy releases the GIL inside BLAS)
+with BLAS held to one thread each, and results are streamed to
+results/bulk_matches.jsonl in JD order.
+
+Usage:
+    python retrieval_phase/bulk_match.py --top-k 10
+    python retrieval_phase/bulk_match.py --snapshot snapshots/latest   # reuse an export
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # installed with scikit-learn (a sentence-transformers dependency)
+    threadpool_limits = None
+
+from config import RESULTS, TOP_K_FINAL
+from snapshot_collections import export_snapshot
+
+COLLECTIONS = ["resumes", "job_descriptions"]
+METADATA_BATCH_ROWS = 65536
+BLAS_THREAD_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+
+def scan_groups(snapshot_dir: Path, name: str, key_fn, batch_rows: int = METADATA_BATCH_ROWS):
+    """
+    Group the rows of one exported collection without holding its metadata.
+
+    records.parquet is read in batches and every row is reduced to
+    key_fn(doc_id, metadata) -> (group key, label). Returns (memmapped
+    embeddings, row order with equal keys contiguous, group start offsets into
+    that order, sorted group keys, label of each group).
+    """
+    embeddings = np.load(snapshot_dir / name / "embeddings.npy", mmap_mode="r")
+    codes = np.empty(len(embeddings), dtype=np.int32)
+    first_seen, labels = {}, {}
+    row = 0
+    parquet = pq.ParquetFile(str(snapshot_dir / name / "records.parquet"))
+    for batch in parquet.iter_batches(batch_size=batch_rows, columns=["id", "metadata"]):
+        for doc_id, raw in zip(batch.column("id").to_pylist(), batch.column("metadata").to_pylist()):
+            key, label = key_fn(doc_id, json.loads(raw) if raw else {})
+            code = first_seen.get(key)
+            if code is None:
+                code = first_seen[key] = len(first_seen)
+                labels[key] = label
+            codes[row] = code
+            row += 1
+    if row != len(codes):
+        raise ValueError(f"{name}: {row} records for {len(codes)} embeddings")
+
+    # Renumber groups in key order so output follows JD index / resume ID
+    keys = sorted(first_seen, key=lambda k: (isinstance(k, str), k))
+    rank = np.empty(len(keys), dtype=np.int32)
+    for position, key in enumerate(keys):
+        rank[first_seen[key]] = position
+    codes = rank[codes]
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    return embeddings, order, starts, keys, [labels[key] for key in keys]
+
+
+def jd_key(doc_id: str, meta: dict):
+    """JD index from the chunk id (jd_{idx}_chunk_{n}_...), else its title; labelled with the title."""
+    title = meta.get("position_title", "")
+    parts = doc_id.split("_")
+    if len(parts) > 1 and parts[0] == "jd" and parts[1].isdigit():
+        return int(parts[1]), title
+    return meta.get("position_title", doc_id), title
+
+
+def resume_key(doc_id: str, meta: dict):
+    """Resume ID of a field row, labelled with its category."""
+    return meta.get("id", ""), meta.get("category", "Unknown")
+
+
+def make_blocks(starts: np.ndarray, total: int, block_rows: int) -> list:
+    """Split groups into blocks of ~block_rows rows without cutting a group."""
+    bounds = list(starts) + [total]
+    blocks, first = [], 0
+    for g in range(1, len(bounds)):
+        if bounds[g] - bounds[first] >= block_rows or g == len(bounds) - 1:
+            blocks.append((first, g))  # groups [first, g)
+            first = g
+    return blocks
+
+
+def gather_rows(vectors: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """L2-normalised float32 copy of vectors[rows], read in ascending order from the memmap."""
+    ascending = np.sort(rows)
+    block = np.asarray(vectors[ascending], dtype=np.float32)[np.searchsorted(ascending, rows)]
+    return block / np.linalg.norm(block, axis=1, keepdims=True).clip(min=1e-12)
+
+
+class BulkScorer:
+    """Blocked chunk x field scoring over memory-mapped snapshot arrays."""
+
+    def __init__(self, snapshot_dir: Path, top_k: int = TOP_K_FINAL,
+                 jd_block: int = 512, resume_block: int = 8192):
+        self.top_k = top_k
+        self.jd_vectors, self.jd_order, self.jd_starts, self.jd_keys, self.jd_titles = scan_groups(
+            snapshot_dir, "job_descriptions", jd_key)
+        self.resume_vectors, self.resume_order, self.resume_starts, self.resume_ids, self.resume_categories = \
+            scan_groups(snapshot_dir, "resumes", resume_key)
+
+        self.jd_blocks = make_blocks(self.jd_starts, len(self.jd_order), jd_block)
+        self.resume_blocks = make_blocks(self.resume_starts, len(self.resume_order), resume_block)
+
+    def _block_rows(self, order, starts, total, first, last):
+        """Row range + group offsets (relative to the block) for groups [first, last)."""
+        lo = starts[first]
+        hi = starts[last] if last < len(starts) else total
+        return order[lo:hi], starts[first:last] - lo, hi - lo
+
+    def score_jd_block(self, block: tuple) -> list:
+        """Per-JD top-k for one block of JDs against every resume."""
+        first, last = block
+        rows, jd_offsets, n_rows = self._block_rows(
+            self.jd_order, self.jd_starts, len(self.jd_order), first, last)
+        chunks = gather_rows(self.jd_vectors, rows)
+        chunk_counts = np.diff(np.append(jd_offsets, n_rows)).astype(np.float32)
+
+        num_jds = last - first
+        best_scores = np.full((num_jds, 0), -np.inf, dtype=np.float32)
+        best_index = np.zeros((num_jds, 0), dtype=np.int64)
+
+        for r_first, r_last in self.resume_blocks:
+            r_rows, field_offsets, _ = self._block_rows(
+                self.resume_order, self.resume_starts, len(self.resume_order), r_first, r_last)
+            fields = gather_rows(self.resume_vectors, r_rows)
+
+            sims = chunks @ fields.T                                        # (chunks, fields)
+            per_resume = np.maximum.reduceat(sims, field_offsets, axis=1)   # (chunks, resumes)
+            jd_scores = np.add.reduceat(per_resume, jd_offsets, axis=0) / chunk_counts[:, None]
+
+            # Merge this tile into the running top-k
+            candidates = np.concatenate([best_scores, jd_scores], axis=1)
+            indices = np.concatenate(
+                [best_index, np.broadcast_to(np.arange(r_first, r_last), jd_scores.shape)], axis=1)
+            if candidates.shape[1] > self.top_k:
+                keep = np.argpartition(-candidates, self.top_k - 1, axis=1)[:, :self.top_k]
+                candidates = np.take_along_axis(candidates, keep, axis=1)
+                indices = np.take_along_axis(indices, keep, axis=1)
+            best_scores, best_index = candidates, indices
+
+        results = []
+        for j in range(num_jds):
+            order = np.argsort(-best_scores[j])
+            key = self.jd_keys[first + j]
+            results.append({
+                "jd_index": key,
+                "position_title": self.jd_titles[first + j],
+                "matches": [
+                    {
+                        "rank": rank,
+                        "resume_id": self.resume_ids[best_index[j, o]],
+                        "category": self.resume_categories[best_index[j, o]],
+                        "score": round(float(best_scores[j, o]), 4),
+                    }
+                    for rank, o in enumerate(order, 1)
+                ],
+            })
+        return results
+
+
+def run_bulk_match(snapshot_dir: Path = None, top_k: int = TOP_K_FINAL, jd_block: int = 512,
+                   resume_block: int = 8192, workers: int = None) -> dict:
+    """Score every JD against every resume and stream the top-k to results/."""
+    if snapshot_dir is None:
+        snapshot_dir = RESULTS / "bulk_vectors"
+        print(f"Exporting collection vectors to {snapshot_dir}...")
+        export_snapshot(snapshot_dir, COLLECTIONS)
+    snapshot_dir = Path(snapshot_dir)
+
+    start = time.perf_counter()
+    scorer = BulkScorer(snapshot_dir, top_k, jd_block, resume_block)
+    load_seconds = time.perf_counter() - start
+    workers = workers or os.cpu_count() or 1
+    if threadpool_limits is not None:
+        # Parallelism comes from the JD blocks; a multi-threaded BLAS per worker would oversubscribe
+        blas_limit = threadpool_limits(limits=1, user_api="blas")
+    else:
+        blas_limit = contextlib.nullcontext()
+        if workers > 1 and not all(os.environ.get(var) == "1" for var in BLAS_THREAD_VARS):
+            print(f"⚠️  threadpoolctl not installed: set {'=1 '.join(BLAS_THREAD_VARS)}=1 "
+                  f"to keep BLAS to one thread per worker")
+    print(f"Scoring {len(scorer.jd_keys)} JDs x {len(scorer.resume_ids)} resumes "
+          f"({len(scorer.jd_blocks)} JD blocks x {len(scorer.resume_blocks)} resume blocks, {workers} workers)")
+
+    output_file = RESULTS / "bulk_matches.jsonl"
+    written = 0
+    score_start = time.perf_counter()
+    with blas_limit, open(output_file, "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        # Bounded window of in-flight blocks keeps memory flat and output ordered
+        pending = []
+        for block in scorer.jd_blocks:
+            pending.append(pool.submit(scorer.score_jd_block, block))
+            if len(pending) >= workers * 2:
+                for record in pending.pop(0).result():
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    written += 1
+                print(f"  Scored {written}/{len(scorer.jd_keys)} JDs...")
+        for future in pending:
+            for record in future.result():
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                written += 1
+    score_seconds = time.perf_counter() - score_start
+
+    pairs = len(scorer.jd_order) * len(scorer.resume_order)
+    summary = {
+        "num_jds": len(scorer.jd_keys),
+        "num_resumes": len(scorer.resume_ids),
+        "chunk_field_pairs": pairs,
+        "top_k": top_k,
+        "workers": workers,
+        "load_seconds": round(load_seconds, 2),
+        "score_seconds": round(score_seconds, 2),
+        "pairs_per_second": round(pairs / score_seconds) if score_seconds > 0 else 0,
+    }
+    with open(RESULTS / "bulk_matches_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n✅ Scored {pairs:,} chunk x field pairs in {score_seconds:.1f}s "
+          f"({summary['pairs_per_second']:,} pairs/s)")
+    print(f"💾 Saved to: {output_file}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="All-pairs JD x resume scoring")
+    parser.add_argument("--snapshot", type=str, default=None,
+                        help="Existing snapshot directory (default: export to results/bulk_vectors)")
+    parser.add_argument("--top-k", type=int, default=TOP_K_FINAL)
+    parser.add_argument("--jd-block", type=int, default=512, help="JD chunk rows per block")
+    parser.add_argument("--resume-block", type=int, default=8192, help="Resume field rows per block")
+    parser.add_argument("--workers", type=int, default=None, help="Threads (default: all cores)")
+    args = parser.parse_args()
+
+    run_bulk_match(Path(args.snapshot) if args.snapshot else None, args.top_k,
+                   args.jd_block, args.resume_block, args.workers)
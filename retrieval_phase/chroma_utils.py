@@ -0,0 +1,37 @@
+"""
+Small helpers shared by the scripts that talk to Chroma directly
+(tuning, snapshots, bulk scoring).
+"""
+
+from typing import Dict, List
+
+DEFAULT_MAX_BATCH_SIZE = 5000
+
+
+def max_batch_size(client) -> int:
+    """Largest add/upsert batch the Chroma client accepts."""
+    getter = getattr(client, "get_max_batch_size", None)
+    if getter is not None:
+        return getter()
+    return getattr(client, "max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+
+
+def fetch_all(collection, include: List[str], page_size: int = 5000) -> Dict[str, list]:
+    """
+    Read an entire collection page by page.
+
+    Returns a dict with "ids" plus one list per requested include field.
+    """
+    total = collection.count()
+    out = {"ids": []}
+    for field in include:
+        out[field] = []
+
+    for offset in range(0, total, page_size):
+        page = collection.get(include=include, limit=page_size, offset=offset)
+        out["ids"].extend(page["ids"])
+        for field in include:
+            values = page.get(field)
+            out[field].extend(list(values) if values is not None else [None] * len(page["ids"]))
+
+    return out
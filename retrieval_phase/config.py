@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 ROOT = Path(__file__).parent.parent
@@ -5,11 +7,106 @@ CHROMA = ROOT / "chroma_db"
 RESULTS = ROOT / "results"
 RESULTS.mkdir(exist_ok=True)
 
+# Pipeline artifacts (see pipeline.py for which stage writes which file)
+DATA_DIR = ROOT / "data" / "data"  # resume PDFs, one folder per category
 JDS_FULL = ROOT / "extracted_data" / "job_descriptions_filtered.json"
-JDS_STRUCTURED = ROOT / "extracted_data" / "job_descriptions_structured.json"
+JDS_CLEANED = ROOT / "extracted_data_cleaned" / "job_descriptions_cleaned.json"
+JDS_STRUCTURED = JDS_CLEANED      # the cleaned file holds the structured chunks
 RESUMES = ROOT / "extracted_data" / "resumes_data_pdfplumber.json"
+RESUMES_CLEANED = ROOT / "extracted_data_cleaned" / "resumes_cleaned.json"
+
+# Precomputed title -> similar titles graph (written by build_clean_title_index.py)
+TITLE_NEIGHBOURS = CHROMA / "title_neighbours.json"
+TITLE_NEIGHBOUR_THRESHOLD = 0.65  # lowest similarity stored; expansion can only raise it
+TITLE_NEIGHBOURS_TOP = 20         # neighbours kept per title (expansion uses up to 2 * max_similar)
+
+# How expanded titles become the resume query vector:
+#   "concat"   - embed " ".join(titles) (one extra model call)
+#   "centroid" - similarity-weighted centroid of stored title vectors (no extra model call)
+#   "rrf"      - one batched query over all expansion vectors, fused with reciprocal rank fusion
+EXPANSION_MODE = "concat"
+
+# Query / embedding cache (see query_cache.py)
+QUERY_CACHE_ENABLED = True
+EMBEDDING_CACHE_SIZE = 4096       # query text -> embedding
+RESULT_CACHE_SIZE = 1024          # (query, filters, top_k, versions) -> results
+QUERY_CACHE_TTL_SECONDS = 3600
+
+# Per-stage retrieval tracing and metrics export (see tracing.py); a flag check when off
+TRACING_ENABLED = False
+TRACE_BUFFER = 256                # recent traces kept for the OpenTelemetry span export
+
+# Hybrid lexical + dense search: BM25 over resume fields (see bm25_index.py),
+# fused with the Chroma results by reciprocal rank fusion
+BM25_INDEX = CHROMA / "bm25_index.npz"
+BM25_K1 = 1.2
+BM25_B = 0.75
+HYBRID_SEARCH_ENABLED = False     # opt in (or hybrid=True / --hybrid); needs the BM25 index
+HYBRID_BM25_WEIGHT = 1.0          # RRF weight of the BM25 list (dense list weight is 1)
+
+# Category shards of the resumes collection (see shards.py). When enabled and
+# built, searches only hit the shards of the requested / inferred categories.
+SHARDS_DIR = CHROMA / "shards"
+SHARDED_SEARCH = False
+
+# Skill -> resume bitmaps for must-have / exclude filters (see skill_index.py)
+SKILL_INDEX = CHROMA / "skill_index.npz"
+
+# Optional cross-encoder rerank of the bi-encoder shortlist (see rerank.py)
+RERANK_ENABLED = False
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_TOP_N = 30                 # candidate budget: only the top N are rescored
+RERANK_BUDGET_MS = 300            # latency budget: stop scoring new batches after this
+RERANK_BATCH_SIZE = 16
+RERANK_CACHE = CHROMA / "rerank_scores.sqlite"
+
+# Sentence embedding model shared by every collection
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Optional local embedding daemon (see embedding_daemon.py); scripts use it when
+# the socket answers and encode in-process otherwise. Kept short: Unix socket
+# paths are limited to ~100 characters.
+EMBEDDING_SOCKET = Path(os.environ.get("EMBEDDING_SOCKET",
+                                       Path(tempfile.gettempdir()) / "resumes_embedder.sock"))
+
+# Ingestion daemon (see ingest_daemon.py): watches DATA_DIR/<CATEGORY>/*.pdf
+INGEST_QUEUE = CHROMA / "ingest_queue.sqlite"
+INGEST_POLL_SECONDS = 2.0         # how often the drop folders are scanned
+INGEST_BATCH_SIZE = 16            # files per micro-batch
+INGEST_BATCH_WAIT_SECONDS = 1.0   # flush a partial batch once its oldest file waited this long
+INGEST_WORKERS = 4                # extract / parse / clean processes
+INGEST_MAX_ATTEMPTS = 3           # then the file goes to the dead-letter list
+
+# Local HTTP search service (see search_service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8000
+SERVICE_BATCH_WINDOW_MS = 5       # coalesce requests arriving within this window
+SERVICE_MAX_BATCH = 64            # queries per batched search
+SERVICE_MAX_QUEUE = 256           # waiting requests before answering 503
+SERVICE_MAX_TOP_K = 200           # larger top_k requests are clamped to this
 
 TOP_K_INITIAL = 80        # pull 80 candidates with semantic search
 TOP_K_FINAL = 10          # final ranked list
 MIN_SCORE_ACCEPT = 0.70   # ATS "Accept" threshold
 
+
+# === HNSW index settings (per collection) ===
+# Chroma defaults are construction_ef=100, search_ef=10, M=16.
+# construction_ef and M are fixed once a collection is created; changing them
+# requires rebuilding the collection. Use retrieval_phase/tune_hnsw.py to pick values.
+HNSW_SPACE = "cosine"
+HNSW_PARAMS = {
+    "resumes":          {"construction_ef": 200, "search_ef": 100, "M": 16},
+    "job_descriptions": {"construction_ef": 200, "search_ef": 100, "M": 16},
+    "job_titles_index": {"construction_ef": 100, "search_ef": 50,  "M": 16},
+}
+
+
+def hnsw_metadata(collection_name: str, overrides: dict = None) -> dict:
+    """Build the Chroma collection metadata dict holding the HNSW settings."""
+    params = dict(HNSW_PARAMS.get(collection_name, {}))
+    params.update(overrides or {})
+
+    metadata = {"hnsw:space": HNSW_SPACE}
+    for key, value in params.items():
+        metadata[f"hnsw:{key}"] = value
+    return metadata
@@ -0,0 +1,176 @@
+"""
+Streaming embed pipeline: prepare -> encode -> write, overlapped.
+
+    prep thread    pulls (id, document, metadata) rows from a generator and
+                   groups them into encode batches
+    encoder        (calling thread) runs the embedding function per batch
+    writer thread  accumulates encoded rows and issues add/upsert calls as
+                   large as the Chroma client accepts
+
+Stages are connected by bounded queues, so at most a few batches are in
+flight whatever the corpus size, and the model encodes the next batch while
+the previous one is being written to sqlite. A failure in any stage stops
+the others and is re-raised in the caller.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Tuple
+
+from tqdm import tqdm
+
+from chroma_utils import max_batch_size
+
+_DONE = object()
+POLL_SECONDS = 0.1
+
+
+class _Pipeline:
+    def __init__(self):
+        self.failed = threading.Event()
+        self.error = None
+
+    def fail(self, error: BaseException):
+        if self.error is None:
+            self.error = error
+        self.failed.set()
+
+    def put(self, q: queue.Queue, item) -> bool:
+        while not self.failed.is_set():
+            try:
+                q.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q: queue.Queue):
+        while not self.failed.is_set():
+            try:
+                return q.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+
+def stream_to_chroma(rows: Iterable[Tuple[str, str, dict]], collection, embedding_function: Callable = None,
+                     encode_batch: int = 100, write_batch: int = None, queue_depth: int = 4,
+                     upsert: bool = False, desc: str = "Embedding") -> dict:
+    """
+    Embed and store (id, document, metadata) rows with bounded memory.
+
+    embedding_function defaults to the collection's own; write_batch defaults
+    to the client's max batch size. Returns row count and per-stage seconds.
+    """
+    if embedding_function is None:
+        embedding_function = getattr(collection, "_embedding_function", None)
+    if write_batch is None:
+        write_batch = max_batch_size(getattr(collection, "_client", None))
+    write = collection.upsert if upsert else collection.add
+
+    pipeline = _Pipeline()
+    encode_q = queue.Queue(maxsize=queue_depth)
+    write_q = queue.Queue(maxsize=queue_depth)
+    timings = {"prep": 0.0, "encode": 0.0, "write": 0.0}
+    progress = tqdm(desc=desc, unit="docs")
+
+    def prepare():
+        try:
+            batch = []
+            start = time.perf_counter()
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= encode_batch:
+                    timings["prep"] += time.perf_counter() - start
+                    if not pipeline.put(encode_q, batch):
+                        return
+                    batch = []
+                    start = time.perf_counter()
+            timings["prep"] += time.perf_counter() - start
+            if batch and not pipeline.put(encode_q, batch):
+                return
+            pipeline.put(encode_q, _DONE)
+        except BaseException as e:
+            pipeline.fail(e)
+
+    def flush(pending: dict, final: bool = False):
+        """
+        Write pending rows in slices of exactly write_batch (the client's max
+        batch size); a partial tail stays pending unless this is the final flush.
+        """
+        total = len(pending["ids"])
+        end = total if final else total - total % write_batch
+        for lo in range(0, end, write_batch):
+            hi = min(lo + write_batch, end)
+            start = time.perf_counter()
+            if pending["embeddings"] is None:
+                write(ids=pending["ids"][lo:hi], documents=pending["documents"][lo:hi],
+                      metadatas=pending["metadatas"][lo:hi])
+            else:
+                write(ids=pending["ids"][lo:hi], documents=pending["documents"][lo:hi],
+                      metadatas=pending["metadatas"][lo:hi], embeddings=pending["embeddings"][lo:hi])
+            timings["write"] += time.perf_counter() - start
+            progress.update(hi - lo)
+        for rows in pending.values():
+            if rows is not None:
+                del rows[:end]
+
+    def write_rows():
+        try:
+            pending = None
+            while True:
+                item = pipeline.get(write_q)
+                if item is _DONE:
+                    break
+                ids, documents, metadatas, embeddings = item
+                if pending is None:
+                    pending = {"ids": [], "documents": [], "metadatas": [],
+                               "embeddings": None if embeddings is None else []}
+                pending["ids"].extend(ids)
+                pending["documents"].extend(documents)
+                pending["metadatas"].extend(metadatas)
+                if embeddings is not None:
+                    pending["embeddings"].extend(embeddings)
+                if len(pending["ids"]) >= write_batch:
+                    flush(pending)
+            if pending and pending["ids"] and not pipeline.failed.is_set():
+                flush(pending, final=True)
+        except BaseException as e:
+            pipeline.fail(e)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=prepare, name="embed-prep", daemon=True),
+               threading.Thread(target=write_rows, name="embed-write", daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    count = 0
+    try:
+        while True:
+            batch = pipeline.get(encode_q)
+            if batch is _DONE:
+                break
+            ids = [row[0] for row in batch]
+            documents = [row[1] for row in batch]
+            metadatas = [row[2] for row in batch]
+            embeddings = None
+            if embedding_function is not None:
+                start = time.perf_counter()
+                embeddings = embedding_function(documents)
+                timings["encode"] += time.perf_counter() - start
+            if not pipeline.put(write_q, (ids, documents, metadatas, embeddings)):
+                break
+            count += len(ids)
+        pipeline.put(write_q, _DONE)
+    except BaseException as e:
+        pipeline.fail(e)
+    finally:
+        for thread in threads:
+            thread.join()
+        progress.close()
+
+    if pipeline.error is not None:
+        raise pipeline.error
+    return {"rows": count, "seconds": round(time.perf_counter() - started, 2),
+            **{f"{stage}_seconds": round(value, 2) for stage, value in timings.items()}}
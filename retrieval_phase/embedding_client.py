@@ -0,0 +1,152 @@
+"""
+Client side of the local embedding daemon (see embedding_daemon.py).
+
+Wire protocol over the Unix socket, both directions:
+    frame = 4-byte big-endian length + payload
+    request:  one JSON frame   {"op": "encode", "texts": [...]} | {"op": "stats"} | {"op": "shutdown"}
+    response: one JSON frame   {"ok": true, "count": n, "dim": d} (+ for encode, one
+              frame of n * d little-endian float32)
+
+get_embedding_function() is what the pipeline scripts use: it talks to the
+daemon when one is running and otherwise loads the model in-process, exactly as
+before. If the daemon disappears mid-run the function falls back on the spot.
+"""
+
+import json
+import socket
+import struct
+import sys
+import threading
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+from config import EMBEDDING_MODEL, EMBEDDING_SOCKET
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 512 * 1024 * 1024
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(min(size - len(chunks), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("embedding daemon closed the connection")
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ConnectionError(f"frame of {size} bytes exceeds the limit")
+    return _recv_exact(sock, size)
+
+
+class EmbeddingClient:
+    """Persistent connection to the daemon (one request at a time per client)."""
+
+    def __init__(self, socket_path=EMBEDDING_SOCKET, timeout: float = 300.0):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._sock = sock
+        return self._sock
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def request(self, message: dict) -> tuple:
+        """Send one request; returns (header dict, binary payload or None)."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    sock = self._connect()
+                    send_frame(sock, json.dumps(message).encode("utf-8"))
+                    header = json.loads(recv_frame(sock))
+                    payload = recv_frame(sock) if header.get("ok") and message.get("op") == "encode" else None
+                    break
+                except (OSError, ConnectionError):
+                    # A stale connection (daemon restarted) gets one reconnect
+                    if self._sock is not None:
+                        self._sock.close()
+                        self._sock = None
+                    if attempt:
+                        raise
+        if not header.get("ok"):
+            raise RuntimeError(header.get("error", "embedding daemon error"))
+        return header, payload
+
+    def encode(self, texts: list) -> np.ndarray:
+        header, payload = self.request({"op": "encode", "texts": list(texts)})
+        return np.frombuffer(payload, dtype="<f4").reshape(header["count"], header["dim"])
+
+    def stats(self) -> dict:
+        return self.request({"op": "stats"})[0]
+
+    def ping(self) -> bool:
+        try:
+            return bool(self.request({"op": "stats"})[0].get("ok"))
+        except (OSError, ConnectionError, RuntimeError, ValueError):
+            return False
+
+
+def daemon_available(socket_path=EMBEDDING_SOCKET) -> bool:
+    return EmbeddingClient(socket_path, timeout=2.0).ping()
+
+
+class DaemonEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    """
+    Chroma embedding function backed by the daemon. It reports itself as the
+    sentence_transformer function for the same model, since the vectors are identical,
+    so collections created either way stay interchangeable.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, socket_path=EMBEDDING_SOCKET):
+        self.model_name = model_name
+        self.client = EmbeddingClient(socket_path)
+        self._local = None
+
+    def __call__(self, input):
+        texts = [input] if isinstance(input, str) else list(input)
+        if self._local is None:
+            try:
+                return self.client.encode(texts).tolist()
+            except (OSError, ConnectionError) as e:
+                print(f"⚠️  Embedding daemon unavailable ({e}); encoding in-process", file=sys.stderr)
+                self._local = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=self.model_name)
+        return self._local(texts)
+
+    @staticmethod
+    def name() -> str:
+        return "sentence_transformer"
+
+    def get_config(self) -> dict:
+        return {"model_name": self.model_name, "device": "cpu", "normalize_embeddings": False, "kwargs": {}}
+
+    @staticmethod
+    def build_from_config(config: dict):
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=config["model_name"])
+
+
+def get_embedding_function(model_name: str = EMBEDDING_MODEL, socket_path=EMBEDDING_SOCKET):
+    """Daemon-backed embedding function if the daemon is running, else the in-process model."""
+    if daemon_available(socket_path):
+        print(f"🔌 Using embedding daemon at {socket_path}", file=sys.stderr)
+        return DaemonEmbeddingFunction(model_name, socket_path)
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
@@ -0,0 +1,159 @@
+"""
+Long-lived local embedding daemon shared by the pipeline scripts.
+
+Loads all-MiniLM-L6-v2 once and serves batched encode requests over a Unix
+socket (protocol in embedding_client.py). embed_resumes.py,
+embed_job_descriptions.py, build_clean_title_index.py, query_expander_rag.py
+and match_engine.py pick it up automatically through get_embedding_function()
+and encode in-process when it is not running.
+
+Vectors are the same as SentenceTransformerEmbeddingFunction's (same model,
+no normalisation), so a collection built through the daemon can be queried
+without it and vice versa.
+
+Usage:
+    python retrieval_phase/embedding_daemon.py start      # foreground; Ctrl+C to stop
+    python retrieval_phase/embedding_daemon.py stats
+    python retrieval_phase/embedding_daemon.py stop
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, EMBEDDING_SOCKET
+from embedding_client import EmbeddingClient, recv_frame, send_frame
+
+ENCODE_BATCH_SIZE = 64
+
+
+class EmbeddingDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """One thread per client connection; the model itself is used under a lock."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.model_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {"requests": 0, "texts": 0, "encode_seconds": 0.0, "errors": 0, "connections": 0}
+
+        socket_path = Path(socket_path)
+        if socket_path.exists():
+            socket_path.unlink()  # stale socket from a previous run
+        super().__init__(str(socket_path), EmbeddingHandler)
+        os.chmod(socket_path, 0o600)
+
+    def encode(self, texts: list) -> np.ndarray:
+        start = time.perf_counter()
+        with self.model_lock:
+            vectors = self.model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True,
+                                        normalize_embeddings=False, show_progress_bar=False)
+        elapsed = time.perf_counter() - start
+        with self.stats_lock:
+            self.counters["requests"] += 1
+            self.counters["texts"] += len(texts)
+            self.counters["encode_seconds"] += elapsed
+        return np.asarray(vectors, dtype="<f4")
+
+    def stats(self) -> dict:
+        with self.stats_lock:
+            counters = dict(self.counters)
+        busy = counters["encode_seconds"]
+        return {
+            "ok": True,
+            "model": self.model_name,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "requests": counters["requests"],
+            "texts": counters["texts"],
+            "connections": counters["connections"],
+            "errors": counters["errors"],
+            "encode_seconds": round(busy, 2),
+            "texts_per_second": round(counters["texts"] / busy, 1) if busy else 0.0,
+            "mean_batch_size": round(counters["texts"] / counters["requests"], 1) if counters["requests"] else 0.0,
+        }
+
+
+class EmbeddingHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one connection until the client disconnects."""
+
+    def handle(self):
+        server = self.server
+        with server.stats_lock:
+            server.counters["connections"] += 1
+        while True:
+            try:
+                message = json.loads(recv_frame(self.request))
+            except (ConnectionError, OSError, ValueError):
+                return
+
+            op = message.get("op")
+            try:
+                if op == "encode":
+                    texts = [str(t) for t in message.get("texts", [])]
+                    vectors = server.encode(texts) if texts else np.zeros((0, 0), dtype="<f4")
+                    dim = vectors.shape[1] if vectors.ndim == 2 else 0
+                    send_frame(self.request, json.dumps({"ok": True, "count": len(texts), "dim": dim}).encode())
+                    send_frame(self.request, vectors.tobytes())
+                elif op == "stats":
+                    send_frame(self.request, json.dumps(server.stats()).encode())
+                elif op == "shutdown":
+                    send_frame(self.request, json.dumps({"ok": True}).encode())
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    return
+                else:
+                    send_frame(self.request, json.dumps({"ok": False, "error": f"unknown op {op!r}"}).encode())
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                with server.stats_lock:
+                    server.counters["errors"] += 1
+                send_frame(self.request, json.dumps({"ok": False, "error": str(e)}).encode())
+
+
+def run_daemon(socket_path: Path = EMBEDDING_SOCKET, model_name: str = EMBEDDING_MODEL):
+    start = time.perf_counter()
+    server = EmbeddingDaemon(socket_path, model_name)
+    print(f"✅ Embedding daemon ready on {socket_path} ({model_name}, loaded in {time.perf_counter() - start:.1f}s)",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if Path(socket_path).exists():
+            Path(socket_path).unlink()
+        print(f"Stopped. {json.dumps(server.stats())}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local embedding daemon (Unix socket)")
+    parser.add_argument("command", choices=["start", "stats", "stop"])
+    parser.add_argument("--socket", default=str(EMBEDDING_SOCKET))
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    args = parser.parse_args()
+
+    if args.command == "start":
+        run_daemon(Path(args.socket), args.model)
+    else:
+        client = EmbeddingClient(args.socket, timeout=5.0)
+        try:
+            if args.command == "stats":
+                print(json.dumps(client.stats(), indent=2))
+            else:
+                client.request({"op": "shutdown"})
+                print("✅ Daemon stopping")
+        except (OSError, ConnectionError):
+            raise SystemExit(f"❌ No embedding daemon on {args.socket}")
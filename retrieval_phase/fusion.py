@@ -0,0 +1,50 @@
+"""
+Rank fusion helpers for combining several result lists into one.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+RRF_K = 60  # standard reciprocal-rank-fusion constant
+
+
+def reciprocal_rank_fusion(ranked_lists: List[list], key: Callable[[dict], str],
+                           weights: Optional[List[float]] = None, k: int = RRF_K,
+                           top_n: Optional[int] = None) -> List[dict]:
+    """
+    Fuse ranked result lists with (weighted) reciprocal rank fusion.
+
+    Each list holds dicts ordered best-first. Items are de-duplicated by key()
+    inside the fusion: within one list only the first (best) occurrence of a
+    key counts, so a resume matched through several fields is not counted twice.
+    The fused item keeps the payload of its best-ranked occurrence and gains
+    "rrf_score".
+    """
+    weights = weights or [1.0] * len(ranked_lists)
+    scores: Dict[str, float] = {}
+    best_rank: Dict[str, int] = {}
+    payloads: Dict[str, dict] = {}
+
+    for items, weight in zip(ranked_lists, weights):
+        rank = 0
+        seen = set()
+        for item in items:
+            item_key = key(item)
+            if not item_key or item_key in seen:
+                continue
+            seen.add(item_key)
+            rank += 1
+            scores[item_key] = scores.get(item_key, 0.0) + weight / (k + rank)
+            if item_key not in best_rank or rank < best_rank[item_key]:
+                best_rank[item_key] = rank
+                payloads[item_key] = item
+
+    ordered = sorted(scores, key=lambda item_key: scores[item_key], reverse=True)
+    if top_n is not None:
+        ordered = ordered[:top_n]
+
+    fused = []
+    for item_key in ordered:
+        item = dict(payloads[item_key])
+        item["rrf_score"] = round(scores[item_key], 6)
+        fused.append(item)
+    return fused
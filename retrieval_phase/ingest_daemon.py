@@ -0,0 +1,393 @@
+"""
+Ingestion daemon: picks up new resume PDFs and indexes them in micro-batches.
+
+New files come from two places, both recorded in a sqlite job queue
+(chroma_db/ingest_queue.sqlite):
+    - the drop folders DATA_DIR/<CATEGORY>/*.pdf, scanned every INGEST_POLL_SECONDS
+    - `enqueue` from any other process
+
+Queued files are claimed in micro-batches: INGEST_BATCH_SIZE files, or fewer
+once the oldest has waited INGEST_BATCH_WAIT_SECONDS. Extract / parse / clean
+(ingest_resume.prepare_resume) run in INGEST_WORKERS processes. The batch is
+then embedded and upserted in one go (ResumeIngestor.store).
+
+Jobs are keyed by path and content hash, so rescans and restarts never
+duplicate work, and storing is an upsert, so retries are idempotent. A
+failed file is retried with backoff, on its own (a poison file cannot sink a
+batch twice). After INGEST_MAX_ATTEMPTS it goes to the dead-letter list,
+until the file changes or `retry-dead` is run.
+
+On first start (empty queue) the drop folders already hold the batch corpus.
+Files whose ID (file stem) is already in the resumes collection are recorded
+as done instead of queued, so only files not yet indexed are ingested; later
+changes to a recorded file still re-ingest it. `run --no-baseline` skips this
+and queues everything.
+
+As with ingest_resume.py, the BM25 index (hybrid search) is not updated here:
+ingested resumes are lexically searchable after the next
+`python retrieval_phase/bm25_index.py build`.
+
+Usage:
+    python retrieval_phase/ingest_daemon.py run
+    python retrieval_phase/ingest_daemon.py enqueue new/123.pdf --category ACCOUNTANT
+    python retrieval_phase/ingest_daemon.py status
+    python retrieval_phase/ingest_daemon.py dead
+    python retrieval_phase/ingest_daemon.py retry-dead
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from chroma_utils import fetch_all
+from config import (
+    DATA_DIR, RESULTS, INGEST_QUEUE, INGEST_POLL_SECONDS, INGEST_BATCH_SIZE,
+    INGEST_BATCH_WAIT_SECONDS, INGEST_WORKERS, INGEST_MAX_ATTEMPTS
+)
+from ingest_resume import ResumeIngestor, prepare_resume
+
+SETTLE_SECONDS = 1.0       # skip files modified this recently (still being copied)
+RETRY_DELAY_SECONDS = 5.0  # doubled on every further attempt
+METRICS_FILE = RESULTS / "ingest_daemon_metrics.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path          TEXT PRIMARY KEY,
+    category      TEXT NOT NULL,
+    resume_id     TEXT NOT NULL,
+    size          INTEGER,
+    mtime_ns      INTEGER,
+    content_hash  TEXT,
+    status        TEXT NOT NULL,          -- queued | running | done | dead
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    last_error    TEXT,
+    enqueued_at   REAL NOT NULL,
+    available_at  REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at, enqueued_at);
+"""
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JobQueue:
+    """sqlite-backed queue of resume files (WAL, so other processes can enqueue)."""
+
+    def __init__(self, path: Path = INGEST_QUEUE):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, path: Path, category: str, resume_id: str = None, status: str = "queued") -> bool:
+        """Queue a file unless this exact content is already queued, done or dead.
+
+        status="done" records an already indexed file as the baseline for later changes.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, content_hash FROM jobs WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return False
+
+        content_hash = file_hash(path)
+        now = time.time()
+        with self.conn:
+            if row and row[2] == content_hash:
+                # Touched but not changed
+                self.conn.execute("UPDATE jobs SET size = ?, mtime_ns = ? WHERE path = ?",
+                                  (stat.st_size, stat.st_mtime_ns, str(path)))
+                return False
+            self.conn.execute(
+                "INSERT OR REPLACE INTO jobs (path, category, resume_id, size, mtime_ns, content_hash, status,"
+                " attempts, last_error, enqueued_at, available_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 0, NULL, ?, ?, ?)",
+                (str(path), category, resume_id or path.stem, stat.st_size, stat.st_mtime_ns,
+                 content_hash, status, now, now, now)
+            )
+        return True
+
+    def recover(self) -> int:
+        """Jobs left 'running' by a crashed daemon go back to the queue."""
+        with self.conn:
+            return self.conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+
+    def ready(self) -> tuple:
+        """(number of jobs ready to run, seconds the oldest of them has waited)."""
+        count, oldest = self.conn.execute(
+            "SELECT COUNT(*), MIN(enqueued_at) FROM jobs WHERE status = 'queued' AND available_at <= ?",
+            (time.time(),)
+        ).fetchone()
+        return count, (time.time() - oldest) if oldest else 0.0
+
+    def claim(self, limit: int) -> list:
+        """Mark up to limit ready jobs as running. A retry is always claimed alone."""
+        now = time.time()
+        rows = self.conn.execute(
+            "SELECT path, category, resume_id, attempts FROM jobs WHERE status = 'queued' AND available_at <= ?"
+            " ORDER BY attempts > 0 DESC, enqueued_at LIMIT ?", (now, limit)
+        ).fetchall()
+        if rows and rows[0][3] > 0:
+            rows = rows[:1]
+        with self.conn:
+            self.conn.executemany("UPDATE jobs SET status = 'running', updated_at = ? WHERE path = ?",
+                                  [(now, row[0]) for row in rows])
+        return [{"path": r[0], "category": r[1], "resume_id": r[2], "attempts": r[3]} for r in rows]
+
+    def complete(self, paths: list):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany("UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE path = ?",
+                                  [(now, p) for p in paths])
+
+    def fail(self, path: str, error: str, max_attempts: int = INGEST_MAX_ATTEMPTS) -> str:
+        """Record a failed attempt; returns the new status ('queued' for a retry, or 'dead')."""
+        attempts = self.conn.execute("SELECT attempts FROM jobs WHERE path = ?", (path,)).fetchone()[0] + 1
+        status = "dead" if attempts >= max_attempts else "queued"
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, last_error = ?, available_at = ?, updated_at = ?"
+                " WHERE path = ?",
+                (status, attempts, error[:500], now + RETRY_DELAY_SECONDS * 2 ** (attempts - 1), now, path)
+            )
+        return status
+
+    def dead(self) -> list:
+        return self.conn.execute(
+            "SELECT path, attempts, last_error FROM jobs WHERE status = 'dead' ORDER BY updated_at"
+        ).fetchall()
+
+    def retry_dead(self) -> int:
+        now = time.time()
+        with self.conn:
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, updated_at = ? WHERE status = 'dead'",
+                (now, now)
+            ).rowcount
+
+    def counts(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "dead": 0}
+        counts.update(dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()))
+        return counts
+
+
+def scan_drop_folders(queue: JobQueue, data_dir: Path = DATA_DIR, indexed: set = None) -> int:
+    """Queue new or changed PDFs under data_dir/<CATEGORY>/; returns how many were queued.
+
+    Files whose stem is in `indexed` are recorded as done (first-start baseline).
+    """
+    if not data_dir.exists():
+        return 0
+    queued = 0
+    settled_before = time.time() - SETTLE_SECONDS
+    for category_dir in sorted(d for d in data_dir.iterdir() if d.is_dir()):
+        for pdf in category_dir.glob("*.pdf"):
+            try:
+                if pdf.stat().st_mtime > settled_before:
+                    continue
+                if indexed and pdf.stem in indexed:
+                    queue.enqueue(pdf, category_dir.name, status="done")
+                else:
+                    queued += queue.enqueue(pdf, category_dir.name)
+            except OSError:
+                continue  # removed while scanning
+    return queued
+
+
+def _prepare_job(job: dict) -> tuple:
+    """Worker process: (path, cleaned record, None) or (path, None, error)."""
+    try:
+        resume, _ = prepare_resume(job["path"], job["category"], job["resume_id"])
+        return job["path"], resume, None
+    except Exception as e:
+        return job["path"], None, f"{type(e).__name__}: {e}"
+
+
+class IngestDaemon:
+    def __init__(self, data_dir: Path = DATA_DIR, queue_path: Path = INGEST_QUEUE,
+                 batch_size: int = INGEST_BATCH_SIZE, batch_wait: float = INGEST_BATCH_WAIT_SECONDS,
+                 workers: int = INGEST_WORKERS, max_attempts: int = INGEST_MAX_ATTEMPTS,
+                 poll_seconds: float = INGEST_POLL_SECONDS, report_seconds: float = 30.0):
+        self.data_dir = data_dir
+        self.queue = JobQueue(queue_path)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.report_seconds = report_seconds
+        self.ingestor = ResumeIngestor()
+        self.pool = self._new_pool()
+        self.started_at = time.time()
+        self.metrics = {"batches": 0, "ingested": 0, "failed_attempts": 0, "dead_lettered": 0,
+                        "prepare_seconds": 0.0, "store_seconds": 0.0}
+        self._window = (time.time(), 0)  # (start, ingested at start) of the current report window
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: workers must not inherit the parent's Chroma / sqlite handles
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _fail(self, path: str, error: str):
+        self.metrics["failed_attempts"] += 1
+        if self.queue.fail(path, error, self.max_attempts) == "dead":
+            self.metrics["dead_lettered"] += 1
+            print(f"☠️  Dead-lettered {path}: {error}", file=sys.stderr)
+
+    def process_batch(self, jobs: list):
+        start = time.perf_counter()
+        prepared = []
+        handled = set()   # paths already prepared or failed in this batch
+        futures = [self.pool.submit(_prepare_job, job) for job in jobs]
+        try:
+            for future in as_completed(futures):
+                path, resume, error = future.result()
+                handled.add(path)
+                if error:
+                    self._fail(path, error)
+                else:
+                    prepared.append((path, resume))
+        except BrokenProcessPool as e:
+            # A worker died (e.g. the PDF library crashed); every unfinished file
+            # counts one failed attempt and will be retried alone. Files whose
+            # error was already recorded above are not charged a second attempt.
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._new_pool()
+            for job in jobs:
+                if job["path"] not in handled:
+                    self._fail(job["path"], f"worker crashed: {e}")
+        self.metrics["prepare_seconds"] += time.perf_counter() - start
+
+        if prepared:
+            start = time.perf_counter()
+            try:
+                self.ingestor.store([resume for _, resume in prepared])
+            except Exception as e:
+                for path, _ in prepared:
+                    self._fail(path, f"store failed: {type(e).__name__}: {e}")
+            else:
+                self.queue.complete([path for path, _ in prepared])
+                self.metrics["ingested"] += len(prepared)
+            self.metrics["store_seconds"] += time.perf_counter() - start
+        self.metrics["batches"] += 1
+
+    def report(self) -> dict:
+        now = time.time()
+        window_start, window_ingested = self._window
+        elapsed = now - self.started_at
+        snapshot = {
+            "queue": self.queue.counts(),
+            **{key: round(value, 2) if isinstance(value, float) else value for key, value in self.metrics.items()},
+            "mean_batch_size": round(self.metrics["ingested"] / self.metrics["batches"], 2)
+            if self.metrics["batches"] else 0.0,
+            "docs_per_second": round(self.metrics["ingested"] / elapsed, 2) if elapsed else 0.0,
+            "recent_docs_per_second": round((self.metrics["ingested"] - window_ingested) / (now - window_start), 2)
+            if now > window_start else 0.0,
+            "uptime_seconds": round(elapsed, 1),
+        }
+        self._window = (now, self.metrics["ingested"])
+        tmp = METRICS_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+        tmp.replace(METRICS_FILE)
+        queue = snapshot["queue"]
+        print(f"📊 queued {queue['queued']} | running {queue['running']} | done {queue['done']} | "
+              f"dead {queue['dead']} | {snapshot['recent_docs_per_second']} docs/s "
+              f"(avg {snapshot['docs_per_second']}), mean batch {snapshot['mean_batch_size']}", file=sys.stderr)
+        return snapshot
+
+    def baseline(self) -> tuple:
+        """Record drop-folder files already in the resumes collection as done; (done, queued)."""
+        indexed = {meta.get("id") for meta in fetch_all(self.ingestor.resumes, include=["metadatas"])["metadatas"]
+                   if meta}
+        queued = scan_drop_folders(self.queue, self.data_dir, indexed)
+        return self.queue.counts()["done"], queued
+
+    def run(self, baseline: bool = True):
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"↩️  Re-queued {recovered} jobs left running by a previous run", file=sys.stderr)
+        if baseline and not any(self.queue.counts().values()):
+            done, queued = self.baseline()
+            print(f"📌 First start: {done} file(s) already indexed, {queued} queued", file=sys.stderr)
+        print(f"✅ Ingestion daemon watching {self.data_dir} (batch {self.batch_size}, "
+              f"{self.workers} workers)", file=sys.stderr)
+
+        next_scan = next_report = 0.0
+        try:
+            while True:
+                now = time.time()
+                if now >= next_scan:
+                    queued = scan_drop_folders(self.queue, self.data_dir)
+                    if queued:
+                        print(f"📥 Queued {queued} new file(s)", file=sys.stderr)
+                    next_scan = now + self.poll_seconds
+                if now >= next_report:
+                    self.report()
+                    next_report = now + self.report_seconds
+
+                ready, oldest_wait = self.queue.ready()
+                if ready >= self.batch_size or (ready and oldest_wait >= self.batch_wait):
+                    self.process_batch(self.queue.claim(self.batch_size))
+                else:
+                    time.sleep(0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.queue.recover()
+            self.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching resume ingestion daemon")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Watch the drop folders and ingest new files")
+    run.add_argument("--data-dir", default=str(DATA_DIR))
+    run.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    run.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    run.add_argument("--report-seconds", type=float, default=30.0)
+    run.add_argument("--no-baseline", action="store_true",
+                     help="On first start queue every file, even those already indexed")
+    enqueue = sub.add_parser("enqueue", help="Queue PDF(s) for the running daemon")
+    enqueue.add_argument("pdfs", nargs="+")
+    enqueue.add_argument("--category", required=True)
+    sub.add_parser("status", help="Queue depth and the daemon's last metrics")
+    sub.add_parser("dead", help="List dead-lettered files")
+    sub.add_parser("retry-dead", help="Give dead-lettered files another round of attempts")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        IngestDaemon(Path(args.data_dir), batch_size=args.batch_size, workers=args.workers,
+                     report_seconds=args.report_seconds).run(baseline=not args.no_baseline)
+    else:
+        queue = JobQueue()
+        if args.command == "enqueue":
+            queued = sum(queue.enqueue(Path(pdf), args.category) for pdf in args.pdfs)
+            print(f"✅ Queued {queued} of {len(args.pdfs)} file(s)")
+        elif args.command == "status":
+            print(json.dumps(queue.counts(), indent=2))
+            if METRICS_FILE.exists():
+                with open(METRICS_FILE, "r", encoding="utf-8") as f:
+                    print(json.dumps(json.load(f), indent=2))
+        elif args.command == "dead":
+            for path, attempts, error in queue.dead():
+                print(f"{path}  ({attempts} attempts)  {error}")
+        else:
+            print(f"✅ Re-queued {queue.retry_dead()} dead-lettered file(s)")
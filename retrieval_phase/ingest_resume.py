@@ -0,0 +1,225 @@
+"""
+Online ingestion of a single resume PDF, without re-running the batch pipeline.
+
+ingest_resume(pdf, category) runs the same steps as the batch scripts, for one
+document:
+
+    extract       pdfplumber text (extract_text.py)
+    parse         parse_resume (resume_parser.py)
+    clean         clean_resume (cleaning_resumes.py)
+    embed         the resume's fields, one model call (warm model)
+    upsert        replace the resume's fields in the resumes collection, and in
+                  its category shard when shards are built (shards.py)
+    title_index   add its title to job_titles_index and the neighbour graph,
+                  only if the title is new
+    skill_index   set its bits in the skill bitmap index
+
+prepare_resume() is the model-free half (extract / parse / clean) and
+ResumeIngestor.store() the batched other half, so ingest_daemon.py can run the
+first in worker processes and store whole micro-batches at once.
+
+The model and collections are loaded once per process and reused, so after
+the first call the cost is dominated by PDF extraction. Every call returns
+per-stage timings in milliseconds. The BM25 index is a whole-corpus structure
+and picks the resume up on its next rebuild; dense search and skill filters
+see it immediately.
+
+Usage:
+    python retrieval_phase/ingest_resume.py data/data/ACCOUNTANT/12345678.pdf --category ACCOUNTANT
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+for folder in ("extracting_pdfplumber", "query_structuring_resumes", "embeddings"):
+    sys.path.insert(0, str(ROOT / folder))
+
+from config import CHROMA, TITLE_NEIGHBOURS, TITLE_NEIGHBOURS_TOP
+from build_clean_title_index import (
+    get_title_collection, derive_resume_title, detect_seniority, normalize_title_key,
+    add_title_to_graph, save_title_neighbours
+)
+from query_cache import bump_index_version
+from skill_index import update_skill_index
+from shards import upsert_resume_rows
+from embedding_client import get_embedding_function
+from extract_text import extract_text_from_pdf
+from resume_parser import parse_resume
+from cleaning_resumes import clean_resume
+from embed_resumes import get_resumes_collection, iter_resume_fields
+
+
+def _stopwatch():
+    """(timings dict, lap(stage)) - lap records ms since the previous lap."""
+    timings = {}
+    last = time.perf_counter()
+
+    def lap(stage):
+        nonlocal last
+        now = time.perf_counter()
+        timings[stage] = round((now - last) * 1000, 1)
+        last = now
+
+    return timings, lap
+
+
+def prepare_resume(pdf, category: str, resume_id: str = None) -> tuple:
+    """
+    Extract, parse and clean one PDF (path or bytes) -> (cleaned record, timings).
+    Needs no model, so it can run in worker processes.
+    """
+    timings, lap = _stopwatch()
+    if isinstance(pdf, (bytes, bytearray)):
+        resume_id = resume_id or hashlib.sha1(pdf).hexdigest()[:12]
+        text = extract_text_from_pdf(io.BytesIO(pdf))
+    else:
+        resume_id = resume_id or Path(pdf).stem
+        text = extract_text_from_pdf(Path(pdf))
+    lap("extract")
+    if not text.strip():
+        raise ValueError(f"No text could be extracted from resume {resume_id}")
+
+    raw = parse_resume(text, resume_id=str(resume_id), category=category)
+    lap("parse")
+    resume = clean_resume(raw, 0)
+    lap("clean")
+    return resume, timings
+
+
+class ResumeIngestor:
+    """Keeps the model, collections and title graph loaded between ingestions."""
+
+    def __init__(self, persist_directory: Path = CHROMA):
+        self.embed_fn = get_embedding_function()
+        self.resumes = get_resumes_collection(str(persist_directory))
+        self.titles = get_title_collection(Path(persist_directory), embed_fn=self.embed_fn)
+        self.graph = None
+        if TITLE_NEIGHBOURS.exists():
+            with open(TITLE_NEIGHBOURS, "r", encoding="utf-8") as f:
+                self.graph = json.load(f)
+        # Load the model weights now, not inside the first ingestion
+        self.embed_fn(["warm up"])
+
+    def ingest(self, pdf, category: str, resume_id: str = None) -> dict:
+        """pdf is a path or the raw PDF bytes; returns the stored record summary and timings."""
+        start = time.perf_counter()
+        resume, timings = prepare_resume(pdf, category, resume_id)
+        stored = self.store([resume])
+        timings.update(stored["timings_ms"])
+        timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+        return {**stored["resumes"][0], "timings_ms": timings}
+
+    def store(self, resumes: list) -> dict:
+        """
+        Embed and store cleaned resume records: one model call and one upsert for
+        the whole list, then the title and skill indexes. Safe to repeat (upserts).
+        """
+        timings, lap = _stopwatch()
+        if not resumes:
+            return {"resumes": [], "timings_ms": timings}
+        rows = list(iter_resume_fields(resumes))
+        embeddings = self.embed_fn([document for _, document, _ in rows]) if rows else []
+        lap("embed")
+
+        # Drop fields from an earlier version of these resumes (the category may have changed)
+        self.resumes.delete(where={"id": {"$in": [r["ID"] for r in resumes]}})
+        if rows:
+            self.resumes.upsert(ids=[doc_id for doc_id, _, _ in rows],
+                                documents=[document for _, document, _ in rows],
+                                metadatas=[metadata for _, _, metadata in rows],
+                                embeddings=embeddings)
+        bump_index_version("resumes")
+        # Sharded search must see the resume as soon as the main collection does
+        upsert_resume_rows([doc_id for doc_id, _, _ in rows], embeddings,
+                           [document for _, document, _ in rows], [metadata for _, _, metadata in rows],
+                           [r["ID"] for r in resumes])
+        lap("upsert")
+
+        summaries = []
+        for resume in resumes:
+            title, title_added = self.update_title_index(resume)
+            summaries.append({
+                "id": resume["ID"],
+                "category": resume["category"],
+                "fields": [metadata["field_type"] for _, _, metadata in rows if metadata["id"] == resume["ID"]],
+                "title": title,
+                "title_added": title_added,
+            })
+        lap("title_index")
+
+        update_skill_index(resumes)
+        lap("skill_index")
+        return {"resumes": summaries, "timings_ms": timings}
+
+    def update_title_index(self, resume: dict) -> tuple:
+        """Add the resume's title to the title index / graph if it is not there yet."""
+        title = derive_resume_title(resume)
+        if not title:
+            return "", False
+        if self.graph is not None and normalize_title_key(title) in self.graph["titles"]:
+            return title, False
+
+        vector = self.embed_fn([title])[0]
+        doc_id = f"title_{resume['ID']}"
+        metadata = {"resume_id": resume["ID"], "category": resume["category"], "seniority": detect_seniority(title)}
+
+        neighbours = []
+        indexed = self.titles.count()
+        if self.graph is not None and indexed:
+            hits = self.titles.query(query_embeddings=[vector], n_results=min(TITLE_NEIGHBOURS_TOP + 1, indexed),
+                                     include=["documents", "distances"])
+            neighbours = [(t, i, 1 - d) for t, i, d in zip(hits["documents"][0], hits["ids"][0], hits["distances"][0])]
+
+        self.titles.upsert(ids=[doc_id], documents=[title], metadatas=[metadata], embeddings=[vector])
+        if self.graph is not None:
+            add_title_to_graph(self.graph, title, doc_id, metadata, neighbours)
+            save_title_neighbours(self.graph)
+        bump_index_version("job_titles_index")
+        return title, True
+
+
+_ingestor = None
+
+
+def get_ingestor() -> ResumeIngestor:
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = ResumeIngestor()
+    return _ingestor
+
+
+def ingest_resume(pdf_path_or_bytes, category: str, resume_id: str = None) -> dict:
+    """Ingest one resume with the shared warm ingestor (see ResumeIngestor.ingest)."""
+    return get_ingestor().ingest(pdf_path_or_bytes, category, resume_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest resume PDFs into the live index")
+    parser.add_argument("pdfs", nargs="+", help="Resume PDF file(s)")
+    parser.add_argument("--category", required=True, help="Resume category, e.g. ACCOUNTANT")
+    parser.add_argument("--id", default=None, help="Resume ID (default: file name stem; single file only)")
+    args = parser.parse_args()
+
+    if args.id and len(args.pdfs) > 1:
+        raise SystemExit("❌ --id can only be used with a single PDF")
+
+    start = time.perf_counter()
+    ingestor = get_ingestor()
+    print(f"Model and collections ready in {time.perf_counter() - start:.2f}s\n")
+
+    for pdf in args.pdfs:
+        try:
+            result = ingestor.ingest(pdf, args.category, args.id)
+        except ValueError as e:
+            print(f"❌ {pdf}: {e}")
+            continue
+        stages = ", ".join(f"{stage} {ms}" for stage, ms in result["timings_ms"].items() if stage != "total")
+        print(f"✅ {result['id']} ({result['category']}): {len(result['fields'])} fields, "
+              f"title '{result['title']}'{' (new)' if result['title_added'] else ''}")
+        print(f"   {result['timings_ms']['total']} ms  [{stages}]")
@@ -0,0 +1,139 @@
+"""
+Load test for search_service.py: throughput and latency versus concurrency.
+
+For each concurrency level, that many keep-alive clients send POST /search
+back to back for --duration seconds. Reported per level: completed requests
+per second, p50 / p95 / p99 latency, and the share of 503 (back-pressure) and
+other errors. Start the service with --no-cache so repeated queries are not
+answered from the result cache.
+
+Usage:
+    python retrieval_phase/search_service.py --no-cache &
+    python retrieval_phase/load_test_service.py --concurrency 1 4 16 64 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+from config import RESULTS, SERVICE_HOST, SERVICE_PORT, TITLE_NEIGHBOURS
+
+DEFAULT_QUERIES = [
+    "Accountant", "Financial Analyst", "Software Engineer", "Data Scientist", "HR Manager",
+    "Sales Representative", "Project Manager", "Teacher", "Chef", "Graphic Designer",
+]
+
+
+def load_queries(path: str = None, limit: int = 500) -> list:
+    """Queries from a file (one per line), else titles from the neighbour graph."""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    if TITLE_NEIGHBOURS.exists():
+        with open(TITLE_NEIGHBOURS, "r", encoding="utf-8") as f:
+            titles = [entry["title"] for entry in json.load(f)["titles"].values()]
+        random.Random(42).shuffle(titles)
+        return titles[:limit]
+    return list(DEFAULT_QUERIES)
+
+
+async def post_search(reader, writer, host: str, body: bytes) -> int:
+    """One keep-alive POST /search; returns the HTTP status."""
+    writer.write(
+        f"POST /search HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, queries: list, top_k: int, stop_at: float, seed: int, record: dict):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < stop_at:
+            body = json.dumps({"query": rng.choice(queries), "top_k": top_k}).encode("utf-8")
+            start = time.perf_counter()
+            try:
+                status = await post_search(reader, writer, host, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                record["errors"] += 1
+                break
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if status == 200:
+                record["latencies"].append(elapsed_ms)
+            elif status == 503:
+                record["rejected"] += 1
+                await asyncio.sleep(0.05)  # honour back-pressure
+            else:
+                record["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run_level(host: str, port: int, concurrency: int, duration: float, queries: list, top_k: int) -> dict:
+    record = {"latencies": [], "rejected": 0, "errors": 0}
+    start = time.perf_counter()
+    stop_at = start + duration
+    await asyncio.gather(*[
+        client(host, port, queries, top_k, stop_at, seed, record) for seed in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies = record["latencies"]
+    attempts = len(latencies) + record["rejected"] + record["errors"]
+    return {
+        "concurrency": concurrency,
+        "completed": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if latencies else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2) if latencies else None,
+        "rejected_rate": round(record["rejected"] / attempts, 4) if attempts else 0.0,
+        "error_rate": round(record["errors"] / attempts, 4) if attempts else 0.0,
+    }
+
+
+async def run_load_test(host: str, port: int, levels: list, duration: float, queries: list, top_k: int) -> list:
+    rows = []
+    for concurrency in levels:
+        row = await run_level(host, port, concurrency, duration, queries, top_k)
+        rows.append(row)
+        print(f"{row['concurrency']:>11} | {row['throughput_rps']:>9.1f} | {row['p50_ms'] or 0:>8.1f} | "
+              f"{row['p95_ms'] or 0:>8.1f} | {row['p99_ms'] or 0:>8.1f} | {row['rejected_rate']:>7.1%}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput / p99 vs concurrency for the search service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--queries-file", default=None, help="One query per line (default: graph titles)")
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries_file)
+    print(f"Load testing http://{args.host}:{args.port}/search with {len(queries)} distinct queries\n")
+    print(f"{'concurrency':>11} | {'req/s':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'503s':>7}")
+    print("-" * 68)
+    rows = asyncio.run(run_load_test(args.host, args.port, args.concurrency, args.duration, queries, args.top_k))
+    print("-" * 68)
+
+    output_file = RESULTS / "load_test_service.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({"duration_seconds": args.duration, "top_k": args.top_k, "levels": rows}, f, indent=2)
+    print(f"💾 Saved to: {output_file}")
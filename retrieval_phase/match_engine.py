@@ -0,0 +1,242 @@
+"""
+Two-stage JD -> resume matching driven by config thresholds.
+
+Stage 1 (retrieve): all structured_chunks of a JD are encoded together and sent
+as one multi-query call to the resumes collection; the union of hits is cut
+to TOP_K_INITIAL candidates (best chunk similarity per resume).
+
+Stage 2 (rank): the shortlisted resumes' stored field vectors are fetched and a
+chunk x resume-field similarity matrix is computed with NumPy. A resume's score
+is the mean over JD chunks of its best-matching field. The top TOP_K_FINAL are
+kept and marked accepted when score >= MIN_SCORE_ACCEPT.
+
+With --rerank, the top RERANK_TOP_N of stage 2 are rescored with the
+cross-encoder (rerank.py) against each resume's work_experience field before the
+TOP_K_FINAL cut; "accepted" still uses the stage-2 score.
+
+JDs are processed in batches so each batch costs one encode and one ANN call.
+Ranked matches go to results/jd_matches.jsonl and per-stage latency to
+results/jd_matches_summary.json.
+
+Usage:
+    python retrieval_phase/match_engine.py --limit 100
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from config import (
+    CHROMA, RESULTS, JDS_STRUCTURED, TOP_K_INITIAL, TOP_K_FINAL, MIN_SCORE_ACCEPT, RERANK_TOP_N
+)
+from rerank import rerank_candidates
+from embedding_client import get_embedding_function
+
+STAGES = ["encode", "retrieve", "fetch_fields", "score", "rerank"]
+
+
+def load_structured_jds(path: Path = None) -> list:
+    """JDs with structured_chunks (the given file, else config.JDS_STRUCTURED)."""
+    for candidate in [path, JDS_STRUCTURED]:
+        if candidate and Path(candidate).exists():
+            with open(candidate, "r", encoding="utf-8") as f:
+                return json.load(f)
+    raise FileNotFoundError("No structured job descriptions found; run query_structuring_JD/clean_and_structure_jds.py")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+
+class MatchEngine:
+    """Holds the model and resumes collection warm across JDs."""
+
+    def __init__(self, persist_directory: Path = CHROMA, top_k_initial: int = TOP_K_INITIAL,
+                 top_k_final: int = TOP_K_FINAL, min_score_accept: float = MIN_SCORE_ACCEPT,
+                 rerank: bool = False):
+        self.client = chromadb.PersistentClient(path=str(persist_directory))
+        self.embed_fn = get_embedding_function()
+        self.resumes = self.client.get_collection("resumes")
+        self.top_k_initial = top_k_initial
+        self.top_k_final = top_k_final
+        self.min_score_accept = min_score_accept
+        self.rerank = rerank
+
+    def retrieve(self, chunk_vectors: list, spans: list) -> list:
+        """Stage 1: one multi-query ANN call for every chunk of every JD in the batch."""
+        results = self.resumes.query(
+            query_embeddings=chunk_vectors,
+            n_results=self.top_k_initial,
+            include=["metadatas", "distances"]
+        )
+
+        shortlists = []
+        for lo, hi in spans:
+            best = {}
+            for metadatas, distances in zip(results["metadatas"][lo:hi], results["distances"][lo:hi]):
+                for meta, dist in zip(metadatas, distances):
+                    resume_id = meta.get("id")
+                    if resume_id:
+                        best[resume_id] = max(best.get(resume_id, -1.0), 1 - dist)
+            ranked = sorted(best, key=best.get, reverse=True)[:self.top_k_initial]
+            shortlists.append(ranked)
+        return shortlists
+
+    def fetch_fields(self, resume_ids: list) -> dict:
+        """Stored field vectors + metadata for the shortlisted resumes (one get call)."""
+        if not resume_ids:
+            return {"ids": [], "embeddings": [], "metadatas": []}
+        return self.resumes.get(
+            where={"id": {"$in": list(resume_ids)}},
+            include=["embeddings", "metadatas"]
+        )
+
+    def score(self, chunk_vectors: np.ndarray, fields: dict, shortlist: list) -> list:
+        """Stage 2: chunk x field matrix, best field per chunk, mean over chunks."""
+        allowed = set(shortlist)
+        rows = [(m["id"], m, e) for m, e in zip(fields["metadatas"], fields["embeddings"]) if m.get("id") in allowed]
+        if not rows or len(chunk_vectors) == 0:
+            return []
+
+        # Group field columns by resume so reduceat can take the max per resume
+        rows.sort(key=lambda r: r[0])
+        resume_ids = [r[0] for r in rows]
+        field_matrix = _normalize_rows(np.asarray([r[2] for r in rows], dtype=np.float32))
+        sims = _normalize_rows(chunk_vectors) @ field_matrix.T  # (chunks, fields)
+
+        starts = [0] + [i for i in range(1, len(resume_ids)) if resume_ids[i] != resume_ids[i - 1]]
+        per_resume = np.maximum.reduceat(sims, starts, axis=1)  # (chunks, resumes)
+        scores = per_resume.mean(axis=0)
+        best_chunk = per_resume.argmax(axis=0)
+
+        # Keep the whole rerank budget when reranking, otherwise just the final list
+        limit = max(self.top_k_final, RERANK_TOP_N) if self.rerank else self.top_k_final
+        order = np.argsort(-scores)[:limit]
+        ranked = []
+        for rank, col in enumerate(order, 1):
+            meta = rows[starts[col]][1]
+            score = round(float(scores[col]), 4)
+            ranked.append({
+                "rank": rank,
+                "resume_id": resume_ids[starts[col]],
+                "category": meta.get("category", "Unknown"),
+                "seniority": meta.get("seniority", "mid"),
+                "score": score,
+                "best_chunk_index": int(best_chunk[col]),
+                "accepted": score >= self.min_score_accept,
+            })
+        return ranked
+
+    def match_batch(self, jds: list, timings: dict) -> list:
+        """Run both stages for a batch of JDs, accumulating per-stage seconds in timings."""
+        chunks, spans = [], []
+        for jd in jds:
+            jd_chunks = [str(c) for c in jd.get("structured_chunks", []) if c and str(c).strip()]
+            spans.append((len(chunks), len(chunks) + len(jd_chunks)))
+            chunks.extend(jd_chunks)
+        if not chunks:
+            return [[] for _ in jds]
+
+        t0 = time.perf_counter()
+        chunk_vectors = np.asarray(self.embed_fn(chunks), dtype=np.float32)
+        t1 = time.perf_counter()
+        shortlists = self.retrieve(chunk_vectors.tolist(), spans)
+        t2 = time.perf_counter()
+        fields = self.fetch_fields({rid for shortlist in shortlists for rid in shortlist})
+        t3 = time.perf_counter()
+        ranked = [
+            self.score(chunk_vectors[lo:hi], fields, shortlist) if hi > lo else []
+            for (lo, hi), shortlist in zip(spans, shortlists)
+        ]
+        t4 = time.perf_counter()
+        if self.rerank:
+            ranked = [self.rerank_matches(chunks[lo:hi], matches) for (lo, hi), matches in zip(spans, ranked)]
+        t5 = time.perf_counter()
+
+        for stage, seconds in zip(STAGES, [t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4]):
+            if stage != "rerank" or self.rerank:
+                timings[stage].append(seconds / len(jds))
+        return ranked
+
+    def rerank_matches(self, jd_chunks: list, matches: list) -> list:
+        """Cross-encoder rerank of one JD's stage-2 list, then the TOP_K_FINAL cut."""
+        if not matches:
+            return matches
+        reranked, _ = rerank_candidates(" ".join(jd_chunks), matches, self.resumes, field_type="work_experience")
+        reranked = reranked[:self.top_k_final]
+        for rank, match in enumerate(reranked, 1):
+            match["rank"] = rank
+        return reranked
+
+
+def run_matching(limit: int = None, batch_size: int = 16, input_file: Path = None, rerank: bool = False) -> dict:
+    """Match every (or the first `limit`) JD and write results + latency summary."""
+    jds = load_structured_jds(input_file)
+    if limit:
+        jds = jds[:limit]
+    print(f"Matching {len(jds)} job descriptions "
+          f"(TOP_K_INITIAL={TOP_K_INITIAL}, TOP_K_FINAL={TOP_K_FINAL}, MIN_SCORE_ACCEPT={MIN_SCORE_ACCEPT})")
+
+    engine = MatchEngine(rerank=rerank)
+    timings = {stage: [] for stage in STAGES}
+    output_file = RESULTS / "jd_matches.jsonl"
+    accepted_total = 0
+
+    start = time.perf_counter()
+    with open(output_file, "w", encoding="utf-8") as out:
+        for i in range(0, len(jds), batch_size):
+            batch = jds[i:i + batch_size]
+            for offset, (jd, ranked) in enumerate(zip(batch, engine.match_batch(batch, timings))):
+                accepted = sum(1 for r in ranked if r["accepted"])
+                accepted_total += accepted
+                out.write(json.dumps({
+                    "jd_index": i + offset,
+                    "position_title": jd.get("position_title", ""),
+                    "accepted": accepted,
+                    "matches": ranked,
+                }, ensure_ascii=False) + "\n")
+            print(f"  Processed {min(i + batch_size, len(jds))}/{len(jds)}...")
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "num_jds": len(jds),
+        "total_seconds": round(elapsed, 2),
+        "jds_per_second": round(len(jds) / elapsed, 2) if elapsed > 0 else 0.0,
+        "accepted_matches": accepted_total,
+        "config": {"top_k_initial": TOP_K_INITIAL, "top_k_final": TOP_K_FINAL, "min_score_accept": MIN_SCORE_ACCEPT,
+                   "rerank": rerank},
+        "stage_latency_ms_per_jd": {
+            stage: {
+                "p50": round(float(np.percentile(values, 50)) * 1000, 2),
+                "p95": round(float(np.percentile(values, 95)) * 1000, 2),
+                "mean": round(float(np.mean(values)) * 1000, 2),
+            }
+            for stage, values in timings.items() if values
+        },
+    }
+    with open(RESULTS / "jd_matches_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n✅ Matched {len(jds)} JDs in {elapsed:.1f}s ({accepted_total} accepted matches)")
+    for stage, stats in summary["stage_latency_ms_per_jd"].items():
+        print(f"   {stage:<13} p50={stats['p50']:.2f} ms  p95={stats['p95']:.2f} ms")
+    print(f"💾 Saved to: {output_file}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Two-stage JD -> resume matching")
+    parser.add_argument("--limit", type=int, default=None, help="Only match the first N JDs")
+    parser.add_argument("--batch-size", type=int, default=16, help="JDs per encode / ANN call")
+    parser.add_argument("--input", type=str, default=None, help="Structured JDs JSON (default: config)")
+    parser.add_argument("--rerank", action="store_true", help="Cross-encoder rerank before the final cut")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("JD -> Resume Matching")
+    print("=" * 70)
+    run_matching(args.limit, args.batch_size, Path(args.input) if args.input else None, args.rerank)
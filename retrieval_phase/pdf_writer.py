@@ -0,0 +1,79 @@
+"""
+Minimal text-only PDF writer for fixture / synthetic resumes.
+
+Writes plain Helvetica text, one line per input line, as many pages as
+needed. pdfplumber reads the result back line by line, which is all the
+extraction benchmarks need; no PDF library is required.
+"""
+
+from pathlib import Path
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792   # US Letter, points
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 13
+MAX_CHARS = 95                       # wrap width at FONT_SIZE on this page
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+
+def _escape(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(lines: list) -> list:
+    wrapped = []
+    for line in lines:
+        line = str(line)
+        while len(line) > MAX_CHARS:
+            cut = line.rfind(" ", 0, MAX_CHARS)
+            cut = cut if cut > 0 else MAX_CHARS
+            wrapped.append(line[:cut])
+            line = line[cut:].lstrip()
+        wrapped.append(line)
+    return wrapped
+
+
+def render_text_pdf(lines: list) -> bytes:
+    """PDF bytes showing the given lines of text."""
+    lines = _wrap(lines) or [""]
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, content) per page
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for n, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        kids.append(f"{page_id} 0 R")
+        body = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+        body += [f"({_escape(line)}) Tj T*" for line in page_lines]
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id])
+    xref = len(out)
+    count = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % count
+    for obj_id in range(1, count):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref)
+    return bytes(out)
+
+
+def write_text_pdf(path: Path, lines: list):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(render_text_pdf(lines))
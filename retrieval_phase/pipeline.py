@@ -0,0 +1,299 @@
+"""
+Pipeline orchestrator: runs the loose scripts as one stage DAG.
+
+    resumes:  extract_resumes -> clean_resumes -> embed_resumes -> title_index
+    jds:      extract_jds -> structure_jds -> embed_jds
+
+Each stage declares the artifacts it reads and writes (paths from config.py).
+A stage is skipped when the content hash of its inputs and of its own code
+matches the last successful run and its outputs still exist. Stages start as
+soon as their upstream stages finish, so the resume and JD branches run
+concurrently. A failed stage only blocks its own downstream.
+
+Source stages (no input artifacts) only run when their output is missing or with --force.
+extract_jds downloads from HuggingFace, and extract_resumes needs the PDFs
+under data/data. If a stage's inputs are absent but its outputs exist (e.g. a
+checkout that ships only the extracted JSON), the outputs are kept as they are.
+
+Hashes and run records are kept in results/pipeline_state.json.
+
+Usage:
+    python retrieval_phase/pipeline.py run
+    python retrieval_phase/pipeline.py run --only embed_resumes title_index --force
+    python retrieval_phase/pipeline.py status
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from config import (
+    ROOT, CHROMA, RESULTS, DATA_DIR, RESUMES, RESUMES_CLEANED, JDS_FULL, JDS_STRUCTURED,
+    BM25_INDEX, SKILL_INDEX, TITLE_NEIGHBOURS
+)
+
+for folder in ("extracting_pdfplumber", "extracting_JD", "query_structuring_resumes",
+               "query_structuring_JD", "embeddings"):
+    sys.path.insert(0, str(ROOT / folder))
+
+STATE_FILE = RESULTS / "pipeline_state.json"
+
+
+# === Stage actions (imports are local so `status` does not load the model) ===
+
+def _extract_resumes():
+    from run_extraction import extract_to_file
+    if not extract_to_file(DATA_DIR, RESUMES):
+        raise RuntimeError(f"no resumes extracted from {DATA_DIR}")
+
+
+def _clean_resumes():
+    from cleaning_resumes import clean_resumes
+    clean_resumes(RESUMES, RESUMES_CLEANED)
+
+
+def _embed_resumes():
+    from embed_resumes import embed_resumes
+    if embed_resumes(str(RESUMES_CLEANED), str(CHROMA), rebuild=True) is None:
+        raise RuntimeError("embedding resumes failed")
+
+
+def _build_title_index():
+    from build_clean_title_index import build_title_index
+    build_title_index()
+
+
+def _extract_jds():
+    from job_description_extraction import extract_job_descriptions
+    if not extract_job_descriptions(JDS_FULL):
+        raise RuntimeError("job description download failed")
+
+
+def _structure_jds():
+    from clean_and_structure_jds import process_job_descriptions
+    process_job_descriptions(JDS_FULL, JDS_STRUCTURED)
+
+
+def _embed_jds():
+    from embed_job_descriptions import embed_job_descriptions
+    if embed_job_descriptions(str(JDS_STRUCTURED), str(CHROMA), rebuild=True) is None:
+        raise RuntimeError("embedding job descriptions failed")
+
+
+def _collection_filled(name: str):
+    def check() -> bool:
+        try:
+            import chromadb
+            return chromadb.PersistentClient(path=str(CHROMA)).get_collection(name).count() > 0
+        except Exception:
+            return False
+    return check
+
+
+class Stage:
+    def __init__(self, name: str, branch: str, inputs: list, outputs: list, action, code: list,
+                 after: tuple = (), check=None):
+        self.name = name
+        self.branch = branch
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.action = action
+        self.code = [ROOT / c for c in code]     # source files whose changes invalidate the stage
+        self.after = list(after)                 # ordering-only dependencies
+        self.check = check                       # extra "outputs present" test (Chroma collections)
+
+    def outputs_present(self) -> bool:
+        return all(p.exists() for p in self.outputs) and (self.check is None or self.check())
+
+
+STAGES = [
+    Stage("extract_resumes", "resumes", [DATA_DIR], [RESUMES], _extract_resumes,
+          ["extracting_pdfplumber/run_extraction.py", "extracting_pdfplumber/extract_text.py",
+           "extracting_pdfplumber/resume_parser.py"]),
+    Stage("clean_resumes", "resumes", [RESUMES], [RESUMES_CLEANED], _clean_resumes,
+          ["query_structuring_resumes/cleaning_resumes.py"]),
+    Stage("embed_resumes", "resumes", [RESUMES_CLEANED], [BM25_INDEX, SKILL_INDEX], _embed_resumes,
+          ["embeddings/embed_resumes.py", "retrieval_phase/bm25_index.py", "retrieval_phase/skill_index.py"],
+          check=_collection_filled("resumes")),
+    Stage("title_index", "resumes", [RESUMES_CLEANED], [TITLE_NEIGHBOURS], _build_title_index,
+          ["retrieval_phase/build_clean_title_index.py"], after=["embed_resumes"]),
+    Stage("extract_jds", "jds", [], [JDS_FULL], _extract_jds,
+          ["extracting_JD/job_description_extraction.py"]),
+    Stage("structure_jds", "jds", [JDS_FULL], [JDS_STRUCTURED], _structure_jds,
+          ["query_structuring_JD/clean_and_structure_jds.py", "query_structuring_JD/match_resumes_to_jd.py"]),
+    Stage("embed_jds", "jds", [JDS_STRUCTURED], [], _embed_jds,
+          ["embeddings/embed_job_descriptions.py"], check=_collection_filled("job_descriptions")),
+]
+
+
+def stage_dependencies(stages: list) -> dict:
+    """Stage name -> names of the stages it waits for (artifact producers + `after`)."""
+    producers = {output: stage.name for stage in stages for output in stage.outputs}
+    return {
+        stage.name: sorted({producers[p] for p in stage.inputs if p in producers} | set(stage.after))
+        for stage in stages
+    }
+
+
+class PipelineState:
+    """Per-stage run records plus a (size, mtime) -> sha1 cache so big inputs are not rehashed."""
+
+    def __init__(self, path: Path = STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"stages": {}, "files": {}}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def file_hash(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path)
+        with self.lock:
+            cached = self.data["files"].get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self.lock:
+            self.data["files"][key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def artifact_hash(self, path: Path):
+        """Content hash of a file or directory tree; None if it does not exist."""
+        if not path.exists():
+            return None
+        if path.is_file():
+            return self.file_hash(path)
+        digest = hashlib.sha1()
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(str(child.relative_to(path)).encode("utf-8"))
+            digest.update(self.file_hash(child).encode("ascii"))
+        return digest.hexdigest()
+
+    def stage_key(self, stage: Stage):
+        """Hash over the stage's inputs and code; None if an input is missing."""
+        digest = hashlib.sha1(stage.name.encode("utf-8"))
+        for path in stage.inputs + stage.code:
+            value = self.artifact_hash(path)
+            if value is None:
+                return None
+            digest.update(f"{path.relative_to(ROOT)}={value}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def record(self, stage: Stage, key: str, seconds: float):
+        with self.lock:
+            self.data["stages"][stage.name] = {"key": key, "seconds": round(seconds, 2), "finished_at": time.time()}
+            self.save()
+
+    def save(self):
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def plan_stage(stage: Stage, state: PipelineState, force: bool = False) -> tuple:
+    """(decision, key): decision is 'run', 'up-to-date', 'keep' (inputs absent, outputs kept) or 'missing'."""
+    if not stage.inputs:
+        # Source stage: nothing to hash, re-run only when asked or when the output is gone
+        return ("run" if force or not stage.outputs_present() else "up-to-date"), "source"
+    key = state.stage_key(stage)
+    if key is None:
+        return ("keep" if stage.outputs_present() else "missing"), None
+    last = state.data["stages"].get(stage.name, {})
+    if not force and last.get("key") == key and stage.outputs_present():
+        return "up-to-date", key
+    return "run", key
+
+
+def run_pipeline(only: list = None, force: bool = False, max_workers: int = 2) -> dict:
+    """Run the DAG; returns stage name -> outcome."""
+    stages = {stage.name: stage for stage in STAGES}
+    deps = stage_dependencies(STAGES)
+    selected = set(only or stages)
+    unknown = selected - set(stages)
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    state = PipelineState()
+    outcome = {}
+    failed = {"failed", "blocked", "missing"}
+
+    def execute(stage: Stage) -> str:
+        decision, key = plan_stage(stage, state, force)
+        if decision != "run":
+            return decision
+        print(f"▶️  [{stage.branch}] {stage.name}", flush=True)
+        start = time.perf_counter()
+        stage.action()
+        missing = [str(p) for p in stage.outputs if not p.exists()]
+        if missing:
+            raise RuntimeError(f"outputs not written: {', '.join(missing)}")
+        seconds = time.perf_counter() - start
+        state.record(stage, key, seconds)
+        print(f"✅ [{stage.branch}] {stage.name} done in {seconds:.1f}s", flush=True)
+        return "ran"
+
+    pending = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+        while pending or running:
+            for name in list(pending):
+                if not all(dep in outcome for dep in deps[name]):
+                    continue
+                stage = pending.pop(name)
+                if any(outcome[dep] in failed for dep in deps[name]):
+                    outcome[name] = "blocked"
+                elif name not in selected:
+                    outcome[name] = "not selected"
+                else:
+                    running[pool.submit(execute, stage)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    outcome[name] = future.result()
+                except Exception as e:
+                    outcome[name] = "failed"
+                    print(f"❌ {name} failed: {e}", file=sys.stderr, flush=True)
+    state.save()
+    return outcome
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the extraction -> embedding pipeline as a stage DAG")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Run every stage whose inputs changed")
+    run.add_argument("--only", nargs="+", default=None, metavar="STAGE", help="Restrict to these stages")
+    run.add_argument("--force", action="store_true", help="Run selected stages even if up to date")
+    sub.add_parser("status", help="Show what `run` would do")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        state = PipelineState()
+        deps = stage_dependencies(STAGES)
+        for stage in STAGES:
+            decision, _ = plan_stage(stage, state)
+            after = f"  (after {', '.join(deps[stage.name])})" if deps[stage.name] else ""
+            print(f"{stage.branch:<8} {stage.name:<16} {decision:<11}{after}")
+        state.save()
+    else:
+        start = time.perf_counter()
+        outcome = run_pipeline(args.only, args.force)
+        print(f"\n{'=' * 50}")
+        for stage in STAGES:
+            print(f"{stage.branch:<8} {stage.name:<16} {outcome.get(stage.name, '-')}")
+        print(f"{'=' * 50}\nFinished in {time.perf_counter() - start:.1f}s")
+        if any(result in ("failed", "blocked", "missing") for result in outcome.values()):
+            raise SystemExit(1)
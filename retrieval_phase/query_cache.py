@@ -0,0 +1,173 @@
+"""
+Two-level cache for the retrieval path.
+
+1. query text -> query embedding      (independent of the collections)
+2. (query, filters, top_k, collection versions) -> result list
+
+Both levels are LRU with a TTL. Collection versions come from
+chroma_db/index_versions.json, which the embed / title-index / snapshot
+scripts bump whenever they modify a collection, so cached results go stale
+automatically instead of needing a manual flush.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    CHROMA, QUERY_CACHE_ENABLED, EMBEDDING_CACHE_SIZE, RESULT_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS
+)
+import tracing
+
+INDEX_VERSIONS = CHROMA / "index_versions.json"
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and time-to-live."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value, or None on a miss / expired entry."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+embedding_cache = LRUCache(EMBEDDING_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+result_cache = LRUCache(RESULT_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+
+
+# === Collection versions ===
+_versions = {}
+_versions_mtime = None
+_bump_lock = threading.Lock()
+
+
+def bump_index_version(*collection_names: str, path=INDEX_VERSIONS):
+    """Record that the given collections changed (call after any add/upsert/delete)."""
+    # The lock keeps concurrent stage threads from losing each other's bumps; the
+    # pid + thread id temp name keeps them (and other processes) off one temp file
+    with _bump_lock:
+        versions = {}
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    versions = json.load(f)
+            except (OSError, ValueError):
+                versions = {}
+
+        for name in collection_names:
+            versions[name] = versions.get(name, 0) + 1
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(versions, f)
+        os.replace(tmp, path)
+
+
+def get_index_versions(path=INDEX_VERSIONS) -> dict:
+    """Current collection versions (re-read only when the file changes)."""
+    global _versions, _versions_mtime
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    if mtime != _versions_mtime:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _versions = json.load(f)
+            _versions_mtime = mtime
+        except (OSError, ValueError):
+            return {}
+    return _versions
+
+
+def result_key(kind: str, query: str, collections: tuple, **params) -> tuple:
+    """Result-cache key: query, parameters and the versions of the collections it reads."""
+    versions = get_index_versions()
+    return (
+        kind,
+        " ".join(query.lower().split()),
+        tuple(sorted(params.items())),
+        tuple(versions.get(name, 0) for name in collections),
+    )
+
+
+def get_result(key):
+    return result_cache.get(key) if QUERY_CACHE_ENABLED else None
+
+
+def put_result(key, value):
+    if QUERY_CACHE_ENABLED:
+        result_cache.put(key, value)
+
+
+def cached_embed(texts: list, embed_fn) -> list:
+    """Embed texts, encoding only the cache misses (in a single forward pass)."""
+    if not QUERY_CACHE_ENABLED:
+        with tracing.span("query_embedding"):
+            return list(embed_fn(texts))
+
+    vectors = [embedding_cache.get(text) for text in texts]
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        # De-duplicate within the batch as well
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        with tracing.span("query_embedding"):
+            encoded = dict(zip(unique, embed_fn(unique)))
+        for text, vector in encoded.items():
+            embedding_cache.put(text, vector)
+        for i in missing:
+            vectors[i] = encoded[texts[i]]
+    return vectors
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for both cache levels."""
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "result_cache": result_cache.stats(),
+    }
@@ -1,9 +1,29 @@
 # retrieval_phase/get_related_titles.py
 # Returns ONLY clean, professional job titles filtered by seniority level
 
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions
+import numpy as np
+
+from config import (
+    TITLE_NEIGHBOURS, EXPANSION_MODE, RERANK_ENABLED, HYBRID_SEARCH_ENABLED, HYBRID_BM25_WEIGHT, SHARDED_SEARCH
+)
+from build_clean_title_index import normalize_title_key
+from title_trie import TitleTrie
+from query_cache import cached_embed, result_key, get_result, put_result, cache_stats
+from fusion import reciprocal_rank_fusion
+from rerank import rerank_candidates
+from bm25_index import get_bm25_index
+from skill_index import get_skill_index, parse_skill_list
+from shards import get_shard_router
+from embedding_client import get_embedding_function
+import tracing
 
 # === Paths ===
 ROOT = Path(__file__).parent.parent
@@ -11,19 +31,91 @@ CHROMA_PATH = ROOT / "chroma_db"
 
 # === Chroma Setup ===
 client = chromadb.PersistentClient(path=str(CHROMA_PATH))
-embed_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+embed_fn = get_embedding_function()
 
 try:
     title_collection = client.get_collection("job_titles_index")
     resumes_collection = client.get_collection("resumes")
-    print("✅ Collections loaded.\n")
+    # stderr keeps stdout clean for the JSONL batch mode
+    print("✅ Collections loaded.\n", file=sys.stderr)
 except Exception as e:
-    print(f"❌ ERROR: Collections not found! {e}")
-    print("Run: python retrieval_phase/build_clean_title_index.py")
-    print("And: python embeddings/embed_resumes.py")
+    print(f"❌ ERROR: Collections not found! {e}", file=sys.stderr)
+    print("Run: python retrieval_phase/build_clean_title_index.py", file=sys.stderr)
+    print("And: python embeddings/embed_resumes.py", file=sys.stderr)
     exit()
 
+if (title_collection.metadata or {}).get("hnsw:space", "l2") != "cosine":
+    # Title similarity below is 1 - distance, which only holds in cosine space
+    print("⚠️  job_titles_index is not a cosine index (created before the cosine switch); "
+          "rebuild it: python retrieval_phase/build_clean_title_index.py", file=sys.stderr)
+
+# BM25 searches run here, in parallel with the Chroma query
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+
+# Precomputed neighbour graph, reloaded when build_clean_title_index.py rewrites it
+_neighbour_graph = None
+_neighbour_graph_mtime = None
+
+
+def load_title_neighbours():
+    """Return the title neighbour graph, or None if it has not been built."""
+    global _neighbour_graph, _neighbour_graph_mtime
+    try:
+        mtime = TITLE_NEIGHBOURS.stat().st_mtime
+    except OSError:
+        _neighbour_graph, _neighbour_graph_mtime = None, None
+        return None
+
+    if mtime != _neighbour_graph_mtime:
+        with open(TITLE_NEIGHBOURS, "r", encoding="utf-8") as f:
+            _neighbour_graph = json.load(f)
+        _neighbour_graph_mtime = mtime
+    return _neighbour_graph
+
+
+# Typo-tolerant autocomplete over the canonical titles, rebuilt with the graph
+_title_trie = None
+_title_trie_source = None
+
+
+def get_title_trie() -> TitleTrie:
+    """Return the in-memory title trie (from the neighbour graph, else the title collection)."""
+    global _title_trie, _title_trie_source
+    graph = load_title_neighbours()
+    if graph is not None:
+        if _title_trie_source is not graph:
+            entries = list(graph["titles"].values())
+            _title_trie = TitleTrie.from_titles(
+                [e["title"] for e in entries],
+                [{"category": e.get("category", ""), "seniority": e.get("seniority", "mid")} for e in entries]
+            )
+            _title_trie_source = graph
+        return _title_trie
+
+    if _title_trie is None:
+        data = title_collection.get(include=["documents", "metadatas"])
+        _title_trie = TitleTrie.from_titles(data["documents"], data["metadatas"])
+        _title_trie_source = None
+    return _title_trie
+
+
+def suggest_titles(prefix: str, limit: int = 10) -> list:
+    """Autocomplete suggestions for a partial or misspelled title (no model call)."""
+    return get_title_trie().autocomplete(prefix, limit=limit)
 
+
+def resolve_title(query: str):
+    """Map an exact or near-exact query to its canonical title, or None if unsure."""
+    return get_title_trie().match(query)
+
+
+def _is_clean_title(title: str) -> bool:
+    """Skip sentence-like titles."""
+    return len(title.split()) <= 8 and not any(word in title.lower() for word in
+        ["years", "experience", "domain", "skilled at", "focused on"])
+
+
+@tracing.traced("expand")
 def expand_query_with_similar_titles(query: str, similarity_threshold: float = 0.65, max_similar: int = 10) -> list:
     """
     Automatically find semantically similar job titles using embeddings.
@@ -37,32 +129,249 @@ def expand_query_with_similar_titles(query: str, similarity_threshold: float = 0
     Returns:
         List of similar job titles including the original query
     """
-    # Query the title collection to find similar titles
-    results = title_collection.query(
-        query_texts=[query],
-        n_results=max_similar * 2,  # Get more to filter
-        include=["documents", "distances"]
-    )
-    
-    similar_titles = [query]  # Always include original query
-    titles = results["documents"][0]
-    distances = results["distances"][0]
+    with tracing.span("expand.graph"):
+        similar_titles = _expand_from_graph(query, similarity_threshold, max_similar)
+    if similar_titles is not None:
+        return similar_titles
+
+    # Unseen query: embed it and search the title collection
+    vectors = cached_embed([query], embed_fn)
+    with tracing.span("expand.title_query"):
+        results = title_collection.query(
+            query_embeddings=vectors,
+            n_results=max_similar * 2,  # Get more to filter
+            include=["documents", "distances"]
+        )
+    similar_titles = _expand_from_results(query, results["documents"][0], results["distances"][0],
+                                          similarity_threshold, max_similar)
+    tracing.record_fetch("expand", len(results["documents"][0]), len(similar_titles))
+    return similar_titles
+
+
+def _graph_neighbours(query: str, similarity_threshold: float, max_similar: int):
+    """
+    Fast path: known (or near-exact, via the trie) titles are a dictionary
+    lookup in the precomputed graph. Returns (entry, [(title, id, similarity), ...])
+    or None for unseen queries.
+    """
+    graph = load_title_neighbours()
+    if not graph or similarity_threshold < graph["threshold"]:
+        return None
+
+    canonical = resolve_title(query) or query
+    entry = graph["titles"].get(normalize_title_key(canonical))
+    if entry is None:
+        return None
+
+    taken = {query, entry["title"]}
+    neighbours = []
+    for title, title_id, similarity in entry["neighbours"][:max_similar * 2]:
+        if similarity >= similarity_threshold and title not in taken and _is_clean_title(title):
+            neighbours.append((title, title_id, similarity))
+            taken.add(title)
+        if len(neighbours) >= max_similar:
+            break
+    return entry, neighbours
+
+
+def _titles_from_graph(query: str, entry: dict, neighbours: list, max_similar: int) -> list:
+    """Expanded title list (query, canonical title if different, neighbours)."""
+    similar_titles = [query]
+    if normalize_title_key(entry["title"]) != normalize_title_key(query):
+        similar_titles.append(entry["title"])
+    for title, _, _ in neighbours:
+        if len(similar_titles) >= max_similar + 1:
+            break
+        similar_titles.append(title)
+    return similar_titles
+
+
+def _expand_from_graph(query: str, similarity_threshold: float, max_similar: int):
+    """Expanded title list from the neighbour graph, or None for unseen queries."""
+    found = _graph_neighbours(query, similarity_threshold, max_similar)
+    if found is None:
+        return None
+    entry, neighbours = found
+    return _titles_from_graph(query, entry, neighbours, max_similar)
+
+
+def _select_from_results(query: str, titles: list, distances: list,
+                         similarity_threshold: float, max_similar: int) -> list:
+    """Indices of the title-collection hits kept for expansion."""
+    selected = []
+    taken = {query}
     
     # Add titles that are similar enough
-    for title, dist in zip(titles, distances):
+    for idx, (title, dist) in enumerate(zip(titles, distances)):
         similarity = 1 - dist
-        if similarity >= similarity_threshold and title not in similar_titles:
+        if similarity >= similarity_threshold and title not in taken:
             # Skip sentence-like titles
-            if len(title.split()) <= 8 and not any(word in title.lower() for word in 
-                ["years", "experience", "domain", "skilled at", "focused on"]):
-                similar_titles.append(title)
+            if _is_clean_title(title):
+                selected.append(idx)
+                taken.add(title)
         
-        if len(similar_titles) >= max_similar + 1:  # +1 for original query
+        if len(selected) >= max_similar:
             break
     
-    return similar_titles
+    return selected
+
+
+def _expand_from_results(query: str, titles: list, distances: list,
+                         similarity_threshold: float, max_similar: int) -> list:
+    """Turn one title-collection query result into the expanded title list."""
+    selected = _select_from_results(query, titles, distances, similarity_threshold, max_similar)
+    return [query] + [titles[i] for i in selected]  # Always include original query
+
+
+def _weighted_centroid(query_vector, neighbour_vectors: list, similarities: list) -> list:
+    """Similarity-weighted centroid of the query vector (weight 1) and its neighbours."""
+    vectors = np.asarray([query_vector] + list(neighbour_vectors), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    weights = np.asarray([1.0] + list(similarities), dtype=np.float32)
+    centroid = weights @ vectors
+    return (centroid / max(float(np.linalg.norm(centroid)), 1e-12)).tolist()
+
+
+def _expansion_title_vectors(queries: list, similarity_threshold: float, max_similar: int) -> list:
+    """
+    For each query: (expanded_titles, query_vector, neighbour_vectors, similarities),
+    using the title vectors already stored in job_titles_index.
+
+    Known titles need no model call at all (their own stored vector is the query
+    vector); unseen queries are encoded once, in one batch, and their
+    neighbours' vectors come back from the same title query.
+    """
+    out = [None] * len(queries)
+    unseen = []
+
+    known = {}
+    for i, query in enumerate(queries):
+        found = _graph_neighbours(query, similarity_threshold, max_similar)
+        if found is None:
+            unseen.append(i)
+        else:
+            known[i] = found
 
+    if known:
+        wanted = set()
+        for entry, neighbours in known.values():
+            wanted.add(entry["id"])
+            wanted.update(title_id for _, title_id, _ in neighbours)
+        stored = title_collection.get(ids=list(wanted), include=["embeddings"])
+        by_id = dict(zip(stored["ids"], stored["embeddings"]))
 
+        for i, (entry, neighbours) in known.items():
+            query_vector = by_id.get(entry["id"])
+            if query_vector is None:
+                unseen.append(i)  # graph is older than the collection
+                continue
+            kept = [(title_id, sim) for _, title_id, sim in neighbours if title_id in by_id]
+            out[i] = (
+                _titles_from_graph(queries[i], entry, neighbours, max_similar),
+                query_vector,
+                [by_id[t] for t, _ in kept],
+                [sim for _, sim in kept],
+            )
+
+    if unseen:
+        query_vectors = cached_embed([queries[i] for i in unseen], embed_fn)
+        results = title_collection.query(
+            query_embeddings=query_vectors,
+            n_results=max_similar * 2,
+            include=["documents", "distances", "embeddings"]
+        )
+        for j, i in enumerate(unseen):
+            titles = results["documents"][j]
+            distances = results["distances"][j]
+            embeddings = results["embeddings"][j]
+            selected = _select_from_results(queries[i], titles, distances, similarity_threshold, max_similar)
+            out[i] = (
+                [queries[i]] + [titles[k] for k in selected],
+                query_vectors[j],
+                [embeddings[k] for k in selected],
+                [1 - distances[k] for k in selected],
+            )
+
+    return out
+
+
+def expand_query_vectors(queries: list, similarity_threshold: float = 0.65, max_similar: int = 10):
+    """
+    Model-free expansion ("centroid" mode): each expanded query vector is the
+    similarity-weighted centroid of the query vector and its neighbours'
+    stored title vectors.
+
+    Returns (expanded_titles_per_query, vector_per_query).
+    """
+    expanded = _expansion_title_vectors(queries, similarity_threshold, max_similar)
+    titles = [e[0] for e in expanded]
+    vectors = [_weighted_centroid(e[1], e[2], e[3]) for e in expanded]
+    return titles, vectors
+
+
+def expand_query_multi_vectors(queries: list, similarity_threshold: float = 0.65, max_similar: int = 10):
+    """
+    Multi-vector expansion ("rrf" mode): keep the query vector and every
+    neighbour's stored title vector separately, with fusion weights
+    (1 for the query, similarity for neighbours).
+
+    Returns (expanded_titles_per_query, vectors_per_query, weights_per_query).
+    """
+    expanded = _expansion_title_vectors(queries, similarity_threshold, max_similar)
+    titles = [e[0] for e in expanded]
+    vectors = [[e[1]] + list(e[2]) for e in expanded]
+    weights = [[1.0] + list(e[3]) for e in expanded]
+    return titles, vectors, weights
+
+
+def _rrf_list_size(top_k: int, num_vectors: int, total_n_results: int = None) -> int:
+    """Per-vector n_results so the fused search fetches no more than concat (top_k * 2) in total."""
+    total = total_n_results or top_k * 2
+    return max(1, -(-total // max(1, num_vectors)))
+
+
+def _fuse_multi_vector_results(metadatas_lists: list, distances_lists: list, weights: list, top_k: int) -> list:
+    """RRF over per-vector resume hits, de-duplicated by resume ID inside the fusion."""
+    ranked_lists = []
+    for metadatas, distances in zip(metadatas_lists, distances_lists):
+        ranked_lists.append([
+            {
+                "resume_id": meta.get("id"),
+                "category": meta.get("category", "Unknown"),
+                "field_type": meta.get("field_type", "N/A"),
+                "seniority": meta.get("seniority", "mid"),
+                "years_experience": meta.get("years_experience", -1),
+                "similarity": round(1 - dist, 4),
+            }
+            for meta, dist in zip(metadatas, distances)
+        ])
+    return reciprocal_rank_fusion(ranked_lists, key=lambda c: c["resume_id"], weights=weights, top_n=top_k)
+
+
+def _expanded_vectors(queries: list, expansion_mode: str, similarity_threshold: float, max_similar: int):
+    """Expanded titles and search vectors for a batch of queries, in the given mode."""
+    if expansion_mode == "centroid":
+        return expand_query_vectors(queries, similarity_threshold, max_similar)
+
+    # "concat": join the expanded titles into one string and embed it
+    expansions = [_expand_from_graph(q, similarity_threshold, max_similar) for q in queries]
+    unseen = [i for i, titles in enumerate(expansions) if titles is None]
+    if unseen:
+        unseen_vectors = cached_embed([queries[i] for i in unseen], embed_fn)
+        title_results = title_collection.query(
+            query_embeddings=unseen_vectors,
+            n_results=max_similar * 2,
+            include=["documents", "distances"]
+        )
+        for j, i in enumerate(unseen):
+            expansions[i] = _expand_from_results(
+                queries[i], title_results["documents"][j], title_results["distances"][j],
+                similarity_threshold, max_similar
+            )
+    return expansions, cached_embed([" ".join(titles) for titles in expansions], embed_fn)
+
+
+@tracing.traced("related_titles")
 def get_related_titles(query: str, seniority: str = None, top_k: int = 10, auto_expand: bool = True):
     """
     Get related job titles filtered by seniority level.
@@ -78,6 +387,38 @@ def get_related_titles(query: str, seniority: str = None, top_k: int = 10, auto_
     if seniority:
         print(f"📊 Seniority filter: {seniority}")
     
+    with tracing.span("related_titles.cache_lookup"):
+        cache_key = result_key("related_titles", query, ("job_titles_index",),
+                               seniority=seniority, top_k=top_k, auto_expand=auto_expand)
+        filtered_results = get_result(cache_key)
+    if filtered_results is not None:
+        print("⚡ Served from cache\n")
+    else:
+        filtered_results = _compute_related_titles(query, seniority, top_k, auto_expand)
+        put_result(cache_key, filtered_results)
+    filtered_results = [dict(r) for r in filtered_results]
+
+    # Display results
+    print(f"📋 Top {len(filtered_results)} Professional Job Titles:\n")
+    print("-" * 80)
+    
+    for i, result in enumerate(filtered_results, 1):
+        seniority_label = result["seniority"].upper()
+        print(f"{i:2}. {result['title']:<50} | {seniority_label:<6} | Score: {result['score']:.4f}")
+    
+    print("-" * 80)
+    
+    if not filtered_results:
+        print("⚠️  No matching titles found. Try:")
+        print("   - Different seniority level")
+        print("   - Broader search term")
+        print("   - Rebuild index: python retrieval_phase/build_clean_title_index.py")
+    
+    return filtered_results
+
+
+def _compute_related_titles(query: str, seniority: str, top_k: int, auto_expand: bool) -> list:
+    """Expansion + title search behind get_related_titles (uncached)."""
     # AUTOMATIC EXPANSION: Find similar titles using semantic similarity
     if auto_expand:
         similar_titles = expand_query_with_similar_titles(query, similarity_threshold=0.65, max_similar=8)
@@ -99,63 +440,152 @@ def get_related_titles(query: str, seniority: str = None, top_k: int = 10, auto_
     
     print()
 
-    # Query with more results to filter by seniority
-    query_size = top_k * 3 if seniority else top_k
-    
-    results = title_collection.query(
-        query_texts=[expanded_query],
-        n_results=query_size,
-        include=["documents", "metadatas", "distances"]
-    )
+    # Seniority is filtered inside Chroma; the 2x over-fetch only covers the
+    # sentence-like titles dropped below, which Chroma cannot filter
+    vectors = cached_embed([expanded_query], embed_fn)
+    with tracing.span("related_titles.title_query"):
+        results = title_collection.query(
+            query_embeddings=vectors,
+            n_results=top_k * 2,
+            where={"seniority": seniority} if seniority else None,
+            include=["documents", "metadatas", "distances"]
+        )
 
     titles = results["documents"][0]
     metadatas = results["metadatas"][0]
     distances = results["distances"][0]
 
-    # Filter by seniority if specified
-    filtered_results = []
-    for title, meta, dist in zip(titles, metadatas, distances):
-        if seniority:
-            if meta.get("seniority", "mid") != seniority:
+    with tracing.span("related_titles.filter"):
+        filtered_results = []
+        for title, meta, dist in zip(titles, metadatas, distances):
+            # Additional validation: skip titles that look like sentences
+            if len(title.split()) > 8:
+                continue
+            if any(word in title.lower() for word in ["years", "experience", "domain", "skilled at", "focused on"]):
                 continue
-        
-        # Additional validation: skip titles that look like sentences
-        if len(title.split()) > 8:
-            continue
-        if any(word in title.lower() for word in ["years", "experience", "domain", "skilled at", "focused on"]):
-            continue
-        
-        score = round(1 - dist, 4)
-        filtered_results.append({
-            "title": title,
-            "seniority": meta.get("seniority", "mid"),
-            "category": meta.get("category", ""),
-            "score": score
-        })
-        
-        if len(filtered_results) >= top_k:
-            break
 
-    # Display results
-    print(f"📋 Top {len(filtered_results)} Professional Job Titles:\n")
-    print("-" * 80)
-    
-    for i, result in enumerate(filtered_results, 1):
-        seniority_label = result["seniority"].upper()
-        print(f"{i:2}. {result['title']:<50} | {seniority_label:<6} | Score: {result['score']:.4f}")
-    
-    print("-" * 80)
-    
-    if not filtered_results:
-        print("⚠️  No matching titles found. Try:")
-        print("   - Different seniority level")
-        print("   - Broader search term")
-        print("   - Rebuild index: python retrieval_phase/build_clean_title_index.py")
-    
+            score = round(1 - dist, 4)
+            filtered_results.append({
+                "title": title,
+                "seniority": meta.get("seniority", "mid"),
+                "category": meta.get("category", ""),
+                "score": score
+            })
+
+            if len(filtered_results) >= top_k:
+                break
+    tracing.record_fetch("related_titles", len(titles), len(filtered_results))
+
     return filtered_results
 
 
-def search_resumes_with_auto_expansion(query: str, seniority: str = None, top_k: int = 80):
+def expansion_categories(titles: list) -> list:
+    """Resume categories of the expanded titles, from the neighbour graph (empty if unknown)."""
+    graph = load_title_neighbours()
+    if not graph:
+        return []
+    categories = []
+    for title in titles:
+        entry = graph["titles"].get(normalize_title_key(title))
+        if entry and entry.get("category") and entry["category"] not in categories:
+            categories.append(entry["category"])
+    return categories
+
+
+def _resume_search_target(sharded: bool, categories: list = None, titles: list = None):
+    """
+    Where resume queries go: the resumes collection, or (sharded search with
+    shards built) a view over the shards of the given categories, else of the
+    categories inferred from the expanded titles.
+    """
+    router = get_shard_router() if sharded else None
+    if router is None:
+        return resumes_collection
+    return router.view(categories or expansion_categories(titles or []))
+
+
+def resolve_skill_filter(must_have=None, exclude_skills=None):
+    """
+    Resume IDs allowed by the skill bitmap index (see skill_index.py), or None
+    when no skill filter is requested / no index has been built.
+    """
+    if not must_have and not exclude_skills:
+        return None
+    index = get_skill_index()
+    if index is None:
+        print("⚠️  No skill index; ignoring skill filters (run retrieval_phase/skill_index.py build)", file=sys.stderr)
+        return None
+    return index.resolve(must_have or (), exclude_skills or ())
+
+
+def build_resume_filter(seniority: str = None, min_years: int = None, max_years: int = None,
+                        resume_ids: list = None):
+    """
+    Chroma `where` clause over the resume metadata written by embed_resumes.py
+    (seniority, years_experience, and an ID set from the skill filter). Returns
+    None when no filter is requested.
+    """
+    conditions = []
+    if resume_ids is not None:
+        conditions.append({"id": {"$in": list(resume_ids)}})
+    if seniority:
+        conditions.append({"seniority": seniority})
+    if min_years is not None:
+        conditions.append({"years_experience": {"$gte": min_years}})
+    if max_years is not None:
+        # -1 means "unknown", so keep those out of an upper-bound filter too
+        conditions.append({"years_experience": {"$lte": max_years}})
+        conditions.append({"years_experience": {"$gte": 0}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def _start_lexical_search(query: str, seniority: str, top_k: int, min_years: int, max_years: int,
+                          resume_ids: list = None):
+    """Submit the BM25 search to the side pool (None when no BM25 index has been built)."""
+    index = get_bm25_index()
+    if index is None:
+        return None
+    return _lexical_pool.submit(index.search, query, top_k, seniority, min_years, max_years, resume_ids)
+
+
+def _fuse_hybrid(dense: list, lexical: list, top_k: int) -> list:
+    """
+    Reciprocal rank fusion of the dense and BM25 candidate lists.
+    Dense payloads are kept where both found a resume; rrf_score holds the fused
+    score and bm25_score is added for lexical hits. Hits only BM25 found keep
+    the candidate shape with similarity None.
+    """
+    if not lexical:
+        return dense
+    fused = reciprocal_rank_fusion(
+        [dense, lexical], key=lambda c: c["resume_id"], weights=[1.0, HYBRID_BM25_WEIGHT], top_n=top_k
+    )
+    dense_by_id = {c["resume_id"]: c for c in dense}
+    bm25_scores = {c["resume_id"]: c["bm25_score"] for c in lexical}
+
+    candidates = []
+    for item in fused:
+        candidate = dict(dense_by_id.get(item["resume_id"], item))
+        candidate.setdefault("similarity", None)
+        candidate["rrf_score"] = item["rrf_score"]
+        if item["resume_id"] in bm25_scores:
+            candidate["bm25_score"] = bm25_scores[item["resume_id"]]
+        candidates.append(candidate)
+    return candidates
+
+
+@tracing.traced("search")
+def search_resumes_with_auto_expansion(query: str, seniority: str = None, top_k: int = 80,
+                                       min_years: int = None, max_years: int = None,
+                                       expansion_mode: str = None, rerank: bool = None,
+                                       hybrid: bool = None, must_have: list = None,
+                                       exclude_skills: list = None, sharded: bool = None,
+                                       categories: list = None):
     """
     Search resumes using automatic title expansion.
     When you search for "AI Engineer", it automatically finds similar titles
@@ -165,17 +595,76 @@ def search_resumes_with_auto_expansion(query: str, seniority: str = None, top_k:
         query: Job title (e.g., "AI Engineer")
         seniority: "senior", "junior", "mid", "intern", or None
         top_k: Number of candidates to return
+        min_years: Minimum estimated years of experience, or None
+        max_years: Maximum estimated years of experience, or None
+        expansion_mode: "concat" (embed the joined titles), "centroid" (weighted
+            centroid of stored title vectors, no second model call) or "rrf"
+            (search every expansion vector in one batched query and fuse the
+            lists with reciprocal rank fusion); defaults to config.EXPANSION_MODE
+        rerank: Rescore the top config.RERANK_TOP_N with the cross-encoder
+            (see rerank.py); defaults to config.RERANK_ENABLED
+        hybrid: Fuse in BM25 hits for the raw query (see bm25_index.py);
+            defaults to config.HYBRID_SEARCH_ENABLED, ignored if no index is built
+        must_have: Skills every candidate must list (e.g. ["SQL", "Tableau"])
+        exclude_skills: Skills no candidate may list
+        sharded: Query the category shards (see shards.py) instead of the whole
+            collection; defaults to config.SHARDED_SEARCH, ignored if not built
+        categories: Shards to search; inferred from the expanded titles if None
     
     Returns:
         List of candidate dictionaries with resume_id, category, field_type, similarity
+        (plus rrf_score in "rrf" / hybrid mode, bm25_score for lexical hits,
+        rerank_score for reranked candidates; similarity is None for hits only
+        BM25 found)
     """
+    expansion_mode = expansion_mode or EXPANSION_MODE
+    rerank = RERANK_ENABLED if rerank is None else rerank
+    hybrid = HYBRID_SEARCH_ENABLED if hybrid is None else hybrid
+    sharded = SHARDED_SEARCH if sharded is None else sharded
     print(f"🔍 Searching resumes for: {query}")
     if seniority:
         print(f"📊 Seniority filter: {seniority}")
+    if min_years is not None or max_years is not None:
+        print(f"📅 Experience filter: {min_years if min_years is not None else 0}-"
+              f"{max_years if max_years is not None else 'any'} years")
+    if must_have or exclude_skills:
+        print(f"🧩 Skill filter: must have {must_have or '-'}, excluding {exclude_skills or '-'}")
     print()
+
+    with tracing.span("search.cache_lookup"):
+        cache_key = result_key("resumes", query, ("job_titles_index", "resumes", "resumes_shards"),
+                               seniority=seniority, top_k=top_k, min_years=min_years, max_years=max_years,
+                               expansion_mode=expansion_mode, rerank=rerank, hybrid=hybrid,
+                               must_have=tuple(sorted(must_have or ())),
+                               exclude_skills=tuple(sorted(exclude_skills or ())),
+                               sharded=sharded, categories=tuple(sorted(categories or ())))
+        cached = get_result(cache_key)
+    if cached is not None:
+        print(f"⚡ Served {len(cached)} candidates from cache")
+        return [dict(c) for c in cached]
+
+    # Hard skill requirements become an ID set before any vector work
+    with tracing.span("search.skill_filter"):
+        allowed_ids = resolve_skill_filter(must_have, exclude_skills)
+    if allowed_ids is not None:
+        print(f"🧩 {len(allowed_ids)} resumes meet the skill requirements")
+        if not allowed_ids:
+            return []
+
+    # Lexical search runs on the side while we expand and query Chroma
+    lexical = (_start_lexical_search(query, seniority, top_k, min_years, max_years, allowed_ids)
+               if hybrid else None)
     
-    # Step 1: Auto-expand query to find similar titles
-    similar_titles = expand_query_with_similar_titles(query, similarity_threshold=0.65, max_similar=10)
+    # Step 1: Auto-expand query to find similar titles (and build the search vector)
+    with tracing.span("search.expand", mode=expansion_mode):
+        if expansion_mode == "rrf":
+            expansions, vector_lists, weight_lists = expand_query_multi_vectors(
+                [query], similarity_threshold=0.65, max_similar=10
+            )
+        else:
+            expansions, vectors = _expanded_vectors([query], expansion_mode, similarity_threshold=0.65,
+                                                    max_similar=10)
+    similar_titles = expansions[0]
     
     if len(similar_titles) > 1:
         print(f"🧠 Auto-expanded query to {len(similar_titles)} similar titles:")
@@ -186,34 +675,78 @@ def search_resumes_with_auto_expansion(query: str, seniority: str = None, top_k:
             print(f"   ... and {len(similar_titles) - 8} more")
         print()
     
-    # Step 2: Combine all similar titles into one search query
-    expanded_query = " ".join(similar_titles)
-    
-    # Step 3: Search resumes collection with expanded query
-    print(f"🔎 Searching resumes collection...")
-    results = resumes_collection.query(
-        query_texts=[expanded_query],
-        n_results=top_k * 2,  # Get more to filter by seniority if needed
-        include=["metadatas", "distances"]
-    )
+    # Step 2: Search resumes collection (or its relevant shards) with the expanded query vector(s)
+    target = _resume_search_target(sharded, categories, similar_titles)
+    if target is resumes_collection:
+        print(f"🔎 Searching resumes collection...")
+    else:
+        print(f"🔎 Searching {len(target.categories)} shard(s): {', '.join(target.categories[:6])}"
+              f"{' ...' if len(target.categories) > 6 else ''}")
+    where = build_resume_filter(seniority, min_years, max_years, allowed_ids)
+    if expansion_mode == "rrf":
+        # One batched query for all expansion vectors, same total n_results as concat
+        vectors = vector_lists[0]
+        with tracing.span("search.resume_query", vectors=len(vectors)):
+            results = target.query(
+                query_embeddings=vectors,
+                n_results=_rrf_list_size(top_k, len(vectors)),
+                where=where,
+                include=["metadatas", "distances"]
+            )
+        with tracing.span("search.collect"):
+            candidates = _fuse_multi_vector_results(results["metadatas"], results["distances"], weight_lists[0],
+                                                    top_k)
+    else:
+        # Filters run inside Chroma; the 2x only covers several fields of one resume
+        # matching (they are de-duplicated by resume ID below)
+        with tracing.span("search.resume_query", vectors=1):
+            results = target.query(
+                query_embeddings=[vectors[0]],
+                n_results=top_k * 2,
+                where=where,
+                include=["metadatas", "distances"]
+            )
+        
+        # Step 3: Process results
+        with tracing.span("search.collect"):
+            candidates = _collect_candidates(results["metadatas"][0], results["distances"][0], top_k)
+    tracing.record_fetch("search", sum(len(hits) for hits in results["metadatas"]), len(candidates))
+
+    if lexical is not None:
+        with tracing.span("search.lexical"):
+            lexical_hits = lexical.result()
+            candidates = _fuse_hybrid(candidates, lexical_hits, top_k)
+        print(f"🔤 Hybrid search: fused {len(lexical_hits)} BM25 hits")
+
+    if rerank and candidates:
+        with tracing.span("search.rerank"):
+            candidates, stats = rerank_candidates(query, candidates, resumes_collection)
+        print(f"🎯 Reranked top {stats['candidates']} with cross-encoder: {stats['latency_ms']:.0f} ms "
+              f"({stats['cached']} cached, {stats['scored']} scored, {stats['unscored']} over budget)")
+    put_result(cache_key, candidates)
     
-    # Step 4: Process results
+    print(f"✅ Found {len(candidates)} unique candidates")
+    return [dict(c) for c in candidates]
+
+
+def _collect_candidates(metadatas: list, distances: list, top_k: int) -> list:
+    """De-duplicate resume field hits by resume ID, keeping the best field per resume."""
     seen = set()
     candidates = []
     
-    for i, meta in enumerate(results["metadatas"][0]):
+    for meta, dist in zip(metadatas, distances):
         resume_id = meta.get("id")
         if not resume_id or resume_id in seen:
             continue
         
-        # Note: Seniority filtering would need to be done by loading resume data
-        # For now, we return all candidates
-        similarity = round(1 - results["distances"][0][i], 4)
+        similarity = round(1 - dist, 4)
         
         candidates.append({
             "resume_id": resume_id,
             "category": meta.get("category", "Unknown"),
             "field_type": meta.get("field_type", "N/A"),
+            "seniority": meta.get("seniority", "mid"),
+            "years_experience": meta.get("years_experience", -1),
             "similarity": similarity
         })
         
@@ -222,38 +755,300 @@ def search_resumes_with_auto_expansion(query: str, seniority: str = None, top_k:
         if len(candidates) >= top_k:
             break
     
-    print(f"✅ Found {len(candidates)} unique candidates")
     return candidates
 
 
-def parse_user_input(user_input: str):
-    """Parse user input to extract job title and seniority."""
+@tracing.traced("search_batch")
+def search_resumes_batch(queries: list, seniority: str = None, top_k: int = 80,
+                         min_years: int = None, max_years: int = None,
+                         similarity_threshold: float = 0.65, max_similar: int = 10,
+                         expansion_mode: str = None, hybrid: bool = None,
+                         must_have: list = None, exclude_skills: list = None,
+                         sharded: bool = None) -> list:
+    """
+    Search resumes for many queries at once (no printing).
+
+    Each query is a title string or a dict with "query" and optional
+    "seniority", "top_k", "min_years", "max_years", "must_have",
+    "exclude_skills" overriding the defaults, and "categories" (shards to
+    search when sharded; inferred from the expansion otherwise).
+
+    Queries with a cached result are answered directly. For the rest, the
+    model / Chroma work is per batch (not per query):
+      1. Queries already in the title neighbour graph expand with no model call;
+         the rest are encoded in one forward pass and expanded with one
+         multi-query call on job_titles_index.
+      2. "concat" mode: all expanded queries are encoded in one forward pass.
+         "centroid" mode: expanded vectors are built from stored title vectors
+         (see expand_query_vectors), with no second encode.
+         "rrf" mode: every expansion vector is kept and the per-vector lists
+         are fused (see expand_query_multi_vectors).
+      3. One multi-query call on resumes per distinct filter (and shard set when
+         sharded), while the BM25 searches (hybrid mode) run on a side thread pool.
+
+    Returns one dict per query: query, seniority, expanded_titles, candidates
+    (shaped as in search_resumes_with_auto_expansion) and n_results, the hits
+    requested from the resumes collection for it (n_results x query vectors).
+    """
+    requests = []
+    for item in queries:
+        if isinstance(item, str):
+            item = {"query": item}
+        requests.append({
+            "query": item["query"],
+            "seniority": item.get("seniority", seniority),
+            "top_k": item.get("top_k", top_k),
+            "min_years": item.get("min_years", min_years),
+            "max_years": item.get("max_years", max_years),
+            "must_have": tuple(sorted(item.get("must_have", must_have) or ())),
+            "exclude_skills": tuple(sorted(item.get("exclude_skills", exclude_skills) or ())),
+            "categories": tuple(sorted(item.get("categories") or ())),
+        })
+    if not requests:
+        return []
+    expansion_mode = expansion_mode or EXPANSION_MODE
+    hybrid = HYBRID_SEARCH_ENABLED if hybrid is None else hybrid
+    sharded = SHARDED_SEARCH if sharded is None else sharded
+
+    outputs = [None] * len(requests)
+    keys = [
+        result_key("resumes_batch", r["query"], ("job_titles_index", "resumes", "resumes_shards"),
+                   seniority=r["seniority"],
+                   top_k=r["top_k"], min_years=r["min_years"], max_years=r["max_years"],
+                   expansion_mode=expansion_mode, hybrid=hybrid,
+                   must_have=r["must_have"], exclude_skills=r["exclude_skills"],
+                   sharded=sharded, categories=r["categories"])
+        for r in requests
+    ]
+    for i, key in enumerate(keys):
+        cached = get_result(key)
+        if cached is not None:
+            outputs[i] = dict(cached, query=requests[i]["query"],
+                              candidates=[dict(c) for c in cached["candidates"]])
+    pending = [i for i in range(len(requests)) if outputs[i] is None]
+
+    # Skill filters -> ID sets; a request nobody can satisfy is answered empty
+    allowed = {}
+    for i in list(pending):
+        r = requests[i]
+        allowed[i] = resolve_skill_filter(r["must_have"], r["exclude_skills"])
+        if allowed[i] is not None and not allowed[i]:
+            outputs[i] = {"query": r["query"], "seniority": r["seniority"], "expanded_titles": [], "candidates": [],
+                          "n_results": 0}
+            pending.remove(i)
+    if not pending:
+        return outputs
+
+    lexical = {}
+    if hybrid:
+        for i in pending:
+            r = requests[i]
+            future = _start_lexical_search(r["query"], r["seniority"], r["top_k"], r["min_years"], r["max_years"],
+                                           allowed[i])
+            if future is None:
+                break
+            lexical[i] = future
+
+    # Steps 1-2: title expansion and expanded query vectors
+    pending_queries = [requests[i]["query"] for i in pending]
+    with tracing.span("search_batch.expand", queries=len(pending), mode=expansion_mode):
+        if expansion_mode == "rrf":
+            expansion_list, vector_list, weight_list = expand_query_multi_vectors(
+                pending_queries, similarity_threshold, max_similar
+            )
+            fusion_weights = dict(zip(pending, weight_list))
+        else:
+            expansion_list, vector_list = _expanded_vectors(
+                pending_queries, expansion_mode, similarity_threshold, max_similar
+            )
+            vector_list = [[v] for v in vector_list]
+    expansions = dict(zip(pending, expansion_list))
+    expanded_vectors = dict(zip(pending, vector_list))
+
+    # Step 3: one multi-query resume search per distinct filter / shard set
+    groups = {}
+    for i in pending:
+        r = requests[i]
+        where = build_resume_filter(r["seniority"], r["min_years"], r["max_years"], allowed[i])
+        target = _resume_search_target(sharded, list(r["categories"]), expansions[i])
+        shard_set = None if target is resumes_collection else tuple(target.categories)
+        key = json.dumps([where, shard_set], sort_keys=True)
+        groups.setdefault(key, (where, target, []))[2].append(i)
+
+    for where, target, members in groups.values():
+        if expansion_mode == "rrf":
+            n_results = max(_rrf_list_size(requests[i]["top_k"], len(expanded_vectors[i])) for i in members)
+        else:
+            n_results = max(requests[i]["top_k"] for i in members) * 2
+        # Every vector of every query in the group goes into one call
+        flat_vectors, spans = [], []
+        for i in members:
+            spans.append((len(flat_vectors), len(flat_vectors) + len(expanded_vectors[i])))
+            flat_vectors.extend(expanded_vectors[i])
+        with tracing.span("search_batch.resume_query", vectors=len(flat_vectors)):
+            results = target.query(
+                query_embeddings=flat_vectors,
+                n_results=n_results,
+                where=where,
+                include=["metadatas", "distances"]
+            )
+        fetched = returned = 0
+        for (lo, hi), i in zip(spans, members):
+            if expansion_mode == "rrf":
+                candidates = _fuse_multi_vector_results(
+                    results["metadatas"][lo:hi], results["distances"][lo:hi],
+                    fusion_weights[i], requests[i]["top_k"]
+                )
+            else:
+                candidates = _collect_candidates(
+                    results["metadatas"][lo], results["distances"][lo], requests[i]["top_k"]
+                )
+            if i in lexical:
+                candidates = _fuse_hybrid(candidates, lexical[i].result(), requests[i]["top_k"])
+            fetched += sum(len(hits) for hits in results["metadatas"][lo:hi])
+            returned += len(candidates)
+            output = {
+                "query": requests[i]["query"],
+                "seniority": requests[i]["seniority"],
+                "expanded_titles": expansions[i],
+                "candidates": candidates,
+                "n_results": n_results * (hi - lo),
+            }
+            put_result(keys[i], output)
+            outputs[i] = dict(output, candidates=[dict(c) for c in output["candidates"]])
+        tracing.record_fetch("search_batch", fetched, returned)
+
+    return outputs
+
+
+def read_queries(lines, parse_seniority: bool = True) -> list:
+    """
+    Parse query lines for the batch CLI: JSON objects ({"query": ...}) or plain
+    titles, where plain titles may carry an explicit seniority word
+    ("Accountant senior", "Sr. Accountant"); role words such as "Associate" stay.
+    """
+    queries = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            queries.append(json.loads(line))
+            continue
+        if parse_seniority:
+            # Titles stay verbatim unless the line states a seniority
+            query, level = parse_user_input(line, explicit_only=True)
+            item = {"query": query if level and query else line}
+            if level:
+                item["seniority"] = level
+            queries.append(item)
+        else:
+            queries.append({"query": line})
+    return queries
+
+
+def run_batch_cli(args):
+    """Non-interactive mode: read queries from a file or stdin, write JSONL."""
+    if args.queries_file and args.queries_file != "-":
+        with open(args.queries_file, "r", encoding="utf-8") as f:
+            queries = read_queries(f, parse_seniority=args.seniority is None)
+    else:
+        queries = read_queries(sys.stdin, parse_seniority=args.seniority is None)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        for i in range(0, len(queries), args.batch_size):
+            batch = queries[i:i + args.batch_size]
+            for result in search_resumes_batch(batch, seniority=args.seniority, top_k=args.top_k,
+                                               min_years=args.min_years, max_years=args.max_years,
+                                               expansion_mode=args.expansion_mode,
+                                               hybrid=args.hybrid or None,
+                                               sharded=args.sharded or None):
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"  Processed {min(i + args.batch_size, len(queries))}/{len(queries)} queries", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    qps = len(queries) / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {len(queries)} queries in {elapsed:.1f}s ({qps:.1f} queries/s)", file=sys.stderr)
+    print(f"📊 Cache: {json.dumps(cache_stats())}", file=sys.stderr)
+
+
+# Words that only state a seniority; safe to strip from any title
+SENIORITY_MARKERS = {
+    "senior": ["senior", "sr"],
+    "junior": ["junior", "jr", "entry level", "entry-level"],
+    "intern": ["intern", "internship", "trainee"]
+}
+# Words that also name a role ("Sales Associate", "Chief Executive Officer"); interactive input only
+SENIORITY_ROLE_WORDS = {
+    "senior": ["lead", "principal", "head", "chief"],
+    "junior": ["entry", "associate", "assistant"],
+    "intern": []
+}
+
+
+def parse_user_input(user_input: str, explicit_only: bool = False):
+    """
+    Parse user input to extract job title and seniority. Keywords match whole
+    words only; with explicit_only, role words such as "associate" or "chief"
+    stay part of the title (used for batch files of real job titles).
+    """
     user_input = user_input.strip().lower()
     
     # Detect seniority keywords
     seniority = None
-    seniority_keywords = {
-        "senior": ["senior", "sr", "lead", "principal", "head", "chief"],
-        "junior": ["junior", "jr", "entry", "associate", "assistant"],
-        "intern": ["intern", "internship", "trainee"]
-    }
-    
-    for level, keywords in seniority_keywords.items():
-        if any(kw in user_input for kw in keywords):
+    for level, markers in SENIORITY_MARKERS.items():
+        keywords = markers if explicit_only else markers + SENIORITY_ROLE_WORDS[level]
+        pattern = re.compile(r'\b(?:' + "|".join(re.escape(kw) for kw in keywords) + r')\b\.?')
+        if pattern.search(user_input):
             seniority = level
             # Remove seniority from query
-            for kw in keywords:
-                user_input = user_input.replace(kw, "").strip()
+            user_input = pattern.sub("", user_input)
             break
     
-    # Clean up query
-    query = " ".join(user_input.split())
+    # Clean up query (drop brackets or separators the keyword leaves behind)
+    query = " ".join(re.sub(r'\(\s*\)', " ", user_input).split()).strip(" -–,/")
     
     return query, seniority
 
 
 # === Run directly or import ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search resumes by job title (interactive, or batch with --queries-file)")
+    parser.add_argument("--queries-file", default=None,
+                        help="File with one query per line (plain title or JSON object); '-' reads stdin")
+    parser.add_argument("--output", default=None, help="JSONL output file (default: stdout)")
+    parser.add_argument("--seniority", default=None, choices=["senior", "mid", "junior", "intern"],
+                        help="Seniority for all queries (otherwise parsed from each line)")
+    parser.add_argument("--min-years", type=int, default=None)
+    parser.add_argument("--max-years", type=int, default=None)
+    parser.add_argument("--top-k", type=int, default=80)
+    parser.add_argument("--batch-size", type=int, default=256, help="Queries per batched search")
+    parser.add_argument("--expansion-mode", default=None, choices=["concat", "centroid", "rrf"],
+                        help="How expanded titles become a query vector (default: config.EXPANSION_MODE)")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="Fuse in BM25 hits (build with retrieval_phase/bm25_index.py build)")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Search category shards (build with retrieval_phase/shards.py build)")
+    parser.add_argument("--rerank", action="store_true",
+                        help="Rerank the shortlist with the cross-encoder (interactive search)")
+    parser.add_argument("--trace-export", default=None, metavar="PATH",
+                        help="Trace every stage and write metrics on exit (.json: OpenTelemetry, else Prometheus)")
+    cli_args = parser.parse_args()
+    if cli_args.trace_export:
+        tracing.enable()
+
+    if cli_args.queries_file:
+        run_batch_cli(cli_args)
+        if cli_args.trace_export:
+            print(f"📈 Metrics written to {tracing.export(cli_args.trace_export)}", file=sys.stderr)
+        sys.exit(0)
+
     print("=" * 80)
     print("        PROFESSIONAL JOB TITLES SEARCH (with Seniority Filter)")
     print("=" * 80)
@@ -274,6 +1069,16 @@ if __name__ == "__main__":
     
     if not query:
         query = "Financial Analyst"
+
+    # Snap typos / partial titles to a canonical title when the trie is confident
+    canonical = resolve_title(query)
+    if canonical and normalize_title_key(canonical) != normalize_title_key(query):
+        print(f"✏️  Using canonical title: {canonical}")
+        query = canonical
+    elif not canonical:
+        suggestions = suggest_titles(query, limit=5)
+        if suggestions:
+            print(f"💡 Did you mean: {', '.join(suggestions)}")
     
     # Ask for seniority if not specified
     if not seniority:
@@ -297,15 +1102,28 @@ if __name__ == "__main__":
     choice = input("Choice (1 or 2): ").strip()
     
     if choice == "2":
+        years_input = input("Minimum years of experience (Enter to skip): ").strip()
+        min_years = int(years_input) if years_input.isdigit() else None
+        must_have = parse_skill_list(input("Must-have skills, comma-separated (Enter to skip): "))
+        exclude_skills = parse_skill_list(input("Excluded skills, comma-separated (Enter to skip): "))
+
         print()
-        candidates = search_resumes_with_auto_expansion(query, seniority=seniority, top_k=80)
+        candidates = search_resumes_with_auto_expansion(query, seniority=seniority, top_k=80, min_years=min_years,
+                                                        rerank=cli_args.rerank or None,
+                                                        hybrid=cli_args.hybrid or None,
+                                                        must_have=must_have, exclude_skills=exclude_skills,
+                                                        sharded=cli_args.sharded or None)
         
         print(f"\n📋 Top {min(20, len(candidates))} Candidates:\n")
         print("-" * 80)
         for i, c in enumerate(candidates[:20], 1):
+            score = f"Score: {c['similarity']:.4f}" if c["similarity"] is not None else f"BM25: {c['bm25_score']:.4f}"
             print(f"{i:2}. Resume ID: {c['resume_id']:<15} | Category: {c['category']:<20} | "
-                  f"Field: {c['field_type']:<15} | Score: {c['similarity']:.4f}")
+                  f"Field: {c['field_type']:<15} | {score}")
         print("-" * 80)
         print(f"\n💡 Total candidates found: {len(candidates)}")
     else:
-        get_related_titles(query, seniority=seniority, top_k=10)
\ No newline at end of file
+        get_related_titles(query, seniority=seniority, top_k=10)
+
+    if cli_args.trace_export:
+        print(f"📈 Metrics written to {tracing.export(cli_args.trace_export)}")
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Optional cross-encoder rerank of a bi-encoder shortlist.
+
+The top RERANK_TOP_N candidates (from search_resumes_with_auto_expansion or
+the JD match engine) are rescored with a small CPU cross-encoder that reads the
+query and the resume field together. Scores are persisted in a sqlite table
+keyed by (model, query hash, field-text hash), so a repeated query costs one
+sqlite lookup. Cache misses are scored in bi-encoder rank order, batch by
+batch, and scoring stops once RERANK_BUDGET_MS is spent; candidates that were
+not scored keep their original order behind the reranked ones.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import RERANK_MODEL, RERANK_TOP_N, RERANK_BUDGET_MS, RERANK_BATCH_SIZE, RERANK_CACHE
+
+
+def text_hash(text: str) -> str:
+    """Stable hash of whitespace-normalised text."""
+    return hashlib.sha1(" ".join(str(text).split()).encode("utf-8")).hexdigest()
+
+
+def resume_field_doc_id(resume_id: str, field_type: str, category: str) -> str:
+    """Chroma ID of one resume field (same format as embed_resumes.py)."""
+    return f"resume_{resume_id}_{field_type}_{str(category).replace(' ', '_')}"
+
+
+class PairScoreCache:
+    """sqlite-backed (query hash, field hash) -> score store, shared across runs."""
+
+    def __init__(self, path: Path = RERANK_CACHE):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pair_scores ("
+            " model TEXT NOT NULL, query_hash TEXT NOT NULL, field_hash TEXT NOT NULL, score REAL NOT NULL,"
+            " PRIMARY KEY (model, query_hash, field_hash)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, query_hash: str, field_hashes: list) -> dict:
+        if not field_hashes:
+            return {}
+        unique = list(set(field_hashes))
+        found = {}
+        with self._lock:
+            # Stay under sqlite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT field_hash, score FROM pair_scores WHERE model = ? AND query_hash = ? "
+                    f"AND field_hash IN ({','.join('?' * len(part))})",
+                    [model, query_hash, *part]
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, model: str, query_hash: str, scores: dict):
+        if not scores:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pair_scores (model, query_hash, field_hash, score) VALUES (?, ?, ?, ?)",
+                [(model, query_hash, field_hash, score) for field_hash, score in scores.items()]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Reranker:
+    """Cross-encoder rescoring with a candidate budget, a latency budget and a pair-score cache."""
+
+    def __init__(self, model_name: str = RERANK_MODEL, cache_path: Path = RERANK_CACHE):
+        self.model_name = model_name
+        self.cache = PairScoreCache(cache_path)
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def load(self):
+        """Load the cross-encoder once (kept warm; downloaded into the local HF cache on first use)."""
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, device="cpu", max_length=512)
+        return self._model
+
+    def rerank(self, query: str, candidates: list, texts: dict, top_n: int = RERANK_TOP_N,
+               budget_ms: float = RERANK_BUDGET_MS, batch_size: int = RERANK_BATCH_SIZE) -> tuple:
+        """
+        Rerank candidates[:top_n] by cross-encoder score.
+
+        texts maps resume_id -> field text; candidates without text are left
+        unscored. Returns (reordered candidates, stats). Reranked candidates
+        gain "rerank_score".
+        """
+        model = self.load()
+        start = time.perf_counter()
+
+        head, tail = candidates[:top_n], candidates[top_n:]
+        query_hash = text_hash(query)
+        field_hashes = [text_hash(texts[c["resume_id"]]) if texts.get(c["resume_id"]) else None for c in head]
+        scores = self.cache.get_many(self.model_name, query_hash, [h for h in field_hashes if h])
+        cached = sum(1 for h in field_hashes if h in scores)
+
+        # Score cache misses in bi-encoder order until the latency budget runs out
+        misses = list(dict.fromkeys(
+            (h, texts[c["resume_id"]]) for c, h in zip(head, field_hashes) if h and h not in scores
+        ))
+        new_scores = {}
+        budget_exhausted = False
+        for i in range(0, len(misses), batch_size):
+            if (time.perf_counter() - start) * 1000 >= budget_ms:
+                budget_exhausted = True
+                break
+            batch = misses[i:i + batch_size]
+            predicted = model.predict([(query, text) for _, text in batch], batch_size=batch_size)
+            for (field_hash, _), score in zip(batch, predicted):
+                new_scores[field_hash] = float(score)
+        self.cache.put_many(self.model_name, query_hash, new_scores)
+        scores.update(new_scores)
+
+        scored, unscored = [], []
+        for candidate, field_hash in zip(head, field_hashes):
+            if field_hash in scores:
+                candidate = dict(candidate)
+                candidate["rerank_score"] = round(scores[field_hash], 4)
+                scored.append(candidate)
+            else:
+                unscored.append(candidate)
+        scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+
+        stats = {
+            "candidates": len(head),
+            "cached": cached,
+            "scored": len(new_scores),
+            "unscored": len(unscored),
+            "budget_exhausted": budget_exhausted,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        return scored + unscored + tail, stats
+
+
+_reranker = None
+
+
+def get_reranker() -> Reranker:
+    """Process-wide reranker (model loaded on first use)."""
+    global _reranker
+    if _reranker is None:
+        _reranker = Reranker()
+    return _reranker
+
+
+def fetch_field_texts(collection, candidates: list, field_type: str = None) -> dict:
+    """
+    resume_id -> text of the field to rerank against.
+    Uses each candidate's matched field_type unless field_type is given.
+    """
+    doc_ids = {}
+    for c in candidates:
+        field = field_type or c.get("field_type")
+        if field and field != "N/A":
+            doc_ids[resume_field_doc_id(c["resume_id"], field, c.get("category", "Unknown"))] = c["resume_id"]
+    if not doc_ids:
+        return {}
+    data = collection.get(ids=list(doc_ids), include=["documents"])
+    return {doc_ids[doc_id]: doc for doc_id, doc in zip(data["ids"], data["documents"]) if doc}
+
+
+def rerank_candidates(query: str, candidates: list, collection, field_type: str = None,
+                      top_n: int = RERANK_TOP_N, budget_ms: float = RERANK_BUDGET_MS) -> tuple:
+    """Fetch field texts for the shortlist from `collection` and rerank it."""
+    texts = fetch_field_texts(collection, candidates[:top_n], field_type)
+    return get_reranker().rerank(query, candidates, texts, top_n=top_n, budget_ms=budget_ms)
@@ -0,0 +1,357 @@
+"""
+Local asyncio HTTP service around the resume search, with micro-batching.
+
+The model and collections stay loaded for the life of the process. Requests
+that arrive within SERVICE_BATCH_WINDOW_MS of each other are coalesced and
+answered with one search_resumes_batch call (one batched encode, one
+multi-query ANN call per filter). Searches run on a single worker thread, so
+the model is never used concurrently. Back-pressure comes from a bounded queue:
+when SERVICE_MAX_QUEUE requests are already waiting, new ones get 503 with
+Retry-After instead of piling up.
+
+Endpoints:
+    POST /search   {"query": "Accountant", "seniority": "senior", "top_k": 20,
+                    "min_years": 3, "must_have": ["SQL"], ...}
+                   fields are validated (400 on bad input) and top_k is clamped
+                   to SERVICE_MAX_TOP_K; if a coalesced batch still fails, its
+                   requests are retried one by one so only the culprit errors
+    GET  /health   queue depth, batch / cache statistics
+    GET  /metrics        per-stage latency histograms, over-fetch, cache hit
+                         rates in Prometheus text format (with --trace)
+    GET  /metrics/otel   the same plus recent spans, as OpenTelemetry JSON
+
+Usage:
+    python retrieval_phase/search_service.py --port 8000
+    curl -s localhost:8000/search -d '{"query": "Financial Analyst"}'
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import query_cache
+import query_expander_rag as qe
+import tracing
+from skill_index import parse_skill_list
+from config import (
+    SERVICE_HOST, SERVICE_PORT, SERVICE_BATCH_WINDOW_MS, SERVICE_MAX_BATCH, SERVICE_MAX_QUEUE,
+    SERVICE_MAX_TOP_K
+)
+
+MAX_BODY_BYTES = 64 * 1024
+SENIORITY_LEVELS = ("senior", "mid", "junior", "intern")
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class BadRequest(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_field(payload: dict, key: str, minimum: int) -> int:
+    """Whole number (or a string of one) >= minimum; None when absent."""
+    value = payload.get(key)
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise BadRequest(400, f"'{key}' must be an integer")
+    if value < minimum:
+        raise BadRequest(400, f"'{key}' must be >= {minimum}")
+    return value
+
+
+def _str_list_field(payload: dict, key: str) -> list:
+    """List of strings, or one comma-separated string; None when absent."""
+    value = payload.get(key)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return parse_skill_list(value)
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise BadRequest(400, f"'{key}' must be a list of strings")
+    return [item.strip() for item in value if item.strip()]
+
+
+def parse_search_request(payload) -> dict:
+    """
+    Validate a /search body into search_resumes_batch keyword fields. Bad input
+    raises BadRequest here, before it can fail the batch it would share.
+    """
+    if not isinstance(payload, dict):
+        raise BadRequest(400, "body must be a JSON object")
+    query = payload.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise BadRequest(400, "'query' is required and must be a string")
+    request = {"query": query.strip()}
+
+    seniority = payload.get("seniority")
+    if seniority is not None:
+        if not isinstance(seniority, str) or seniority.strip().lower() not in SENIORITY_LEVELS:
+            raise BadRequest(400, f"'seniority' must be one of {', '.join(SENIORITY_LEVELS)}")
+        request["seniority"] = seniority.strip().lower()
+
+    top_k = _int_field(payload, "top_k", 1)
+    if top_k is not None:
+        request["top_k"] = min(top_k, SERVICE_MAX_TOP_K)
+    for key in ("min_years", "max_years"):
+        value = _int_field(payload, key, 0)
+        if value is not None:
+            request[key] = value
+    if request.get("min_years", 0) > request.get("max_years", float("inf")):
+        raise BadRequest(400, "'min_years' must not exceed 'max_years'")
+
+    for key in ("must_have", "exclude_skills", "categories"):
+        value = _str_list_field(payload, key)
+        if value:
+            request[key] = value
+    return request
+
+
+class MicroBatcher:
+    """Collects concurrent search requests into batches for one worker thread."""
+
+    def __init__(self, window_ms: float = SERVICE_BATCH_WINDOW_MS, max_batch: int = SERVICE_MAX_BATCH,
+                 max_queue: int = SERVICE_MAX_QUEUE):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self.batches = 0
+        self.requests = 0
+        self.rejected = 0
+        self.retried = 0
+        self.busy_seconds = 0.0
+
+    def submit(self, request: dict):
+        """Queue a request; returns a future, or None when the queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((request, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return None
+        return future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Clients that already gave up do not need an answer
+            batch = [(request, future) for request, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                outputs = await loop.run_in_executor(
+                    self.executor, qe.search_resumes_batch, [request for request, _ in batch]
+                )
+            except Exception as e:
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                else:
+                    # One request broke the batch: answer each on its own so only that one fails
+                    self.retried += len(batch)
+                    for request, future in batch:
+                        try:
+                            output = (await loop.run_in_executor(
+                                self.executor, qe.search_resumes_batch, [request]))[0]
+                        except Exception as single_error:
+                            if not future.done():
+                                future.set_exception(single_error)
+                        else:
+                            if not future.done():
+                                future.set_result(output)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    if not future.done():
+                        future.set_result(output)
+            self.busy_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.requests += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_limit": self.queue.maxsize,
+            "batches": self.batches,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "retried_alone": self.retried,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "busy_seconds": round(self.busy_seconds, 2),
+        }
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """Parse one HTTP/1.1 request: (method, path, headers, body), or None on EOF."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise BadRequest(400, "headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    if len(parts) != 3:
+        raise BadRequest(400, "malformed request line")
+    method, path, _ = parts
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise BadRequest(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise BadRequest(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], headers, body
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool,
+                   extra_headers: dict = None):
+    """payload is a dict (sent as JSON) or a str (sent as plain text, e.g. Prometheus metrics)."""
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+    }
+    headers.update(extra_headers or {})
+    head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+
+class SearchService:
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+        self.started_at = time.time()
+
+    async def handle_search(self, body: bytes):
+        try:
+            request = parse_search_request(json.loads(body or b"{}"))
+        except ValueError:
+            return 400, {"error": "invalid JSON"}, None
+        except BadRequest as e:
+            return e.status, {"error": str(e)}, None
+
+        future = self.batcher.submit(request)
+        if future is None:
+            return 503, {"error": "search queue is full, retry shortly"}, {"Retry-After": "1"}
+        try:
+            return 200, await future, None
+        except Exception as e:
+            return 500, {"error": str(e)}, None
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "batcher": self.batcher.stats(),
+            "cache": query_cache.cache_stats(),
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as e:
+                    write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                extra = None
+                if path == "/search":
+                    if method != "POST":
+                        status, payload = 405, {"error": "use POST"}
+                    else:
+                        status, payload, extra = await self.handle_search(body)
+                elif path == "/health":
+                    status, payload = 200, self.health()
+                elif path == "/metrics":
+                    status, payload = 200, tracing.prometheus_text()
+                elif path == "/metrics/otel":
+                    status, payload = 200, tracing.otel_json()
+                else:
+                    status, payload = 404, {"error": f"unknown path {path}"}
+
+                write_response(writer, status, payload, keep_alive, extra)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, window_ms: float = SERVICE_BATCH_WINDOW_MS,
+                max_batch: int = SERVICE_MAX_BATCH, max_queue: int = SERVICE_MAX_QUEUE):
+    batcher = MicroBatcher(window_ms, max_batch, max_queue)
+    service = SearchService(batcher)
+    batch_task = asyncio.create_task(batcher.run())
+
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"✅ Search service on http://{host}:{port} "
+          f"(batch window {window_ms} ms, max batch {max_batch}, queue {max_queue})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP resume search service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--batch-window-ms", type=float, default=SERVICE_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=SERVICE_MAX_BATCH)
+    parser.add_argument("--max-queue", type=int, default=SERVICE_MAX_QUEUE)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the query/result cache (load testing)")
+    parser.add_argument("--trace", action="store_true", help="Record per-stage spans for /metrics")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        query_cache.QUERY_CACHE_ENABLED = False
+    if args.trace:
+        tracing.enable()
+
+    # Load the model weights before the first request
+    qe.embed_fn(["warm up"])
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.batch_window_ms, args.max_batch, args.max_queue))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,297 @@
+"""
+Category-sharded copy of the resumes collection, plus a fan-out router.
+
+Each resume category (ACCOUNTANT, ENGINEERING, ...) gets its own Chroma
+database under chroma_db/shards/<generation>/<category>/ holding a "resumes"
+collection. Separate databases let the shards be built by separate processes
+without contending for one sqlite file. Shards are filled from the main
+collection's stored vectors, so nothing is re-embedded.
+
+A rebuild writes a new generation into a staging directory, renames it into
+place and then atomically replaces shards.json, so searches in flight keep
+reading the previous generation (kept until the next rebuild). Routers reload
+when shards.json changes. Online ingestion (ingest_resume.py) upserts each
+resume into its category shard as well; manifest counts are as of the build.
+
+At query time ShardView looks like a collection: query() sends the same
+request to the selected shards concurrently on a process-wide thread pool and merges the
+per-shard lists (already sorted by distance) with a k-way heap merge, keeping
+the overall top n_results. Results have the same shape as Collection.query, so
+the existing candidate / fusion code works unchanged.
+
+Usage:
+    python retrieval_phase/shards.py build --workers 4
+    python retrieval_phase/shards.py list
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from config import CHROMA, SHARDS_DIR, hnsw_metadata
+from chroma_utils import fetch_all, max_batch_size
+from query_cache import bump_index_version
+
+SHARD_MANIFEST = SHARDS_DIR / "shards.json"
+
+
+def shard_key(category: str) -> str:
+    """Normalised category used to route queries (matches the cleaned resume categories)."""
+    return " ".join(str(category or "UNKNOWN").split()).upper()
+
+
+def shard_dirname(category: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", shard_key(category).lower()).strip("_") or "unknown"
+
+
+def _build_shard(category: str, shard_dir: str, ids: list, embeddings: np.ndarray,
+                 documents: list, metadatas: list) -> tuple:
+    """Worker process: write one category's rows into its own Chroma database."""
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=shard_dir)
+    try:
+        client.delete_collection("resumes")
+    except Exception:
+        pass
+    collection = client.create_collection(name="resumes", metadata=hnsw_metadata("resumes"))
+
+    batch = max_batch_size(client)
+    for i in range(0, len(ids), batch):
+        collection.add(
+            ids=ids[i:i + batch],
+            embeddings=embeddings[i:i + batch].tolist(),
+            documents=documents[i:i + batch],
+            metadatas=metadatas[i:i + batch]
+        )
+    return category, collection.count(), time.perf_counter() - start
+
+
+def _read_manifest() -> dict:
+    with open(SHARD_MANIFEST, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(manifest: dict):
+    """Atomic replace, so readers see the old or the new manifest, never half of one."""
+    tmp = SHARD_MANIFEST.with_name(f"{SHARD_MANIFEST.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, SHARD_MANIFEST)
+
+
+def build_shards(persist_directory: Path = CHROMA, workers: int = None) -> dict:
+    """Split the resumes collection by category, one process per shard at a time."""
+    client = chromadb.PersistentClient(path=str(persist_directory))
+    data = fetch_all(client.get_collection("resumes"), include=["embeddings", "documents", "metadatas"])
+
+    rows = {}
+    for i, meta in enumerate(data["metadatas"]):
+        rows.setdefault(shard_key((meta or {}).get("category")), []).append(i)
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+
+    # Build beside the live generation; readers are only switched over once it is complete
+    generation = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    staging = SHARDS_DIR / f".building-{generation}"
+    staging.mkdir(parents=True)
+
+    manifest = {"generation": generation, "shards": {}}
+    try:
+        # spawn: a forked child must not inherit the parent's open Chroma/sqlite handles
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = []
+            for category, members in sorted(rows.items()):
+                dirname = shard_dirname(category)
+                manifest["shards"][category] = {"dir": f"{generation}/{dirname}"}
+                futures.append(pool.submit(
+                    _build_shard, category, str(staging / dirname),
+                    [data["ids"][i] for i in members], embeddings[members],
+                    [data["documents"][i] for i in members], [data["metadatas"][i] for i in members]
+                ))
+            for future in futures:
+                category, count, seconds = future.result()
+                manifest["shards"][category]["count"] = count
+                print(f"  ✅ {category:<25} {count:>6} fields ({seconds:.1f}s)")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Keep what the previous manifest points at: searches in flight may still read it
+    keep = {generation}
+    if SHARD_MANIFEST.exists():
+        keep.update(Path(info["dir"]).parts[0] for info in _read_manifest()["shards"].values())
+    staging.rename(SHARDS_DIR / generation)
+    _write_manifest(manifest)
+    bump_index_version("resumes_shards")
+
+    for path in SHARDS_DIR.iterdir():
+        if path.is_dir() and path.name not in keep and not path.name.startswith(".building-"):
+            shutil.rmtree(path, ignore_errors=True)
+    return manifest
+
+
+class ShardView:
+    """Collection-like view over a subset of shards (only query() is supported)."""
+
+    def __init__(self, router: "ShardRouter", categories: list):
+        self.router = router
+        self.categories = categories
+
+    def query(self, query_embeddings: list, n_results: int, where: dict = None,
+              include=("metadatas", "distances")) -> dict:
+        shards = [self.router.collection(c) for c in self.categories]
+        # Distances are always fetched: the merge is ordered by them
+        fields = [f for f in include if f != "distances"]
+
+        def run(collection):
+            return collection.query(query_embeddings=query_embeddings, n_results=n_results,
+                                    where=where, include=fields + ["distances"])
+
+        results = list(self.router.pool.map(run, shards))
+
+        merged = {"ids": [], **{f: [] for f in include}}
+        for q in range(len(query_embeddings)):
+            # Every shard list is sorted by distance: k-way heap merge, stop at n_results
+            streams = [zip(r["distances"][q], r["ids"][q], *(r[f][q] for f in fields)) for r in results]
+            top = list(itertools.islice(heapq.merge(*streams, key=lambda hit: hit[0]), n_results))
+            merged["ids"].append([hit[1] for hit in top])
+            for j, field in enumerate(fields, 2):
+                merged[field].append([hit[j] for hit in top])
+            if "distances" in merged:
+                merged["distances"].append([hit[0] for hit in top])
+        return merged
+
+
+# One query pool for the process: routers are replaced whenever shards.json
+# changes, and views on a replaced router may still be running
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shard_pool(max_workers: int = 8) -> ThreadPoolExecutor:
+    """Thread pool shared by every ShardRouter for fanning out shard queries."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard")
+        return _pool
+
+
+class ShardRouter:
+    """Opens shard databases lazily and picks the shards a query needs."""
+
+    def __init__(self, manifest_path: Path = SHARD_MANIFEST):
+        self.mtime = os.stat(manifest_path).st_mtime_ns
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.categories = sorted(self.manifest["shards"])
+        self.pool = shard_pool()
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, category: str):
+        with self._lock:
+            if category not in self._collections:
+                shard_dir = SHARDS_DIR / self.manifest["shards"][category]["dir"]
+                client = chromadb.PersistentClient(path=str(shard_dir))
+                self._collections[category] = client.get_collection("resumes")
+            return self._collections[category]
+
+    def route(self, categories=None) -> list:
+        """Known shards for the given categories; all shards when none are given or known."""
+        wanted = [shard_key(c) for c in categories or []]
+        selected = [c for c in self.categories if c in set(wanted)]
+        return selected or list(self.categories)
+
+    def view(self, categories=None) -> ShardView:
+        return ShardView(self, self.route(categories))
+
+    def _add_shard(self, category: str):
+        """Empty shard for a category first seen at ingestion, in the live generation."""
+        generation = self.manifest.get("generation")
+        dirname = f"{generation}/{shard_dirname(category)}" if generation else shard_dirname(category)
+        client = chromadb.PersistentClient(path=str(SHARDS_DIR / dirname))
+        collection = client.get_or_create_collection(name="resumes", metadata=hnsw_metadata("resumes"))
+        with self._lock:
+            self.manifest["shards"][category] = {"dir": dirname}
+            self.categories = sorted(self.manifest["shards"])
+            self._collections[category] = collection
+        _write_manifest(self.manifest)
+
+    def upsert(self, ids: list, embeddings: list, documents: list, metadatas: list, resume_ids: list):
+        """Replace these resumes' field rows in their category shards (as the main collection upsert)."""
+        rows = {}
+        for i, meta in enumerate(metadatas):
+            rows.setdefault(shard_key((meta or {}).get("category")), []).append(i)
+        for category in rows:
+            if category not in self.manifest["shards"]:
+                self._add_shard(category)
+
+        # Drop earlier versions from every shard: the category may have changed
+        for category in list(self.categories):
+            self.collection(category).delete(where={"id": {"$in": list(resume_ids)}})
+        for category, members in rows.items():
+            self.collection(category).upsert(
+                ids=[ids[i] for i in members],
+                embeddings=[embeddings[i] for i in members],
+                documents=[documents[i] for i in members],
+                metadatas=[metadatas[i] for i in members]
+            )
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_shard_router():
+    """Shared router, or None if the shards have not been built; reloads when shards.json changes."""
+    global _router
+    try:
+        mtime = SHARD_MANIFEST.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _router_lock:
+        if _router is None or _router.mtime != mtime:
+            _router = ShardRouter()
+        return _router
+
+
+def upsert_resume_rows(ids: list, embeddings: list, documents: list, metadatas: list, resume_ids: list) -> bool:
+    """Mirror an upsert into the resumes collection onto the shards; False if none are built."""
+    router = get_shard_router()
+    if router is None:
+        return False
+    router.upsert(ids, embeddings, documents, metadatas, resume_ids)
+    bump_index_version("resumes_shards")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build / inspect category shards of the resumes collection")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="(Re)build all shards from the resumes collection")
+    build.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    sub.add_parser("list", help="Show the shard manifest")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        manifest = build_shards(workers=args.workers)
+        print(f"\n✅ Built {len(manifest['shards'])} shards in {time.perf_counter() - start:.1f}s -> {SHARDS_DIR}")
+    else:
+        if not SHARD_MANIFEST.exists():
+            raise SystemExit("❌ No shards; run: python retrieval_phase/shards.py build")
+        for category, info in sorted(_read_manifest()["shards"].items()):
+            print(f"{category:<25} {info.get('count', '?'):>6} fields  ({info['dir']})")
@@ -0,0 +1,222 @@
+"""
+Skill -> resume bitmap index for hard must-have / exclude filters.
+
+Every canonical skill (the SKILL_PATTERNS vocabulary of cleaning_resumes.py)
+gets a packed bit array over resume ordinals. "must know SQL and Tableau but
+not SAP" is a couple of bitwise ANDs over a few hundred bytes; the resulting
+resume IDs are passed to the vector search as an `id $in` filter.
+
+    chroma_db/skill_index.npz (written by embeddings/embed_resumes.py)
+        resume_ids  <U (N,)          resume ordinal -> resume ID
+        skills      <U (S,)          canonical skills (sorted at build, appended by ingestion)
+        bits        u1 (S, ceil(N/8)) np.packbits rows
+
+Usage:
+    python retrieval_phase/skill_index.py build
+    python retrieval_phase/skill_index.py query --must sql tableau --exclude sap
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import RESUMES_CLEANED, SKILL_INDEX
+
+# Skill vocabulary / extraction live with the resume cleaning step
+sys.path.insert(0, str(Path(__file__).parent.parent / "query_structuring_resumes"))
+from cleaning_resumes import canonical_skill, extract_skills
+
+
+class SkillIndex:
+    """Packed bitmaps keyed by canonical skill, over resume ordinals."""
+
+    def __init__(self, resume_ids, skills, bits: np.ndarray):
+        self.resume_ids = [str(r) for r in resume_ids]
+        self.skills = [str(s) for s in skills]
+        self.ordinals = {resume_id: i for i, resume_id in enumerate(self.resume_ids)}
+        self.skill_rows = {skill: i for i, skill in enumerate(self.skills)}
+        # Byte columns are allocated ahead of the resumes so appends rarely copy;
+        # `bits` / `all_bits` are views of the used part
+        self._bits = np.array(bits, dtype=np.uint8)
+        # Every real resume set, padding bits at the end left clear
+        self._all_bits = np.zeros(self._bits.shape[1], np.uint8)
+        self._all_bits[: self._bits.shape[1]] = np.packbits(np.ones(len(self.resume_ids), dtype=bool))
+
+    @property
+    def bits(self) -> np.ndarray:
+        return self._bits[:, : (len(self.resume_ids) + 7) // 8]
+
+    @property
+    def all_bits(self) -> np.ndarray:
+        return self._all_bits[: (len(self.resume_ids) + 7) // 8]
+
+    def __len__(self) -> int:
+        return len(self.resume_ids)
+
+    @classmethod
+    def build(cls, resumes: list) -> "SkillIndex":
+        """Index the cleaned `skills` field of each resume."""
+        resume_ids = [str(r.get("ID") or r.get("id", f"resume_{i}")) for i, r in enumerate(resumes)]
+        resume_skills = [extract_skills(r.get("skills", "")) for r in resumes]
+        skills = sorted(set().union(*resume_skills)) if resume_skills else []
+        rows = {skill: i for i, skill in enumerate(skills)}
+
+        dense = np.zeros((len(skills), len(resume_ids)), dtype=bool)
+        for ordinal, found in enumerate(resume_skills):
+            for skill in found:
+                dense[rows[skill], ordinal] = True
+        bits = np.packbits(dense, axis=1) if len(skills) else np.zeros((0, (len(resume_ids) + 7) // 8), np.uint8)
+        return cls(resume_ids, skills, bits)
+
+    def upsert(self, resume_id: str, skills_text: str):
+        """Add or replace one resume in place (for single-resume ingestion).
+
+        Only the resume's own bit column is touched; the packed arrays grow by
+        whole bytes (doubling) when an appended ordinal crosses a byte boundary.
+        """
+        found = extract_skills(skills_text)
+        ordinal = self.ordinals.get(resume_id)
+        if ordinal is None:
+            ordinal = len(self.resume_ids)
+            if ordinal // 8 >= self._bits.shape[1]:
+                self._grow_columns(ordinal // 8 + 1)
+            self.resume_ids.append(resume_id)
+            self.ordinals[resume_id] = ordinal
+            self._all_bits[ordinal // 8] |= 0x80 >> (ordinal % 8)
+        new_skills = sorted(found - self.skill_rows.keys())
+        if new_skills:
+            # Appended after the sorted build vocabulary; lookups go through skill_rows
+            self._bits = np.vstack([self._bits, np.zeros((len(new_skills), self._bits.shape[1]), np.uint8)])
+            for skill in new_skills:
+                self.skill_rows[skill] = len(self.skills)
+                self.skills.append(skill)
+
+        col, mask = ordinal // 8, np.uint8(0x80 >> (ordinal % 8))
+        self._bits[:, col] &= ~mask
+        for skill in found:
+            self._bits[self.skill_rows[skill], col] |= mask
+
+    def _grow_columns(self, needed: int):
+        capacity = max(needed, 2 * self._bits.shape[1], 8)
+        bits = np.zeros((len(self.skills), capacity), np.uint8)
+        all_bits = np.zeros(capacity, np.uint8)
+        bits[:, : self._bits.shape[1]] = self._bits
+        all_bits[: len(self._all_bits)] = self._all_bits
+        self._bits, self._all_bits = bits, all_bits
+
+    def save(self, path: Path = SKILL_INDEX):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp,
+            resume_ids=np.asarray(self.resume_ids, dtype=str),
+            skills=np.asarray(self.skills, dtype=str),
+            bits=self.bits,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = SKILL_INDEX) -> "SkillIndex":
+        with np.load(path) as data:
+            return cls(data["resume_ids"], data["skills"], data["bits"])
+
+    def resolve_bits(self, must_have=(), exclude=()) -> np.ndarray:
+        """Packed candidate set: all must_have skills, none of the excluded ones."""
+        acc = self.all_bits.copy()
+        for skill in must_have:
+            row = self.skill_rows.get(canonical_skill(skill))
+            if row is None:
+                return np.zeros_like(acc)  # nobody lists an unknown skill
+            acc &= self.bits[row]
+        for skill in exclude:
+            row = self.skill_rows.get(canonical_skill(skill))
+            if row is not None:
+                acc &= ~self.bits[row]
+        return acc
+
+    def resolve(self, must_have=(), exclude=()) -> list:
+        """Resume IDs with every must_have skill and no excluded skill."""
+        acc = self.resolve_bits(must_have, exclude)
+        return [self.resume_ids[i] for i in np.flatnonzero(np.unpackbits(acc, count=len(self.resume_ids)))]
+
+    def unknown_skills(self, skills) -> list:
+        """Requested skills that are not in the index vocabulary."""
+        return [s for s in skills if canonical_skill(s) not in self.skill_rows]
+
+
+def build_skill_index(resumes: list, path: Path = SKILL_INDEX) -> SkillIndex:
+    """Build from cleaned resume records and save."""
+    index = SkillIndex.build(resumes)
+    index.save(path)
+    return index
+
+
+def update_skill_index(resumes: list, path: Path = SKILL_INDEX):
+    """Add / replace cleaned resume records in the saved index; None if it has not been built."""
+    global _index_mtime
+    index = get_skill_index(path)
+    if index is None:
+        return None
+    for i, r in enumerate(resumes):
+        index.upsert(str(r.get("ID") or r.get("id", f"resume_{i}")), r.get("skills", ""))
+    index.save(path)
+    _index_mtime = Path(path).stat().st_mtime_ns  # the cached instance is already current
+    return index
+
+
+# Loaded once, reloaded when the file is rebuilt
+_index = None
+_index_mtime = None
+
+
+def get_skill_index(path: Path = SKILL_INDEX):
+    """Shared index instance, or None if it has not been built."""
+    global _index, _index_mtime
+    try:
+        mtime = Path(path).stat().st_mtime_ns
+    except OSError:
+        return None
+    if mtime != _index_mtime:
+        _index = SkillIndex.load(path)
+        _index_mtime = mtime
+    return _index
+
+
+def parse_skill_list(text: str) -> list:
+    """'SQL, Tableau' -> ['SQL', 'Tableau'] (for prompts / query lines)."""
+    return [s.strip() for s in str(text or "").split(",") if s.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the skill bitmap index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build from the cleaned resumes file")
+    build.add_argument("--input", default=str(RESUMES_CLEANED))
+    query = sub.add_parser("query", help="Resolve must-have / excluded skills to resume IDs")
+    query.add_argument("--must", nargs="*", default=[])
+    query.add_argument("--exclude", nargs="*", default=[])
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with open(args.input, "r", encoding="utf-8") as f:
+            resumes = json.load(f)
+        index = build_skill_index(resumes)
+        print(f"✅ Indexed {len(index)} resumes, {len(index.skills)} skills -> {SKILL_INDEX}")
+    else:
+        index = get_skill_index()
+        if index is None:
+            raise SystemExit("❌ No skill index; run: python retrieval_phase/skill_index.py build")
+        unknown = index.unknown_skills(args.must + args.exclude)
+        if unknown:
+            print(f"⚠️  Not in the skill vocabulary: {', '.join(unknown)}")
+        start = time.perf_counter()
+        ids = index.resolve(args.must, args.exclude)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"{len(ids)} resumes match ({elapsed_us:.0f} µs)")
+        print(", ".join(ids[:50]) + (" ..." if len(ids) > 50 else ""))
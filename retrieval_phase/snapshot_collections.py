@@ -0,0 +1,254 @@
+"""
+Export / import Chroma collections as portable snapshots (no re-embedding).
+
+Snapshot layout:
+    <snapshot_dir>/
+        manifest.json                 # collections, counts, dims, HNSW metadata, sha256 checksums
+        <collection>/embeddings.npy   # float32 (n, dim)
+        <collection>/records.parquet  # id, document, metadata (JSON string) - same row order
+        extra/                        # derived files stored next to chroma_db (title graph, BM25 / skill indexes)
+
+Usage:
+    python retrieval_phase/snapshot_collections.py export --out snapshots/latest
+    python retrieval_phase/snapshot_collections.py import --src snapshots/latest --replace
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import chromadb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import CHROMA, TITLE_NEIGHBOURS, BM25_INDEX, SKILL_INDEX, EMBEDDING_MODEL
+from chroma_utils import max_batch_size
+from query_cache import bump_index_version
+
+COLLECTIONS = ["resumes", "job_descriptions", "job_titles_index"]
+EXTRA_FILES = [TITLE_NEIGHBOURS, BM25_INDEX, SKILL_INDEX]
+SNAPSHOT_VERSION = 1
+PAGE_SIZE = 5000
+
+RECORD_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("document", pa.string()),
+    ("metadata", pa.string()),
+])
+
+
+def sha256_file(path: Path, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """Streaming sha256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_collection(client, name: str, out_dir: Path) -> dict:
+    """Stream one collection to embeddings.npy + records.parquet, page by page."""
+    collection = client.get_collection(name)
+    total = collection.count()
+    coll_dir = out_dir / name
+    coll_dir.mkdir(parents=True, exist_ok=True)
+
+    emb_path = coll_dir / "embeddings.npy"
+    rec_path = coll_dir / "records.parquet"
+
+    embeddings = None
+    dim = 0
+    written = 0
+    writer = pq.ParquetWriter(str(rec_path), RECORD_SCHEMA, compression="zstd")
+    try:
+        for offset in range(0, total, PAGE_SIZE):
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=PAGE_SIZE,
+                offset=offset
+            )
+            vectors = np.asarray(page["embeddings"], dtype=np.float32)
+            if embeddings is None:
+                dim = vectors.shape[1]
+                embeddings = np.lib.format.open_memmap(emb_path, mode="w+", dtype=np.float32, shape=(total, dim))
+            embeddings[written:written + len(vectors)] = vectors
+
+            documents = page.get("documents") or [None] * len(page["ids"])
+            metadatas = page.get("metadatas") or [None] * len(page["ids"])
+            writer.write_table(pa.Table.from_pydict({
+                "id": page["ids"],
+                "document": documents,
+                "metadata": [json.dumps(m, ensure_ascii=False) if m else None for m in metadatas],
+            }, schema=RECORD_SCHEMA))
+            written += len(page["ids"])
+    finally:
+        writer.close()
+
+    if embeddings is None:
+        np.save(emb_path, np.zeros((0, 0), dtype=np.float32))
+    else:
+        embeddings.flush()
+        del embeddings
+
+    return {
+        "count": written,
+        "dim": dim,
+        "metadata": collection.metadata or {},
+        "files": {
+            "embeddings.npy": sha256_file(emb_path),
+            "records.parquet": sha256_file(rec_path),
+        },
+    }
+
+
+def export_snapshot(out_dir: Path, collections=None, persist_directory: Path = CHROMA) -> dict:
+    """Export the given collections (default: all three) to out_dir."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    client = chromadb.PersistentClient(path=str(persist_directory))
+
+    manifest = {
+        "snapshot_version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_model": EMBEDDING_MODEL,
+        "collections": {},
+        "extra_files": {},
+    }
+
+    for name in collections or COLLECTIONS:
+        start = time.perf_counter()
+        try:
+            info = export_collection(client, name, out_dir)
+        except Exception as e:
+            print(f"⚠️  Skipping '{name}': {e}")
+            continue
+        manifest["collections"][name] = info
+        print(f"✅ Exported {name}: {info['count']} records, dim={info['dim']} "
+              f"({time.perf_counter() - start:.1f}s)")
+
+    extra_dir = out_dir / "extra"
+    for path in EXTRA_FILES:
+        source = Path(persist_directory) / path.name
+        if source.exists():
+            extra_dir.mkdir(exist_ok=True)
+            shutil.copy2(source, extra_dir / path.name)
+            manifest["extra_files"][path.name] = sha256_file(extra_dir / path.name)
+
+    with open(out_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"💾 Snapshot written to: {out_dir}")
+    return manifest
+
+
+def verify_snapshot(src_dir: Path, manifest: dict) -> bool:
+    """Check every file against the checksums recorded in the manifest."""
+    ok = True
+    for name, info in manifest["collections"].items():
+        for file_name, expected in info["files"].items():
+            actual = sha256_file(src_dir / name / file_name)
+            if actual != expected:
+                print(f"❌ Checksum mismatch: {name}/{file_name}")
+                ok = False
+    for file_name, expected in manifest.get("extra_files", {}).items():
+        if sha256_file(src_dir / "extra" / file_name) != expected:
+            print(f"❌ Checksum mismatch: extra/{file_name}")
+            ok = False
+    return ok
+
+
+def import_collection(client, name: str, info: dict, src_dir: Path, replace: bool = False):
+    """Bulk-load one collection from the snapshot using the stored embeddings."""
+    if replace:
+        try:
+            client.delete_collection(name)
+        except Exception:
+            pass
+
+    # No embedding function needed: vectors are precomputed
+    collection = client.create_collection(name=name, metadata=info.get("metadata") or None)
+
+    embeddings = np.load(src_dir / name / "embeddings.npy", mmap_mode="r")
+    batch = max_batch_size(client)
+    parquet = pq.ParquetFile(str(src_dir / name / "records.parquet"))
+
+    row = 0
+    for record_batch in parquet.iter_batches(batch_size=batch):
+        records = record_batch.to_pydict()
+        n = len(records["id"])
+        metadatas = [json.loads(m) if m else None for m in records["metadata"]]
+        kwargs = {
+            "ids": records["id"],
+            "embeddings": np.asarray(embeddings[row:row + n]).tolist(),
+        }
+        if any(d is not None for d in records["document"]):
+            kwargs["documents"] = records["document"]
+        if any(m is not None for m in metadatas):
+            kwargs["metadatas"] = metadatas
+        collection.add(**kwargs)
+        row += n
+
+    return collection.count()
+
+
+def import_snapshot(src_dir: Path, collections=None, replace: bool = False,
+                    persist_directory: Path = CHROMA, verify: bool = True) -> bool:
+    """Load a snapshot into the Chroma database at persist_directory."""
+    src_dir = Path(src_dir)
+    with open(src_dir / "manifest.json", "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if verify:
+        print("Verifying checksums...")
+        if not verify_snapshot(src_dir, manifest):
+            print("❌ Snapshot is corrupt; aborting import")
+            return False
+
+    Path(persist_directory).mkdir(parents=True, exist_ok=True)
+    client = chromadb.PersistentClient(path=str(persist_directory))
+
+    for name, info in manifest["collections"].items():
+        if collections and name not in collections:
+            continue
+        start = time.perf_counter()
+        try:
+            count = import_collection(client, name, info, src_dir, replace=replace)
+        except Exception as e:
+            print(f"❌ Failed to import '{name}': {e}")
+            print("   (use --replace to overwrite an existing collection)")
+            return False
+        bump_index_version(name)
+        print(f"✅ Imported {name}: {count} records ({time.perf_counter() - start:.1f}s)")
+
+    for file_name in manifest.get("extra_files", {}):
+        shutil.copy2(src_dir / "extra" / file_name, Path(persist_directory) / file_name)
+        print(f"✅ Restored {file_name}")
+
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export/import Chroma collection snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Write collections to a snapshot directory")
+    exp.add_argument("--out", required=True, help="Snapshot output directory")
+    exp.add_argument("--collections", nargs="*", default=None, help=f"Subset of {COLLECTIONS}")
+
+    imp = sub.add_parser("import", help="Load a snapshot into chroma_db")
+    imp.add_argument("--src", required=True, help="Snapshot directory")
+    imp.add_argument("--collections", nargs="*", default=None, help=f"Subset of {COLLECTIONS}")
+    imp.add_argument("--replace", action="store_true", help="Drop existing collections first")
+    imp.add_argument("--no-verify", action="store_true", help="Skip checksum verification")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(Path(args.out), args.collections)
+    else:
+        import_snapshot(Path(args.src), args.collections, replace=args.replace, verify=not args.no_verify)
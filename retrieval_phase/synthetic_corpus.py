@@ -0,0 +1,324 @@
+"""
+Deterministic synthetic resume / JD corpora for scale testing (100k - 1M documents).
+
+The generator learns a profile from the real cleaned files:
+    resumes   category mix, word-count distribution of every field (including
+              how often it is a placeholder such as "Not specified") and the
+              most frequent words per (category, field)
+    JDs       position titles, the section sequences that occur ("Job Title",
+              "Required Skills", ... and unlabelled continuation chunks) and
+              the word-count distribution and vocabulary of each section
+
+Documents are then drawn from that profile. The text is word-level (sampled
+from the category's vocabulary), so it carries the same category signal for
+embedding and BM25 without copying any real sentence. Document i depends only
+on (seed, i), so a 10k corpus is a prefix of the 1M one with the same seed,
+and workers can generate ranges in parallel.
+
+Output (same schemas as resumes_cleaned.json / job_descriptions_cleaned.json,
+written as a stream so memory stays flat):
+    <out>/resumes_cleaned.json
+    <out>/job_descriptions_cleaned.json
+    <out>/manifest.json
+    <out>/pdfs/<CATEGORY>/<ID>.pdf      with --pdfs N, for the extraction path
+
+Load them into a separate Chroma directory with get_resumes_collection /
+add_resumes_to_chroma (embeddings/), or point benchmark scripts at them, so
+the live collections and indexes are never touched.
+
+Usage:
+    python retrieval_phase/synthetic_corpus.py --resumes 100000 --jds 20000 --seed 7
+    python retrieval_phase/synthetic_corpus.py --resumes 1000000 --jds 0 --workers 8 --out /data/synthetic
+    python retrieval_phase/synthetic_corpus.py --resumes 5000 --pdfs 5000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from config import RESULTS, RESUMES_CLEANED, JDS_STRUCTURED
+from pdf_writer import write_text_pdf
+
+OUTPUT_DIR = RESULTS / "synthetic"
+RESUME_FIELDS = ["summary", "work_experience", "education", "skills"]
+# What cleaning_resumes.clean_resume writes for an empty field
+RESUME_PLACEHOLDERS = {
+    "summary": "No summary available",
+    "work_experience": "No experience listed",
+    "education": "Not specified",
+    "skills": "Not specified",
+}
+PDF_HEADINGS = {"summary": "Summary", "skills": "Skills", "work_experience": "Experience", "education": "Education"}
+VOCAB_SIZE = 3000          # words kept per (category, field) / JD section
+MAX_LENGTH_SAMPLES = 10000 # word counts kept per field for the empirical distribution
+CHUNK_SIZE = 1000          # documents per worker task
+CONTINUED = ""             # label of a JD chunk that continues the previous section
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9+#&./'-]*")
+
+
+def _vocabulary(counter: Counter) -> tuple:
+    """(words, cumulative weights) of the most frequent words, for random.choices."""
+    words, weights, total = [], [], 0
+    for word, count in counter.most_common(VOCAB_SIZE):
+        total += count
+        words.append(word)
+        weights.append(total)
+    return words, weights
+
+
+def _lengths(values: list) -> list:
+    if len(values) > MAX_LENGTH_SAMPLES:
+        values = random.Random(0).sample(values, MAX_LENGTH_SAMPLES)
+    return sorted(values)
+
+
+class CorpusProfile:
+    """Distributions learned from the real corpus; everything a worker needs to generate documents."""
+
+    def __init__(self, categories: list, resume_lengths: dict, resume_vocab: dict,
+                 titles: list, section_patterns: list, section_lengths: dict, section_vocab: dict,
+                 sources: list = None):
+        self.categories = categories                # [(category, count)]
+        self.resume_lengths = resume_lengths        # field -> sorted word counts (0 = placeholder)
+        self.resume_vocab = resume_vocab            # category -> field -> (words, cum weights)
+        self.titles = titles                        # [(position_title, count)]
+        self.section_patterns = section_patterns    # [(tuple of labels, count)]
+        self.section_lengths = section_lengths      # label -> sorted word counts
+        self.section_vocab = section_vocab          # label -> (words, cum weights)
+        self.sources = sources or []                # files the profile was learned from
+        self._category_weights = _cumulative([c for _, c in categories])
+        self._title_weights = _cumulative([c for _, c in titles])
+        self._pattern_weights = _cumulative([c for _, c in section_patterns])
+
+    @classmethod
+    def from_files(cls, resumes_file: Path = RESUMES_CLEANED, jds_file: Path = JDS_STRUCTURED) -> "CorpusProfile":
+        for path in (resumes_file, jds_file):
+            if not Path(path).exists():
+                raise SystemExit(f"❌ {path} not found; run the pipeline (retrieval_phase/pipeline.py) first")
+        with open(resumes_file, "r", encoding="utf-8") as f:
+            resumes = json.load(f)
+        with open(jds_file, "r", encoding="utf-8") as f:
+            jds = json.load(f)
+
+        categories = Counter(str(r.get("category", "UNKNOWN")).strip().upper() for r in resumes)
+        lengths = {field: [] for field in RESUME_FIELDS}
+        words = {}
+        for r in resumes:
+            category = str(r.get("category", "UNKNOWN")).strip().upper()
+            for field in RESUME_FIELDS:
+                text = str(r.get(field, "")).strip()
+                if not text or text == RESUME_PLACEHOLDERS[field]:
+                    lengths[field].append(0)
+                    continue
+                tokens = _WORD.findall(text)
+                lengths[field].append(len(tokens))
+                words.setdefault(category, {}).setdefault(field, Counter()).update(tokens)
+
+        labels = Counter()
+        for jd in jds:
+            labels.update(chunk.split(": ", 1)[0] for chunk in jd.get("structured_chunks", []) if ": " in chunk)
+        # A real section label heads at least 1% of the JDs; anything else is continuation text
+        known = {label for label, count in labels.items() if count >= max(2, len(jds) // 100)}
+
+        titles = Counter()
+        patterns = Counter()
+        section_lengths, section_words = {}, {}
+        for jd in jds:
+            title = " ".join(str(jd.get("position_title", "")).split())
+            if title:
+                titles[title] += 1
+            pattern, current = [], None
+            for chunk in jd.get("structured_chunks", []):
+                label, _, text = chunk.partition(": ")
+                if label in known:
+                    current = label
+                    pattern.append(label)
+                else:
+                    text = chunk
+                    pattern.append(CONTINUED)
+                tokens = _WORD.findall(text)
+                section_lengths.setdefault(pattern[-1], []).append(len(tokens))
+                if current is not None:
+                    # Continuation text shares the vocabulary of the section it continues
+                    section_words.setdefault(current, Counter()).update(tokens)
+            patterns[tuple(pattern)] += 1
+
+        return cls(
+            categories=sorted(categories.items()),
+            resume_lengths={field: _lengths(values) for field, values in lengths.items()},
+            resume_vocab={c: {f: _vocabulary(counter) for f, counter in fields.items()} for c, fields in words.items()},
+            titles=sorted(titles.items()),
+            section_patterns=sorted(patterns.items()),
+            section_lengths={label: _lengths(values) for label, values in section_lengths.items()},
+            section_vocab={label: _vocabulary(counter) for label, counter in section_words.items()},
+            sources=[str(resumes_file), str(jds_file)],
+        )
+
+    def resume(self, seed: int, index: int) -> dict:
+        """Resume number `index` of the corpus for `seed` (resumes_cleaned.json schema)."""
+        rng = random.Random(f"{seed}:resume:{index}")
+        category = rng.choices([c for c, _ in self.categories], cum_weights=self._category_weights)[0]
+        record = {"ID": f"syn{index:07d}", "category": category}
+        for field in RESUME_FIELDS:
+            length = rng.choice(self.resume_lengths[field]) if self.resume_lengths[field] else 0
+            vocab = self.resume_vocab.get(category, {}).get(field)
+            if not length or not vocab:
+                record[field] = RESUME_PLACEHOLDERS[field]
+            elif field == "skills":
+                record[field] = ", ".join(dict.fromkeys(rng.choices(vocab[0], cum_weights=vocab[1], k=length)))
+            else:
+                record[field] = _sentences(rng, vocab, length)
+        return record
+
+    def job_description(self, seed: int, index: int) -> dict:
+        """JD number `index` of the corpus for `seed` (job_descriptions_cleaned.json schema)."""
+        rng = random.Random(f"{seed}:jd:{index}")
+        title = rng.choices([t for t, _ in self.titles], cum_weights=self._title_weights)[0]
+        pattern = rng.choices([p for p, _ in self.section_patterns], cum_weights=self._pattern_weights)[0]
+        chunks, current = [], None
+        for label in pattern:
+            if label == "Job Title":
+                current = label
+                chunks.append(f"Job Title: {title}")
+                continue
+            current = current if label == CONTINUED else label
+            vocab = self.section_vocab.get(current)
+            lengths = self.section_lengths.get(label)
+            if not vocab or not lengths:
+                continue
+            text = _sentences(rng, vocab, max(rng.choice(lengths), 5))
+            chunks.append(text if label == CONTINUED else f"{label}: {text}")
+        return {"position_title": title, "structured_chunks": chunks}
+
+
+def _cumulative(counts: list) -> list:
+    total, out = 0, []
+    for count in counts:
+        total += count
+        out.append(total)
+    return out
+
+
+def _sentences(rng: random.Random, vocab: tuple, num_words: int) -> str:
+    words = rng.choices(vocab[0], cum_weights=vocab[1], k=num_words)
+    sentences, start = [], 0
+    while start < len(words):
+        end = start + rng.randint(8, 20)
+        sentence = " ".join(words[start:end])
+        sentences.append(sentence[:1].upper() + sentence[1:] + ".")
+        start = end
+    return " ".join(sentences)
+
+
+def resume_pdf_lines(record: dict) -> list:
+    """Headed-section layout the resume parser recognises."""
+    lines = []
+    for field in ("summary", "skills", "work_experience", "education"):
+        lines += [PDF_HEADINGS[field], record[field], ""]
+    return lines
+
+
+# === Workers ===
+
+_profile = None
+
+
+def _init_worker(profile: CorpusProfile):
+    global _profile
+    _profile = profile
+
+
+def _generate_chunk(kind: str, seed: int, start: int, stop: int, pdf_dir: str = None, pdf_limit: int = 0) -> list:
+    """JSON lines for documents [start, stop) (PDFs rendered for indexes below pdf_limit)."""
+    out = []
+    for index in range(start, stop):
+        if kind == "resume":
+            record = _profile.resume(seed, index)
+            if pdf_dir and index < pdf_limit:
+                write_text_pdf(Path(pdf_dir) / record["category"] / f"{record['ID']}.pdf", resume_pdf_lines(record))
+        else:
+            record = _profile.job_description(seed, index)
+        out.append(json.dumps(record, ensure_ascii=False))
+    return out
+
+
+def write_corpus(path: Path, kind: str, count: int, seed: int, profile: CorpusProfile, workers: int = 1,
+                 pdf_dir: Path = None, pdf_limit: int = 0) -> int:
+    """Stream `count` documents into a JSON array at path (atomically); returns the count."""
+    ranges = [(start, min(start + CHUNK_SIZE, count)) for start in range(0, count, CHUNK_SIZE)]
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    pool = None
+    if workers > 1 and len(ranges) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(profile,))
+        chunks = pool.map(_generate_chunk, *zip(*[(kind, seed, a, b, str(pdf_dir) if pdf_dir else None, pdf_limit)
+                                                  for a, b in ranges]))
+    else:
+        _init_worker(profile)
+        chunks = (_generate_chunk(kind, seed, a, b, str(pdf_dir) if pdf_dir else None, pdf_limit) for a, b in ranges)
+
+    written = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("[")
+            for lines in chunks:
+                for line in lines:
+                    f.write(",\n" if written else "\n")
+                    f.write(line)
+                    written += 1
+                print(f"  {kind}s: {written}/{count}", end="\r", flush=True)
+            f.write("\n]\n")
+        os.replace(tmp, path)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if tmp.exists():
+            tmp.unlink()
+    print()
+    return written
+
+
+def generate_corpus(num_resumes: int, num_jds: int, seed: int = 42, output_dir: Path = OUTPUT_DIR,
+                    workers: int = 1, pdfs: int = 0, profile: CorpusProfile = None) -> dict:
+    """Write the synthetic corpus and its manifest; returns the manifest."""
+    profile = profile or CorpusProfile.from_files()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    write_corpus(output_dir / RESUMES_CLEANED.name, "resume", num_resumes, seed, profile, workers,
+                 output_dir / "pdfs" if pdfs else None, pdfs)
+    write_corpus(output_dir / JDS_STRUCTURED.name, "jd", num_jds, seed, profile, workers)
+    manifest = {
+        "seed": seed,
+        "resumes": num_resumes,
+        "jds": num_jds,
+        "pdfs": min(pdfs, num_resumes),
+        "categories": len(profile.categories),
+        "profile_sources": profile.sources,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+    with open(output_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic resume / JD corpus")
+    parser.add_argument("--resumes", type=int, default=100000)
+    parser.add_argument("--jds", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR, help="Output directory")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--pdfs", type=int, default=0, help="Also render the first N resumes as PDFs")
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.resumes, args.jds, args.seed, args.out, args.workers, args.pdfs)
+    print(f"✅ {manifest['resumes']} resumes, {manifest['jds']} JDs ({manifest['pdfs']} PDFs) "
+          f"in {manifest['seconds']}s → {args.out}")
@@ -0,0 +1,182 @@
+"""
+In-memory, typo-tolerant autocomplete over the canonical job titles.
+
+Every word of every title goes into a character trie. A query is split into
+words and each word is matched as a *fuzzy prefix* of a title word (bounded
+Levenshtein distance, computed row by row while walking the trie), so
+"financ analyst" and "finacial analist" both reach "Financial Analyst"
+without touching the embedding model.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+def _edit_budget(token: str) -> int:
+    """Edits allowed for one query word: none for very short words, more for long ones."""
+    if len(token) <= 2:
+        return 0
+    if len(token) <= 5:
+        return 1
+    return 2
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+class _Node:
+    __slots__ = ("children", "word")
+
+    def __init__(self):
+        self.children = {}
+        self.word = None
+
+
+class TitleTrie:
+    """Prefix trie over title words with bounded edit-distance lookup."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.titles: List[str] = []
+        self.payloads: List[dict] = []
+        self._title_words: List[List[str]] = []
+        self._word_titles: Dict[str, set] = {}
+        self._exact: Dict[str, int] = {}
+
+    @classmethod
+    def from_titles(cls, titles, payloads=None) -> "TitleTrie":
+        trie = cls()
+        payloads = payloads or [None] * len(titles)
+        for title, payload in zip(titles, payloads):
+            trie.add(title, payload)
+        return trie
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title: str, payload: dict = None):
+        """Index one canonical title (duplicates by normalized text are ignored)."""
+        key = _normalize(title)
+        if not key or key in self._exact:
+            return
+
+        idx = len(self.titles)
+        self.titles.append(title)
+        self.payloads.append(payload or {})
+        words = key.split()
+        self._title_words.append(words)
+        self._exact[key] = idx
+
+        for word in words:
+            self._word_titles.setdefault(word, set()).add(idx)
+            node = self.root
+            for ch in word:
+                node = node.children.setdefault(ch, _Node())
+            node.word = word
+
+    def _fuzzy_prefix_words(self, token: str, max_edits: int) -> Dict[str, Tuple[int, int]]:
+        """
+        Vocabulary words that token matches as a fuzzy prefix.
+
+        Returns word -> (prefix_edits, full_edits): the best distance between token
+        and any prefix of the word, and the distance to the whole word.
+        """
+        matches = {}
+        first_row = list(range(len(token) + 1))
+
+        stack = [(child, ch, first_row, max_edits + 1) for ch, child in self.root.children.items()]
+        while stack:
+            node, ch, prev_row, best = stack.pop()
+            row = [prev_row[0] + 1]
+            for i in range(1, len(token) + 1):
+                cost = 0 if token[i - 1] == ch else 1
+                row.append(min(row[i - 1] + 1, prev_row[i] + 1, prev_row[i - 1] + cost))
+
+            best = min(best, row[-1])
+            if node.word is not None and best <= max_edits:
+                matches[node.word] = (best, row[-1])
+
+            # Keep descending while the token can still align, or once it has
+            # matched a prefix (every word below this node is a completion)
+            if min(row) <= max_edits or best <= max_edits:
+                for next_ch, child in node.children.items():
+                    stack.append((child, next_ch, row, best))
+
+        return matches
+
+    def lookup(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Titles whose words are matched (in any order) by all query words.
+
+        Ranked by total edits, then untyped words, then title length.
+        """
+        tokens = _normalize(query).split()
+        if not tokens:
+            return []
+
+        per_token = []
+        candidates = None
+        for token in tokens:
+            words = self._fuzzy_prefix_words(token, _edit_budget(token))
+            if not words:
+                return []
+            per_token.append(words)
+            titles = set()
+            for word in words:
+                titles |= self._word_titles[word]
+            candidates = titles if candidates is None else candidates & titles
+            if not candidates:
+                return []
+
+        results = []
+        for idx in candidates:
+            title_words = self._title_words[idx]
+            edits = 0
+            completed = False
+            for words in per_token:
+                best = min((words[w] for w in title_words if w in words), key=lambda e: e[0])
+                edits += best[0]
+                completed = completed or best[1] > best[0]
+            extra_words = max(0, len(title_words) - len(tokens))
+            results.append(self._result(idx, edits, extra_words, completed))
+
+        results.sort(key=lambda r: (r["edits"], r["extra_words"], r["completed"], len(r["title"])))
+        return results[:limit]
+
+    def _result(self, idx: int, edits: int, extra_words: int, completed: bool) -> dict:
+        return {
+            "title": self.titles[idx],
+            "edits": edits,
+            "extra_words": extra_words,
+            "completed": completed,
+            "payload": self.payloads[idx],
+        }
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Suggested canonical titles for a partial / misspelled input."""
+        return [r["title"] for r in self.lookup(prefix, limit=limit)]
+
+    def match(self, query: str) -> Optional[str]:
+        """
+        Canonical title for an exact or near-exact query, or None if not confident.
+
+        Confident means every title word was typed (no extra words) and the best
+        candidate beats the runner-up.
+        """
+        exact_idx = self._exact.get(_normalize(query))
+        if exact_idx is not None:
+            return self.titles[exact_idx]
+
+        results = self.lookup(query, limit=2)
+        if not results:
+            return None
+
+        best = results[0]
+        if best["extra_words"] > 0:
+            return None
+        if len(results) > 1:
+            runner_up = results[1]
+            if (runner_up["edits"], runner_up["extra_words"], runner_up["completed"]) <= \
+                    (best["edits"], best["extra_words"], best["completed"]):
+                return None
+        return best["title"]
@@ -0,0 +1,319 @@
+"""
+Per-stage tracing and metrics for the retrieval path.
+
+    @tracing.traced("search")              # top-level call
+    def search(...):
+        with tracing.span("search.resume_query"):
+            results = collection.query(...)
+        tracing.record_fetch("search", fetched=80, returned=40)
+
+Spans nest per thread. Every finished span adds its duration to a latency
+histogram for its stage name. A top-level span also stores its whole trace
+(root + children) in a ring buffer of the last TRACE_BUFFER traces.
+record_fetch counts the hits fetched from Chroma against the candidates
+returned, which gives the over-fetch ratio per stage.
+
+Off by default (config.TRACING_ENABLED, or enable()). When off, span() hands
+back one shared no-op context manager and traced() calls straight through,
+so the cost is a flag check per stage.
+
+Export:
+    prometheus_text()   Prometheus text format: latency histograms, fetched /
+                        returned counters, over-fetch ratio, query cache hit rates
+    otel_json()         the same metrics plus the buffered spans, as
+                        OpenTelemetry OTLP/JSON (resourceMetrics / resourceSpans)
+    export(path)        .json -> OTel, anything else -> Prometheus
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from config import TRACING_ENABLED, TRACE_BUFFER
+
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SERVICE_NAME = "resume-retrieval"
+
+_enabled = TRACING_ENABLED
+_local = threading.local()
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """One timed stage; children share the root's trace ID."""
+
+    __slots__ = ("name", "attributes", "trace_id", "span_id", "parent_id", "root", "finished",
+                 "start_ns", "end_ns", "_start_perf")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        stack = _stack()
+        parent = stack[-1] if stack else None
+        self.root = parent.root if parent else self
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.finished = [] if parent is None else None
+        stack.append(self)
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ns = time.perf_counter_ns() - self._start_perf
+        self.end_ns = self.start_ns + duration_ns
+        _stack().pop()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        metrics.observe(self.name, duration_ns / 1e6)
+        self.root.finished.append(self)
+        if self.root is self:
+            metrics.add_trace(self.finished)
+        return False
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def span(name: str, **attributes):
+    """Context manager timing one stage (a shared no-op when tracing is off)."""
+    if not _enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def traced(name: str):
+    """Decorator: run the function inside a span called name."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_fetch(stage: str, fetched: int, returned: int):
+    """Count results fetched from the index vs handed back, for the over-fetch ratio."""
+    if _enabled:
+        metrics.count_fetch(stage, fetched, returned)
+
+
+class Metrics:
+    """Thread-safe aggregates behind the exporters."""
+
+    def __init__(self, trace_buffer: int = TRACE_BUFFER):
+        self.lock = threading.Lock()
+        self.trace_buffer = trace_buffer
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_ns = time.time_ns()
+            self.latency = {}       # stage -> {"buckets": [...], "sum_ms": float, "count": int}
+            self.fetched = {}
+            self.returned = {}
+            self.traces = deque(maxlen=self.trace_buffer)
+
+    def observe(self, stage: str, ms: float):
+        with self.lock:
+            histogram = self.latency.get(stage)
+            if histogram is None:
+                histogram = self.latency[stage] = {"buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                                                   "sum_ms": 0.0, "count": 0}
+            histogram["buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+            histogram["sum_ms"] += ms
+            histogram["count"] += 1
+
+    def count_fetch(self, stage: str, fetched: int, returned: int):
+        with self.lock:
+            self.fetched[stage] = self.fetched.get(stage, 0) + fetched
+            self.returned[stage] = self.returned.get(stage, 0) + returned
+
+    def add_trace(self, spans: list):
+        with self.lock:
+            self.traces.append(spans)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "started_ns": self.started_ns,
+                "latency": {stage: {"buckets": list(h["buckets"]), "sum_ms": h["sum_ms"], "count": h["count"]}
+                            for stage, h in self.latency.items()},
+                "fetched": dict(self.fetched),
+                "returned": dict(self.returned),
+                "traces": list(self.traces),
+            }
+
+
+metrics = Metrics()
+
+
+def reset():
+    metrics.reset()
+
+
+def _cache_stats() -> dict:
+    # Imported here: query_cache itself is traced
+    from query_cache import cache_stats
+    return cache_stats()
+
+
+def _overfetch(snapshot: dict) -> dict:
+    return {stage: round(fetched / snapshot["returned"][stage], 4)
+            for stage, fetched in snapshot["fetched"].items() if snapshot["returned"].get(stage)}
+
+
+# === Prometheus ===
+
+def _prom_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text() -> str:
+    snapshot = metrics.snapshot()
+    lines = ["# HELP retrieval_stage_duration_seconds Time spent in each retrieval stage.",
+             "# TYPE retrieval_stage_duration_seconds histogram"]
+    for stage, h in sorted(snapshot["latency"].items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (None,), h["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound is None else _prom_number(bound / 1000)
+            lines.append(f'retrieval_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'retrieval_stage_duration_seconds_sum{{stage="{stage}"}} {_prom_number(h["sum_ms"] / 1000)}')
+        lines.append(f'retrieval_stage_duration_seconds_count{{stage="{stage}"}} {h["count"]}')
+
+    for name, key, help_text in (("retrieval_results_fetched_total", "fetched", "Hits fetched from Chroma."),
+                                 ("retrieval_results_returned_total", "returned", "Candidates returned.")):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{stage="{stage}"}} {value}' for stage, value in sorted(snapshot[key].items())]
+    lines += ["# HELP retrieval_overfetch_ratio Hits fetched per candidate returned.",
+              "# TYPE retrieval_overfetch_ratio gauge"]
+    lines += [f'retrieval_overfetch_ratio{{stage="{stage}"}} {_prom_number(ratio)}'
+              for stage, ratio in sorted(_overfetch(snapshot).items())]
+
+    caches = _cache_stats()
+    for name, key, kind in (("retrieval_cache_hits_total", "hits", "counter"),
+                            ("retrieval_cache_misses_total", "misses", "counter"),
+                            ("retrieval_cache_hit_ratio", "hit_rate", "gauge")):
+        lines.append(f"# TYPE {name} {kind}")
+        lines += [f'{name}{{cache="{cache}"}} {_prom_number(stats[key])}' for cache, stats in sorted(caches.items())]
+    return "\n".join(lines) + "\n"
+
+
+# === OpenTelemetry (OTLP/JSON) ===
+
+def _otel_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otel_attributes(attributes: dict) -> list:
+    return [{"key": key, "value": _otel_value(value)} for key, value in attributes.items()]
+
+
+def otel_json() -> dict:
+    snapshot = metrics.snapshot()
+    start, now = str(snapshot["started_ns"]), str(time.time_ns())
+    cumulative = 2   # AGGREGATION_TEMPORALITY_CUMULATIVE
+
+    def point(attributes: dict, **value) -> dict:
+        return {"attributes": _otel_attributes(attributes), "startTimeUnixNano": start, "timeUnixNano": now, **value}
+
+    def counter(name: str, unit: str, values: dict, label: str) -> dict:
+        return {"name": name, "unit": unit, "sum": {"aggregationTemporality": cumulative, "isMonotonic": True,
+                "dataPoints": [point({label: k}, asInt=str(v)) for k, v in sorted(values.items())]}}
+
+    def gauge(name: str, values: dict, label: str) -> dict:
+        return {"name": name, "unit": "1", "gauge": {
+                "dataPoints": [point({label: k}, asDouble=float(v)) for k, v in sorted(values.items())]}}
+
+    caches = _cache_stats()
+    otel_metrics = [
+        {"name": "retrieval.stage.duration", "unit": "ms", "histogram": {
+            "aggregationTemporality": cumulative,
+            "dataPoints": [point({"stage": stage}, count=str(h["count"]), sum=h["sum_ms"],
+                                 bucketCounts=[str(c) for c in h["buckets"]],
+                                 explicitBounds=list(LATENCY_BUCKETS_MS))
+                           for stage, h in sorted(snapshot["latency"].items())]}},
+        counter("retrieval.results.fetched", "1", snapshot["fetched"], "stage"),
+        counter("retrieval.results.returned", "1", snapshot["returned"], "stage"),
+        gauge("retrieval.overfetch.ratio", _overfetch(snapshot), "stage"),
+        counter("retrieval.cache.hits", "1", {c: s["hits"] for c, s in caches.items()}, "cache"),
+        counter("retrieval.cache.misses", "1", {c: s["misses"] for c, s in caches.items()}, "cache"),
+        gauge("retrieval.cache.hit_ratio", {c: s["hit_rate"] for c, s in caches.items()}, "cache"),
+    ]
+    spans = [{
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+        "name": s.name,
+        "kind": 1,   # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": _otel_attributes(s.attributes),
+        "status": {"code": 2} if "error" in s.attributes else {},
+    } for trace in snapshot["traces"] for s in trace]
+
+    resource = {"attributes": _otel_attributes({"service.name": SERVICE_NAME})}
+    scope = {"name": "retrieval_phase.tracing"}
+    return {
+        "resourceMetrics": [{"resource": resource, "scopeMetrics": [{"scope": scope, "metrics": otel_metrics}]}],
+        "resourceSpans": [{"resource": resource, "scopeSpans": [{"scope": scope, "spans": spans}]}],
+    }
+
+
+def export(path) -> str:
+    """Write the current metrics to path (OTel JSON for .json, else Prometheus text)."""
+    path = str(path)
+    body = json.dumps(otel_json(), indent=2) if path.endswith(".json") else prometheus_text()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,192 @@
+"""
+Sweep HNSW parameters (M, construction_ef, search_ef) on an already-built collection.
+
+For every combination the collection's stored vectors are re-indexed into a
+scratch Chroma database, then we measure:
+- recall@k against exact brute-force cosine search (NumPy)
+- p50 / p99 single-query latency
+- build time and on-disk size
+
+The best setting (lowest p99 latency that reaches the target recall) is printed
+and all measurements are saved to results/hnsw_tuning_<collection>.json.
+
+Usage:
+    python retrieval_phase/tune_hnsw.py --collection resumes --k 10 --target-recall 0.95
+"""
+
+import argparse
+import itertools
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from config import CHROMA, RESULTS, HNSW_SPACE, HNSW_PARAMS
+from chroma_utils import max_batch_size, fetch_all
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Exact cosine top-k (indices into vectors) for each query row."""
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True).clip(min=1e-12)
+    sims = q @ normed.T
+    top = np.argpartition(-sims, kth=min(k, sims.shape[1] - 1), axis=1)[:, :k]
+    # Order each row by similarity
+    order = np.take_along_axis(sims, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def dir_size_mb(path: Path) -> float:
+    """Total size of all files under path, in MB."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / (1024 * 1024)
+
+
+def measure_config(ids, vectors, query_vectors, truth_ids, k, m, construction_ef, search_ef):
+    """Build a scratch index with one HNSW setting and measure it."""
+    workdir = Path(tempfile.mkdtemp(prefix="hnsw_tune_"))
+    try:
+        client = chromadb.PersistentClient(path=str(workdir))
+        collection = client.create_collection(
+            name="tune",
+            metadata={
+                "hnsw:space": HNSW_SPACE,
+                "hnsw:M": m,
+                "hnsw:construction_ef": construction_ef,
+                "hnsw:search_ef": search_ef,
+            },
+        )
+
+        batch = max_batch_size(client)
+        start = time.perf_counter()
+        for i in range(0, len(ids), batch):
+            collection.add(ids=ids[i:i + batch], embeddings=vectors[i:i + batch].tolist())
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        recalls = []
+        for q, expected in zip(query_vectors, truth_ids):
+            t0 = time.perf_counter()
+            res = collection.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            recalls.append(len(set(res["ids"][0]) & expected) / k)
+
+        return {
+            "M": m,
+            "construction_ef": construction_ef,
+            "search_ef": search_ef,
+            "recall_at_k": round(float(np.mean(recalls)), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "build_seconds": round(build_seconds, 2),
+            "disk_mb": round(dir_size_mb(workdir), 2),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def recommend(rows: list, target_recall: float) -> dict:
+    """Fastest (p99) config that reaches target recall; otherwise the most accurate one."""
+    good = [r for r in rows if r["recall_at_k"] >= target_recall]
+    if good:
+        return min(good, key=lambda r: (r["p99_ms"], r["disk_mb"], r["build_seconds"]))
+    return max(rows, key=lambda r: (r["recall_at_k"], -r["p99_ms"]))
+
+
+def tune_collection(collection_name: str, k: int = 10, num_queries: int = 200,
+                    m_values=(8, 16, 32), construction_efs=(100, 200), search_efs=(10, 50, 100, 200),
+                    target_recall: float = 0.95, seed: int = 42):
+    """Run the parameter sweep for one collection and save the report."""
+    client = chromadb.PersistentClient(path=str(CHROMA))
+    try:
+        source = client.get_collection(collection_name)
+    except Exception as e:
+        print(f"❌ Collection '{collection_name}' not found: {e}")
+        return None
+
+    print(f"Loading vectors from '{collection_name}'...")
+    data = fetch_all(source, include=["embeddings"])
+    ids = data["ids"]
+    if len(ids) <= k:
+        print(f"❌ Collection has only {len(ids)} vectors; need more than k={k}")
+        return None
+
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(ids), size=min(num_queries, len(ids)), replace=False)
+    query_vectors = vectors[sample]
+
+    print(f"Computing exact top-{k} for {len(sample)} queries over {len(ids)} vectors...")
+    exact = exact_top_k(vectors, query_vectors, k)
+    truth_ids = [{ids[j] for j in row} for row in exact]
+
+    rows = []
+    grid = list(itertools.product(m_values, construction_efs, search_efs))
+    print(f"Sweeping {len(grid)} HNSW configurations...\n")
+    print(f"{'M':>4} {'c_ef':>6} {'s_ef':>6} | {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'disk MB':>8}")
+    print("-" * 70)
+    for m, c_ef, s_ef in grid:
+        row = measure_config(ids, vectors, query_vectors, truth_ids, k, m, c_ef, s_ef)
+        rows.append(row)
+        print(f"{m:>4} {c_ef:>6} {s_ef:>6} | {row['recall_at_k']:>7.4f} {row['p50_ms']:>8.3f} "
+              f"{row['p99_ms']:>8.3f} {row['build_seconds']:>8.2f} {row['disk_mb']:>8.2f}")
+    print("-" * 70)
+
+    best = recommend(rows, target_recall)
+    report = {
+        "collection": collection_name,
+        "num_vectors": len(ids),
+        "num_queries": int(len(sample)),
+        "k": k,
+        "target_recall": target_recall,
+        "current": HNSW_PARAMS.get(collection_name, {}),
+        "results": rows,
+        "recommended": best,
+    }
+
+    output = RESULTS / f"hnsw_tuning_{collection_name}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n✅ Recommended for '{collection_name}' (recall@{k} ≥ {target_recall}):")
+    print(f'   "{collection_name}": {{"construction_ef": {best["construction_ef"]}, '
+          f'"search_ef": {best["search_ef"]}, "M": {best["M"]}}}')
+    print(f"   recall={best['recall_at_k']}  p99={best['p99_ms']} ms  disk={best['disk_mb']} MB")
+    print(f"💾 Saved report to: {output}")
+    print("Update HNSW_PARAMS in retrieval_phase/config.py and rebuild the collection to apply.")
+    return report
+
+
+def _int_list(value: str):
+    return tuple(int(v) for v in value.split(",") if v.strip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune HNSW parameters for a Chroma collection")
+    parser.add_argument("--collection", default="resumes",
+                        choices=["resumes", "job_descriptions", "job_titles_index"])
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled query vectors")
+    parser.add_argument("--m", type=_int_list, default=(8, 16, 32), help="Comma-separated M values")
+    parser.add_argument("--construction-ef", type=_int_list, default=(100, 200))
+    parser.add_argument("--search-ef", type=_int_list, default=(10, 50, 100, 200))
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("HNSW Parameter Tuning")
+    print("=" * 70)
+    tune_collection(
+        args.collection,
+        k=args.k,
+        num_queries=args.queries,
+        m_values=args.m,
+        construction_efs=args.construction_ef,
+        search_efs=args.search_ef,
+        target_recall=args.target_recall,
+        seed=args.seed,
+    )